@@ -0,0 +1,235 @@
+import os
+import time
+import asyncio
+import logging
+
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+
+from utils import call_automation, PST
+from schedule import hour_in_words
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("availability_cache")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+# Slot lookup on the automation backend. Not part of the backend's published
+# contract yet, so it is off until the backend confirms the path; unset, the
+# agent asks for the caller's preferred time and the booking call verifies it.
+#
+#   POST {"conversation_id": ..., "channel": "voice",
+#         "start_date": "2026-03-06", "end_date": "2026-03-20"}
+#   200  {"slots": [{"visit_date": "2026-03-06", "visit_time": "10:00",
+#                    "available": true}, ...]}
+#
+# Any other answer (404 included) leaves the cache empty for the call.
+AVAILABILITY_ENDPOINT = os.getenv("AVAILABILITY_ENDPOINT", "")
+
+AVAILABILITY_PREFETCH_DAYS = int(os.getenv("AVAILABILITY_PREFETCH_DAYS", 14))
+
+AVAILABILITY_TTL_SECONDS = float(os.getenv("AVAILABILITY_TTL_SECONDS", 300))
+
+AVAILABILITY_FETCH_TIMEOUT = 10
+
+
+# =====================================================
+# SLOT CACHE
+# =====================================================
+
+class AvailabilityCache:
+    """
+    Visit slots returned by AVAILABILITY_ENDPOINT for the current call.
+
+    Each call runs in its own job process, so the cache lives for one call:
+    the entrypoint starts the fetch while the caller is still talking, and
+    the availability and booking tools reuse it for the rest of the call.
+    Nothing carries over to the next call. The TTL only matters for long
+    calls, where the slots may have changed since the fetch.
+
+    Slots are keyed by parsed (date, time), so the cache can be matched
+    against whatever format the model passes to the booking tool.
+    """
+
+    def __init__(self, ttl: float = AVAILABILITY_TTL_SECONDS):
+        self.ttl = ttl
+
+        self._slots: dict[tuple[date, dt_time], bool] = {}
+        self._fetched_at: float | None = None
+        self._start: date | None = None
+        self._end: date | None = None
+        self._fetch_task: asyncio.Task | None = None
+
+    # ── State ─────────────────────────────────────────────────────────────────
+
+    @property
+    def fresh(self) -> bool:
+        return (
+            self._fetched_at is not None
+            and time.monotonic() - self._fetched_at < self.ttl
+        )
+
+    def covers(self, day: date) -> bool:
+        return (
+            self.fresh
+            and self._start is not None
+            and self._start <= day <= self._end
+        )
+
+    def invalidate(self):
+        """Drops every cached slot (call after a booking changes availability)."""
+        self._slots.clear()
+        self._fetched_at = None
+
+        # A response already in flight may predate the booking
+        if self._fetch_task and not self._fetch_task.done():
+            self._fetch_task.cancel()
+
+    # ── Fetching ──────────────────────────────────────────────────────────────
+
+    def prefetch(self, conversation_id: str | None, days: int = AVAILABILITY_PREFETCH_DAYS):
+        """
+        Starts a background refresh unless one is already running, the
+        cache is still fresh or AVAILABILITY_ENDPOINT is unset. Never raises.
+        """
+
+        if not AVAILABILITY_ENDPOINT or self.fresh:
+            return
+
+        if self._fetch_task and not self._fetch_task.done():
+            return
+
+        self._fetch_task = asyncio.create_task(self._fetch(conversation_id, days))
+
+    async def wait(self, conversation_id: str | None, timeout: float = AVAILABILITY_FETCH_TIMEOUT) -> bool:
+        """
+        Waits for an in-flight refresh (starting one if the cache is stale).
+        Returns True if the cache is fresh afterwards.
+        """
+
+        self.prefetch(conversation_id)
+
+        if self._fetch_task and not self._fetch_task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._fetch_task), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Availability fetch still running after %ss", timeout)
+
+        return self.fresh
+
+    async def _fetch(self, conversation_id: str | None, days: int):
+        start = datetime.now(tz=PST).date()
+        end = start + timedelta(days=days)
+
+        try:
+            result = await call_automation(AVAILABILITY_ENDPOINT, {
+                "conversation_id": conversation_id,
+                "channel": "voice",
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+            })
+        except Exception as e:
+            logger.warning("Availability prefetch failed: %s", e)
+            return
+
+        slots = result.get("slots") if isinstance(result, dict) else None
+
+        if not isinstance(slots, list):
+            logger.warning("Availability response missing slots: %s", result)
+            return
+
+        parsed: dict[tuple[date, dt_time], bool] = {}
+
+        for slot in slots:
+            # Machine fields, not speech: "10:00" is ten in the morning
+            try:
+                day = date.fromisoformat(str(slot["visit_date"]))
+                at = dt_time.fromisoformat(str(slot["visit_time"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+            parsed[(day, at)] = bool(slot.get("available"))
+
+        self._slots = parsed
+        self._start = start
+        self._end = end
+        self._fetched_at = time.monotonic()
+
+        logger.info(
+            "Availability cached | slots=%s | open=%s | %s..%s",
+            len(parsed),
+            sum(parsed.values()),
+            start,
+            end,
+        )
+
+    # ── Lookup ────────────────────────────────────────────────────────────────
+
+    def is_taken(self, day: date, at: dt_time) -> bool:
+        """
+        True only if the cache positively knows the slot is taken.
+        Unknown slots are never reported as taken.
+        """
+
+        if not self.covers(day):
+            return False
+
+        return self._slots.get((day, at)) is False
+
+    def open_slots(self, day: date) -> list[dt_time] | None:
+        """
+        Open slots for a day, or None if the cache cannot answer.
+        """
+
+        if not self.covers(day):
+            return None
+
+        return sorted(
+            at for (slot_day, at), available in self._slots.items()
+            if slot_day == day and available
+        )
+
+
+# =====================================================
+# SPANISH FORMATTING
+# =====================================================
+
+def describe_open_slots(slots: list[dt_time]) -> str:
+    """
+    Example:
+        [10:00, 11:30] -> "a las diez de la mañana o a las once y media de la mañana"
+    """
+
+    phrases = [
+        f"a la {hour_in_words(at)}" if at.hour % 12 == 1 else f"a las {hour_in_words(at)}"
+        for at in slots
+    ]
+
+    if len(phrases) == 1:
+        return phrases[0]
+
+    return ", ".join(phrases[:-1]) + " o " + phrases[-1]
+
+
+# =====================================================
+# PER-CALL INSTANCE
+# =====================================================
+
+# Module-level, but a job process handles a single call
+
+_availability_cache: AvailabilityCache | None = None
+
+
+def get_availability_cache() -> AvailabilityCache:
+    global _availability_cache
+
+    if _availability_cache is None:
+        _availability_cache = AvailabilityCache()
+
+    return _availability_cache
@@ -0,0 +1,291 @@
+"""
+Runs inbound_agent.entrypoint end to end against local stand-ins.
+
+Import this module only after ``bench.run_voice_bench.configure_environment``
+has pointed the agent at the mock backend: utils, outbox, tts_cache and
+worker_metrics read their settings at import time.
+"""
+
+import time
+import random
+import asyncio
+import logging
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from livekit.agents import utils as lk_utils, vad
+from livekit.agents.job import _JobContextVar
+
+import utils
+import availability
+import inbound_agent
+from prompt_store import PromptTemplateStore
+from stt_preflight import PreflightSTT
+from tts_cache import PhraseAudioCache
+
+from bench.mock_backend import MockBackend
+from bench.scenarios import Scenario
+from bench.standins import (
+    PROFILES,
+    FakeSTT,
+    FakeTTS,
+    FakeVAD,
+    LatencyProfile,
+    LocalAudioIO,
+    LocalInferenceExecutor,
+    ScriptedCaller,
+    ScriptedLLM,
+)
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("bench_harness")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+# Longest the harness waits for any single step of a call
+STEP_TIMEOUT = 30
+
+BENCH_CALLER_NUMBER = "+16865550100"
+BENCH_TRUNK_NUMBER = "+16865550199"
+
+# Shared like the worker's inference process: models load once per run
+_inference_executor = LocalInferenceExecutor()
+
+
+# =====================================================
+# JOB CONTEXT STAND-IN
+# =====================================================
+
+class BenchProcess:
+    def __init__(self, userdata: dict):
+        self.userdata = userdata
+
+
+class BenchRoom:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class BenchParticipant:
+    def __init__(self, identity: str, attributes: dict[str, str]):
+        self.identity = identity
+        self.attributes = attributes
+
+
+class BenchJobContext:
+    """
+    The subset of JobContext that entrypoint uses. The caller is already
+    "in the room" and connecting is instant, so time-to-greeting measures
+    the agent's own startup only.
+    """
+
+    def __init__(self, proc: BenchProcess, room_name: str, participant: BenchParticipant):
+        self.proc = proc
+        self.room = BenchRoom(room_name)
+        self.agent = BenchParticipant("agent-bench", attributes={})
+        self.inference_executor = _inference_executor
+        self._participant = participant
+        self._shutdown_callbacks = []
+
+    async def connect(self, **kwargs):
+        return None
+
+    async def wait_for_participant(self, **kwargs) -> BenchParticipant:
+        return self._participant
+
+    def add_shutdown_callback(self, callback):
+        self._shutdown_callbacks.append(callback)
+
+    async def shutdown(self, reason: str):
+        await asyncio.gather(
+            *(callback(reason) for callback in self._shutdown_callbacks),
+            return_exceptions=True,
+        )
+
+
+def _needs_job_context() -> bool:
+    return inbound_agent.TURN_DETECTION == "multilingual"
+
+
+# =====================================================
+# PER-PROCESS RESOURCES
+# =====================================================
+
+async def build_phrase_cache(cache_dir: Path) -> PhraseAudioCache:
+    """Fills the fixed-phrase cache from FakeTTS, like prewarm does from Google."""
+
+    cache = PhraseAudioCache(
+        voice_name="bench",
+        model_name="silence",
+        speaking_rate=inbound_agent.TTS_OPTIONS["speaking_rate"],
+        sample_rate=inbound_agent.TTS_SAMPLE_RATE,
+        cache_dir=cache_dir,
+    )
+
+    await cache.fill(
+        FakeTTS(PROFILES["zero"], random.Random(0)),
+        inbound_agent.FIXED_PHRASES + inbound_agent.REPLY_CACHE_SENTENCES,
+    )
+    return cache
+
+
+def load_prompt_store() -> PromptTemplateStore:
+    store = PromptTemplateStore(inbound_agent.INSTRUCTIONS_PATH)
+    store.load()
+    return store
+
+
+# =====================================================
+# ONE CALL
+# =====================================================
+
+@dataclass
+class CallResult:
+    scenario: str
+    conversation_id: str | None = None
+    time_to_greeting: float | None = None
+    # Caller stops speaking -> first agent audio (filler or reply)
+    first_audio: list[float] = field(default_factory=list)
+    # Caller stops speaking -> the scripted reply starts playing
+    reply: list[float] = field(default_factory=list)
+    tools: list[tuple[str, float]] = field(default_factory=list)
+    # Turns with a mid-sentence pause, and how many of them the agent
+    # answered before the caller had finished
+    paused_turns: int = 0
+    false_responses: int = 0
+    automation: list[tuple[str, float, bool]] = field(default_factory=list)
+    cpu_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    after_call: dict | None = None
+    error: str | None = None
+
+
+async def run_call(
+    scenario: Scenario,
+    *,
+    profile: LatencyProfile,
+    backend: MockBackend,
+    rng: random.Random,
+    phrase_cache: PhraseAudioCache,
+    prompt_store: PromptTemplateStore,
+    inference_vad: vad.VAD | None = None,
+) -> CallResult:
+    """
+    Drives one call through inbound_agent.entrypoint and measures it.
+
+    ``inference_vad`` runs a real VAD model over the call's audio alongside
+    the scripted one (see FakeVAD), for CPU measurements.
+    """
+
+    result = CallResult(scenario=scenario.name)
+
+    caller = ScriptedCaller(profile, rng)
+    scripted_llm = ScriptedLLM(scenario.turns, profile, rng)
+    local_io = LocalAudioIO()
+
+    # Wrapped the way prewarm wraps Deepgram
+    fake_stt = FakeSTT(caller)
+    if inbound_agent.PREEMPTIVE_INTERIMS:
+        fake_stt = PreflightSTT(fake_stt)
+
+    proc = BenchProcess({
+        "vad": FakeVAD(caller, inference_vad),
+        "stt": fake_stt,
+        "llm": scripted_llm,
+        "tts": FakeTTS(profile, rng),
+        "phrase_cache": phrase_cache,
+        "prompt_store": prompt_store,
+        "local_audio_io": local_io,
+    })
+
+    room_name = lk_utils.shortuuid("bench_room_")
+    ctx = BenchJobContext(
+        proc,
+        room_name,
+        BenchParticipant(
+            identity=lk_utils.shortuuid("sip_"),
+            attributes={
+                "sip.phoneNumber": BENCH_CALLER_NUMBER,
+                "sip.trunkPhoneNumber": BENCH_TRUNK_NUMBER,
+            },
+        ),
+    )
+
+    # Each job process starts with empty process-wide caches
+    availability._availability_cache = None
+
+    removed = backend.removal_event(room_name)
+
+    def on_automation(endpoint: str, seconds: float, ok: bool):
+        result.automation.append((endpoint, seconds, ok))
+
+    utils.add_automation_listener(on_automation)
+
+    cpu_started = time.process_time()
+    started = time.time()
+    output = local_io.output
+
+    # The turn detector finds its inference executor through the job context;
+    # other modes keep livekit's no-job-context behaviour
+    job_context_token = None
+    if _needs_job_context():
+        job_context_token = _JobContextVar.set(ctx)
+
+    try:
+        await asyncio.wait_for(inbound_agent.entrypoint(ctx), STEP_TIMEOUT)
+        result.time_to_greeting = output.segment_starts[0] - started
+
+        for turn in scenario.turns:
+            await output.wait_idle(STEP_TIMEOUT)
+            await asyncio.sleep(profile.caller_think.sample(rng))
+
+            ended = await caller.speak(turn.caller, turn.pause)
+
+            if caller.pauses:
+                result.paused_turns += 1
+                if any(caller.pauses[0] <= t < ended for t in output.segment_starts):
+                    result.false_responses += 1
+
+            first = await output.wait_for_segment(after=ended, timeout=STEP_TIMEOUT)
+            result.first_audio.append(first - ended)
+
+            if turn.reply:
+                reply_at = await scripted_llm.wait_for_reply(after=ended, timeout=STEP_TIMEOUT)
+                reply_started = await output.wait_for_segment(after=reply_at, timeout=STEP_TIMEOUT)
+                result.reply.append(reply_started - ended)
+
+        await asyncio.wait_for(removed.wait(), STEP_TIMEOUT)
+
+    except Exception as e:
+        logger.exception("Bench call failed | scenario=%s", scenario.name)
+        result.error = repr(e)
+
+    finally:
+        if job_context_token is not None:
+            _JobContextVar.reset(job_context_token)
+        local_io.input.close()
+
+        if local_io.session is not None:
+            await local_io.session.aclose()
+
+        await ctx.shutdown("bench call ended")
+
+        utils.remove_automation_listener(on_automation)
+
+        # The next "process" opens its own connections
+        await utils.close_http_client()
+
+    result.cpu_seconds = time.process_time() - cpu_started
+    result.wall_seconds = time.time() - started
+    result.tools = list(scripted_llm.tool_latencies)
+    result.conversation_id = proc.userdata.get("conversation_id")
+    result.after_call = backend.after_calls.get(result.conversation_id)
+
+    return result
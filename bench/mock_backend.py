@@ -0,0 +1,235 @@
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from livekit import api
+
+from bench.standins import LatencyProfile
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("bench_mock_backend")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+BOOKING_ENDPOINT = "/salon_ibargo_agendar_cita_disponibilidad"
+AFTER_CALL_ENDPOINT = "/salon_ibargo_after_call"
+AVAILABILITY_ENDPOINT = "/salon_ibargo_disponibilidad"
+TRANSCRIPT_ENDPOINT = "/salon_ibargo_transcript"
+HEALTH_ENDPOINT = "/health"
+
+# LiveKit RoomService methods used by hang_up() and the job-start warm-up
+REMOVE_PARTICIPANT_PATH = "/twirp/livekit.RoomService/RemoveParticipant"
+LIST_ROOMS_PATH = "/twirp/livekit.RoomService/ListRooms"
+
+# Weekday slots the mock reports; 12:00 is always taken
+MOCK_SLOT_HOURS = {
+    0: range(10, 16), 1: range(10, 16), 2: range(10, 16),
+    3: range(10, 16), 4: range(10, 16), 5: range(10, 12),
+}
+MOCK_TAKEN_HOUR = 12
+
+
+# =====================================================
+# MOCK SERVER
+# =====================================================
+
+class MockBackend:
+    """
+    Local stand-in for the automation backend and the LiveKit server API.
+
+    Serves the booking, availability, after-call, transcript and health
+    endpoints with latencies sampled from the profile, and answers
+    RemoveParticipant and ListRooms so hang-ups and warm-ups complete. Runs on a daemon thread; one
+    handler thread per request, so slow responses overlap like they do
+    against Render.
+    """
+
+    def __init__(self, profile: LatencyProfile, rng: random.Random):
+        self.profile = profile
+        self.rng = rng
+
+        self.after_calls: dict[str, dict] = {}
+        # Streamed transcript items by conversation, keyed by sequence number
+        self.transcripts: dict[str, dict[int, dict]] = {}
+        self.bookings: list[dict] = []
+        self.requests: list[tuple[str, float]] = []
+
+        self._removal_waiters: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Event]] = {}
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockBackend":
+        backend = self
+
+        class Handler(_MockHandler):
+            mock = backend
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+
+        threading.Thread(
+            target=self._server.serve_forever,
+            name="bench-mock-backend",
+            daemon=True,
+        ).start()
+
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    # ── Harness hooks ─────────────────────────────────────────────────────────
+
+    def removal_event(self, room_name: str) -> asyncio.Event:
+        """Event set when the agent removes the caller from ``room_name``."""
+
+        event = asyncio.Event()
+        with self._lock:
+            self._removal_waiters[room_name] = (asyncio.get_running_loop(), event)
+        return event
+
+    def _participant_removed(self, room_name: str):
+        with self._lock:
+            waiter = self._removal_waiters.pop(room_name, None)
+
+        if waiter:
+            loop, event = waiter
+            loop.call_soon_threadsafe(event.set)
+
+    def _sample(self, path: str) -> float:
+        latency = {
+            BOOKING_ENDPOINT: self.profile.backend_booking,
+            AFTER_CALL_ENDPOINT: self.profile.backend_after_call,
+            AVAILABILITY_ENDPOINT: self.profile.backend_availability,
+            HEALTH_ENDPOINT: self.profile.backend_health,
+        }.get(path)
+
+        if latency is None:
+            return 0.0
+
+        with self._lock:
+            return latency.sample(self.rng)
+
+    # ── Responses ─────────────────────────────────────────────────────────────
+
+    def handle(self, path: str, body: bytes) -> tuple[int, bytes, str]:
+        if path == REMOVE_PARTICIPANT_PATH:
+            request = api.RoomParticipantIdentity.FromString(body)
+            self._participant_removed(request.room)
+            return 200, b"", "application/protobuf"
+
+        if path == LIST_ROOMS_PATH:
+            return 200, api.ListRoomsResponse().SerializeToString(), "application/protobuf"
+
+        if path == HEALTH_ENDPOINT:
+            return 200, b'{"status": "ok"}', "application/json"
+
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return 400, b'{"detail": "invalid json"}', "application/json"
+
+        if path == AFTER_CALL_ENDPOINT:
+            with self._lock:
+                self.after_calls[payload.get("conversation_id")] = payload
+            return 200, b'{"ok": true}', "application/json"
+
+        if path == TRANSCRIPT_ENDPOINT:
+            with self._lock:
+                items = self.transcripts.setdefault(payload.get("conversation_id"), {})
+                items.update((item["seq"], item) for item in payload.get("items", []))
+            return 200, b'{"ok": true}', "application/json"
+
+        if path == AVAILABILITY_ENDPOINT:
+            return 200, json.dumps({"slots": _mock_slots(payload)}).encode(), "application/json"
+
+        if path == BOOKING_ENDPOINT:
+            with self._lock:
+                self.bookings.append(payload)
+
+            response = {
+                "message": (
+                    f"Listo, {payload.get('name')}, tu visita quedó agendada para el "
+                    f"{payload.get('visit_date')} a las {payload.get('visit_time')}."
+                ),
+                "confirmed_visit": {
+                    "name": payload.get("name"),
+                    "visit_date": payload.get("visit_date"),
+                    "visit_time": payload.get("visit_time"),
+                },
+            }
+            return 200, json.dumps(response, ensure_ascii=False).encode(), "application/json"
+
+        return 404, b'{"detail": "not found"}', "application/json"
+
+
+def _mock_slots(payload: dict) -> list[dict]:
+    try:
+        start = date.fromisoformat(payload["start_date"])
+        end = date.fromisoformat(payload["end_date"])
+    except (KeyError, ValueError):
+        return []
+
+    slots = []
+    day = start
+
+    while day <= end:
+        for hour in MOCK_SLOT_HOURS.get(day.weekday(), ()):
+            slots.append({
+                "visit_date": day.isoformat(),
+                "visit_time": f"{hour:02d}:00",
+                "available": hour != MOCK_TAKEN_HOUR,
+            })
+        day += timedelta(days=1)
+
+    return slots
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    mock: MockBackend
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._respond(b"")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._respond(self.rfile.read(length))
+
+    def _respond(self, body: bytes):
+        path = self.path.split("?")[0]
+        started = time.monotonic()
+
+        time.sleep(self.mock._sample(path))
+        status, data, content_type = self.mock.handle(path, body)
+
+        with self.mock._lock:
+            self.mock.requests.append((path, time.monotonic() - started))
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        return
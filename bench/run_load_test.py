@@ -0,0 +1,403 @@
+"""
+Concurrency load test: how many simultaneous calls one worker sustains.
+
+LiveKit runs every job in its own process, so each simulated call here is
+a separate process that prewarms like a job process (Silero VAD, phrase
+cache, prompts) and then runs bench.harness.run_call against local
+stand-ins. All calls of a level start together; the parent samples the CPU
+and RSS of every call process while they run.
+
+Usage (from the repository root):
+
+    python -m bench.run_load_test
+    python -m bench.run_load_test --levels 1,4,8,16 --scenario booking
+
+For each level it reports total CPU and peak RSS, event-loop lag inside
+the call processes and turn latency against the lowest level, then suggests
+the largest level that stayed within the limits. Numbers are for the
+machine the test runs on; run it on (or scale it to) the Render instance
+type.
+"""
+
+import os
+import time
+import json
+import queue
+import random
+import asyncio
+import argparse
+import logging
+import resource
+import tempfile
+import threading
+import multiprocessing
+
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import psutil
+
+from bench.run_voice_bench import BENCH_OUT_DIR, configure_environment, summarize
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+DEFAULT_LEVELS = "1,2,4,8"
+
+# Loading Silero and filling the phrase cache, per call process
+PREWARM_TIMEOUT = 120
+
+# A single call, including after-call delivery
+CALL_TIMEOUT = 300
+
+SAMPLE_INTERVAL = 0.5
+
+# Finer than worker_metrics.LOOP_LAG_INTERVAL: short stalls matter here
+LOOP_LAG_INTERVAL = 0.1
+
+
+# =====================================================
+# CALL PROCESS
+# =====================================================
+
+async def _sample_loop_lag(samples: list[float], interval: float = LOOP_LAG_INTERVAL):
+    loop = asyncio.get_running_loop()
+
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+async def _run_call_process(options: dict, index: int, barrier) -> dict:
+    from bench.mock_backend import MockBackend
+    from bench.standins import PROFILES
+
+    profile = PROFILES[options["profile"]]
+    rng = random.Random(options["seed"] * 1000 + index)
+
+    # A backend per process: hang-up notifications stay in-process
+    backend = MockBackend(profile, random.Random(rng.random())).start()
+    workdir = Path(tempfile.mkdtemp(prefix="salon-load-"))
+    configure_environment(backend.url, workdir)
+
+    import inbound_agent
+    from bench.harness import build_phrase_cache, load_prompt_store, run_call
+    from bench.scenarios import SCENARIOS
+
+    # ── Prewarm ───────────────────────────────────────────────────────────────
+
+    inference_vad = None
+    if options["vad"] == "silero":
+        inference_vad = inbound_agent.silero.VAD.load(**inbound_agent.VAD_OPTIONS)
+
+    phrase_cache = await build_phrase_cache(workdir / "phrases")
+    prompt_store = load_prompt_store()
+
+    names = list(SCENARIOS) if options["scenario"] == "mixed" else [options["scenario"]]
+    scenario = SCENARIOS[names[index % len(names)]]()
+
+    await asyncio.to_thread(barrier.wait, PREWARM_TIMEOUT)
+
+    # ── Call ──────────────────────────────────────────────────────────────────
+
+    loop_lag: list[float] = []
+    lag_task = asyncio.create_task(_sample_loop_lag(loop_lag))
+
+    try:
+        result = await run_call(
+            scenario,
+            profile=profile,
+            backend=backend,
+            rng=rng,
+            phrase_cache=phrase_cache,
+            prompt_store=prompt_store,
+            inference_vad=inference_vad,
+        )
+    finally:
+        lag_task.cancel()
+        backend.stop()
+
+    return {
+        "call": asdict(result),
+        "loop_lag": loop_lag,
+        # ru_maxrss is KiB on Linux
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _call_process(options: dict, index: int, barrier, results):
+    """Entry point of one simulated job process."""
+
+    logging.basicConfig(level=logging.INFO)
+    if not options["verbose"]:
+        logging.disable(logging.WARNING)
+
+    try:
+        output = asyncio.run(_run_call_process(options, index, barrier))
+    except threading.BrokenBarrierError:
+        output = {"error": "another call process failed to prewarm"}
+    except Exception as e:
+        barrier.abort()
+        output = {"error": repr(e)}
+
+    results.put(output)
+
+
+# =====================================================
+# ONE LEVEL
+# =====================================================
+
+def _sample(handles: dict[int, psutil.Process]) -> dict:
+    cpu = rss = 0.0
+
+    for pid, handle in list(handles.items()):
+        try:
+            cpu += handle.cpu_percent(None)
+            rss += handle.memory_info().rss
+        except psutil.Error:
+            handles.pop(pid)
+
+    return {"cpu_pct": cpu, "rss_mb": rss / 2**20}
+
+
+def run_level(concurrency: int, options: dict) -> dict:
+    """
+    Starts ``concurrency`` call processes, releases them at once and
+    samples them until every call has reported.
+    """
+
+    mp = multiprocessing.get_context("spawn")
+    barrier = mp.Barrier(concurrency + 1)
+    results = mp.Queue()
+
+    processes = [
+        mp.Process(
+            target=_call_process,
+            args=(options, index, barrier, results),
+            name=f"bench-call-{index}",
+            daemon=True,
+        )
+        for index in range(concurrency)
+    ]
+
+    for process in processes:
+        process.start()
+
+    outputs: list[dict] = []
+    samples: list[dict] = []
+
+    try:
+        barrier.wait(PREWARM_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+
+    started = time.monotonic()
+
+    handles = {}
+    for process in processes:
+        try:
+            handles[process.pid] = psutil.Process(process.pid)
+            handles[process.pid].cpu_percent(None)
+        except psutil.Error:
+            pass
+
+    # Results are drained while sampling: a child cannot exit while its
+    # result is still sitting in the pipe
+    while len(outputs) < concurrency and time.monotonic() - started < CALL_TIMEOUT:
+        try:
+            outputs.append(results.get(timeout=SAMPLE_INTERVAL))
+        except queue.Empty:
+            if not any(p.is_alive() for p in processes) and results.empty():
+                break
+
+        samples.append(_sample(handles))
+
+    for process in processes:
+        process.join(timeout=10)
+        if process.is_alive():
+            process.kill()
+
+    elapsed = time.monotonic() - started
+    missing = concurrency - len(outputs)
+    outputs.extend({"error": "call process did not report"} for _ in range(missing))
+
+    return {
+        "concurrency": concurrency,
+        "elapsed_seconds": elapsed,
+        "outputs": outputs,
+        "samples": samples,
+    }
+
+
+def summarize_level(level: dict, percentiles) -> dict:
+    outputs = level["outputs"]
+    calls = [SimpleNamespace(**o["call"]) for o in outputs if "call" in o]
+    samples = level["samples"]
+
+    summary = summarize(calls, percentiles)
+    summary["errors"] += sum(1 for o in outputs if "call" not in o)
+
+    cpu = [s["cpu_pct"] for s in samples]
+    rss = [s["rss_mb"] for s in samples]
+
+    summary.update({
+        "concurrency": level["concurrency"],
+        "cpu_mean_pct": round(sum(cpu) / len(cpu), 1) if cpu else None,
+        "cpu_peak_pct": round(max(cpu), 1) if cpu else None,
+        "rss_peak_mb": round(max(rss), 1) if rss else None,
+        "rss_per_call_mb": round(
+            sum(o["max_rss_mb"] for o in outputs if "max_rss_mb" in o) / max(1, len(calls)), 1
+        ),
+        "loop_lag": percentiles([v for o in outputs for v in o.get("loop_lag", [])]),
+        "process_errors": [o["error"] for o in outputs if "error" in o],
+    })
+
+    return summary
+
+
+# =====================================================
+# REPORT
+# =====================================================
+
+def recommend(summaries: list[dict], args, cpus: int) -> int:
+    """
+    Largest concurrency such that it and every level below it had no
+    errors, kept loop lag and reply latency within limits and left CPU
+    headroom.
+    """
+
+    baseline = summaries[0]["reply"].get("p95_ms")
+    safe = 0
+
+    for summary in summaries:
+        lag = summary["loop_lag"].get("p95_ms", 0)
+        reply = summary["reply"].get("p95_ms")
+        degradation = reply / baseline if reply and baseline else None
+
+        summary["reply_p95_vs_baseline"] = round(degradation, 2) if degradation else None
+
+        ok = (
+            not summary["errors"]
+            and lag <= args.max_lag_ms
+            and (degradation is None or degradation <= args.max_degradation)
+            and (summary["cpu_mean_pct"] or 0) <= args.cpu_budget * 100 * cpus
+        )
+
+        if not ok:
+            break
+
+        safe = summary["concurrency"]
+
+    return safe
+
+
+def print_level(summary: dict):
+    def ms(stats: dict, key: str) -> str:
+        return f"{stats[key]:.0f}" if stats.get("count") else "-"
+
+    print(
+        f"{summary['concurrency']:>5}  "
+        f"{summary['errors']:>3}  "
+        f"{summary['cpu_mean_pct'] or 0:>7.0f}  {summary['cpu_peak_pct'] or 0:>7.0f}  "
+        f"{summary['rss_peak_mb'] or 0:>8.0f}  {summary['rss_per_call_mb']:>8.0f}  "
+        f"{ms(summary['loop_lag'], 'p50_ms'):>6}  {ms(summary['loop_lag'], 'p95_ms'):>6}  "
+        f"{ms(summary['loop_lag'], 'max_ms'):>6}  "
+        f"{ms(summary['first_audio'], 'p50_ms'):>6}  {ms(summary['first_audio'], 'p95_ms'):>6}  "
+        f"{ms(summary['reply'], 'p50_ms'):>6}  {ms(summary['reply'], 'p95_ms'):>6}  "
+        f"{summary.get('reply_p95_vs_baseline') or '-':>5}"
+    )
+
+
+def print_header():
+    print(
+        "\ncalls  err  cpu%avg  cpu%max  rss_peak  rss/call  "
+        "lag50   lag95  lagmax  first50 first95 reply50 reply95  x base"
+    )
+
+
+# =====================================================
+# MAIN
+# =====================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-call load test for one worker")
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help="comma-separated concurrencies")
+    parser.add_argument("--scenario", default="mixed", help="booking, pricing, hesitant or mixed")
+    parser.add_argument("--profile", default="typical", help="typical, fast or zero")
+    parser.add_argument("--vad", default="silero", choices=["silero", "scripted"],
+                        help="silero also runs the real VAD model over every call's audio")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--cpus", type=int, default=len(os.sched_getaffinity(0)),
+                        help="cores the CPU budget is measured against")
+    parser.add_argument("--max-lag-ms", type=float, default=50)
+    parser.add_argument("--max-degradation", type=float, default=1.25,
+                        help="allowed reply p95 relative to the lowest level")
+    parser.add_argument("--cpu-budget", type=float, default=0.8,
+                        help="allowed mean CPU as a fraction of --cpus")
+    parser.add_argument("--out", type=Path, default=BENCH_OUT_DIR)
+    parser.add_argument("--verbose", action="store_true", help="show agent logs")
+    args = parser.parse_args()
+
+    # Call processes configure their own environment and import the agent;
+    # the parent only aggregates
+    from call_metrics import percentiles
+
+    options = {
+        "scenario": args.scenario,
+        "profile": args.profile,
+        "vad": args.vad,
+        "seed": args.seed,
+        "verbose": args.verbose,
+    }
+
+    levels = sorted({int(level) for level in args.levels.split(",")})
+    summaries = []
+
+    print(f"load test | levels={levels} scenario={args.scenario} "
+          f"profile={args.profile} vad={args.vad} cpus={args.cpus}")
+    print_header()
+
+    for concurrency in levels:
+        level = run_level(concurrency, options)
+        summary = summarize_level(level, percentiles)
+        summaries.append(summary)
+
+        recommend(summaries, args, args.cpus)
+        print_level(summary)
+
+        for error in summary["process_errors"]:
+            print(f"       error: {error}")
+
+    safe = recommend(summaries, args, args.cpus)
+
+    print(
+        f"\nsuggested max concurrent calls per worker: {safe} "
+        f"(lag p95 <= {args.max_lag_ms:g} ms, reply p95 <= {args.max_degradation:g}x baseline, "
+        f"CPU <= {args.cpu_budget:.0%} of {args.cpus} cores)"
+    )
+
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "options": options,
+        "cpus": args.cpus,
+        "limits": {
+            "max_lag_ms": args.max_lag_ms,
+            "max_degradation": args.max_degradation,
+            "cpu_budget": args.cpu_budget,
+        },
+        "suggested_max_calls": safe,
+        "levels": summaries,
+    }
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    path = args.out / f"load_test_{datetime.now():%Y%m%d_%H%M%S}.json"
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+    print(f"report: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Offline end-to-end voice benchmark.
+
+Drives inbound_agent.entrypoint with scripted callers and local stand-ins
+for Deepgram, OpenAI, Google TTS, Silero, the LiveKit room and the
+automation backend. No network access or API keys are needed.
+
+Usage (from the repository root):
+
+    python -m bench.run_voice_bench
+    python -m bench.run_voice_bench --scenario booking --runs 10 --profile fast
+    python -m bench.run_voice_bench --scenario hesitant --turn-detection multilingual
+    python -m bench.run_voice_bench --scenario booking --preemptive-interims
+
+Reports time-to-greeting, per-turn latency, false responses to
+mid-sentence pauses, speculative reply hits, tool and backend latency and
+CPU time per call, and writes the raw numbers to bench_out/. Compare turn
+detection modes by running the same seed with each --turn-detection value,
+and speculative replies with and without --preemptive-interims.
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+import logging
+import resource
+import tempfile
+
+from datetime import datetime
+from pathlib import Path
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+BENCH_OUT_DIR = BASE_DIR / "bench_out"
+
+
+# =====================================================
+# ENVIRONMENT
+# =====================================================
+
+def configure_environment(
+    backend_url: str,
+    workdir: Path,
+    turn_detection: str = "vad",
+    preemptive_interims: bool = False,
+):
+    """
+    Points the agent at the mock backend and keeps every on-disk artifact
+    in ``workdir``. Must run before inbound_agent is imported.
+    """
+
+    os.environ.update({
+        "AUTOMATION_BASE_URL": backend_url,
+        "LIVEKIT_URL": backend_url,
+        "LIVEKIT_API_KEY": "bench",
+        "LIVEKIT_API_SECRET": "bench-secret-bench-secret-bench-secret",
+        "TTS_CACHE_DIR": str(workdir / "tts_cache"),
+        "AFTER_CALL_OUTBOX_PATH": str(workdir / "outbox.sqlite3"),
+        "AUTOMATION_BREAKER_PATH": str(workdir / "automation_breaker.json"),
+        "TRANSCRIPT_JOURNAL_DIR": str(workdir / "journal"),
+        "METRICS_DIR": str(workdir / "metrics"),
+        # Opt-in on the real backend; the mock serves it
+        "AVAILABILITY_ENDPOINT": "/salon_ibargo_disponibilidad",
+        # livekit's default audio end-of-turn model would only ever hear
+        # the stand-ins' silence
+        "TURN_DETECTION": turn_detection,
+        "PREEMPTIVE_INTERIMS": "1" if preemptive_interims else "0",
+    })
+
+    # inbound_agent insists on Google credentials at import time
+    os.environ.setdefault("GOOGLE_SERVICE_ACCOUNT_JSON", "{}")
+
+
+# =====================================================
+# REPORT
+# =====================================================
+
+def summarize(results: list, percentiles) -> dict:
+    def seconds(values):
+        return percentiles([v for v in values if v is not None])
+
+    by_tool: dict[str, list[float]] = {}
+    for r in results:
+        for name, value in r.tools:
+            by_tool.setdefault(name, []).append(value)
+
+    by_endpoint: dict[str, list[float]] = {}
+    for r in results:
+        for endpoint, value, _ in r.automation:
+            by_endpoint.setdefault(endpoint, []).append(value)
+
+    turns = max((len(r.first_audio) for r in results), default=0)
+
+    preflight = [(r.after_call or {}).get("latency", {}).get("preflight", {}) for r in results]
+
+    return {
+        "calls": len(results),
+        "errors": sum(1 for r in results if r.error),
+        "time_to_greeting": seconds([r.time_to_greeting for r in results]),
+        "first_audio": seconds([v for r in results for v in r.first_audio]),
+        "reply": seconds([v for r in results for v in r.reply]),
+        "first_audio_by_turn": [
+            seconds([r.first_audio[i] for r in results if len(r.first_audio) > i])
+            for i in range(turns)
+        ],
+        "tools": {name: seconds(values) for name, values in by_tool.items()},
+        "automation": {endpoint: seconds(values) for endpoint, values in by_endpoint.items()},
+        "cpu_seconds_per_call": seconds([r.cpu_seconds for r in results]),
+        "wall_seconds_per_call": seconds([r.wall_seconds for r in results]),
+        "after_call_delivered": sum(1 for r in results if r.after_call),
+        "paused_turns": sum(r.paused_turns for r in results),
+        "false_responses": sum(r.false_responses for r in results),
+        "preflight_hits": sum(p.get("hits", 0) for p in preflight),
+        "preflight_misses": sum(p.get("misses", 0) for p in preflight),
+    }
+
+
+def print_summary(name: str, summary: dict):
+    def row(label: str, stats: dict):
+        if not stats.get("count"):
+            print(f"  {label:<44} -")
+            return
+        print(
+            f"  {label:<44} p50={stats['p50_ms']:>8.1f}ms  "
+            f"p95={stats['p95_ms']:>8.1f}ms  max={stats['max_ms']:>8.1f}ms  n={stats['count']}"
+        )
+
+    print(f"\n== {name} | calls={summary['calls']} errors={summary['errors']} "
+          f"after_call={summary['after_call_delivered']}")
+
+    row("time to greeting", summary["time_to_greeting"])
+    row("end of speech -> first agent audio", summary["first_audio"])
+    row("end of speech -> reply audio", summary["reply"])
+
+    for i, stats in enumerate(summary["first_audio_by_turn"], start=1):
+        row(f"  turn {i} first audio", stats)
+
+    for tool, stats in summary["tools"].items():
+        row(f"tool {tool}", stats)
+
+    for endpoint, stats in summary["automation"].items():
+        row(f"backend {endpoint}", stats)
+
+    if summary["paused_turns"]:
+        print(
+            f"  {'false responses to mid-sentence pauses':<44} "
+            f"{summary['false_responses']}/{summary['paused_turns']} "
+            f"({summary['false_responses'] / summary['paused_turns']:.0%})"
+        )
+
+    resolved = summary["preflight_hits"] + summary["preflight_misses"]
+    if resolved:
+        print(
+            f"  {'speculative replies kept':<44} "
+            f"{summary['preflight_hits']}/{resolved} "
+            f"({summary['preflight_hits'] / resolved:.0%})"
+        )
+
+    row("CPU time per call", summary["cpu_seconds_per_call"])
+    row("wall time per call", summary["wall_seconds_per_call"])
+
+
+# =====================================================
+# MAIN
+# =====================================================
+
+async def run_bench(args) -> dict:
+    from bench.mock_backend import MockBackend
+    from bench.standins import PROFILES
+
+    profile = PROFILES[args.profile]
+    rng = random.Random(args.seed)
+
+    backend = MockBackend(profile, random.Random(args.seed + 1)).start()
+    workdir = Path(tempfile.mkdtemp(prefix="salon-bench-"))
+    configure_environment(backend.url, workdir, args.turn_detection, args.preemptive_interims)
+
+    from call_metrics import percentiles
+    from bench.harness import build_phrase_cache, load_prompt_store, run_call
+    from bench.scenarios import SCENARIOS
+
+    phrase_cache = await build_phrase_cache(workdir / "phrases")
+    prompt_store = load_prompt_store()
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "profile": args.profile,
+        "seed": args.seed,
+        "runs": args.runs,
+        "turn_detection": args.turn_detection,
+        "preemptive_interims": args.preemptive_interims,
+        "scenarios": {},
+    }
+
+    try:
+        for name in names:
+            results = []
+
+            for _ in range(args.runs):
+                results.append(await run_call(
+                    SCENARIOS[name](),
+                    profile=profile,
+                    backend=backend,
+                    rng=rng,
+                    phrase_cache=phrase_cache,
+                    prompt_store=prompt_store,
+                ))
+
+            summary = summarize(results, percentiles)
+            print_summary(name, summary)
+
+            report["scenarios"][name] = {
+                "summary": summary,
+                "calls": [
+                    {
+                        "conversation_id": r.conversation_id,
+                        "time_to_greeting": r.time_to_greeting,
+                        "first_audio": r.first_audio,
+                        "reply": r.reply,
+                        "tools": r.tools,
+                        "paused_turns": r.paused_turns,
+                        "false_responses": r.false_responses,
+                        "automation": r.automation,
+                        "cpu_seconds": r.cpu_seconds,
+                        "wall_seconds": r.wall_seconds,
+                        "after_call_latency": (r.after_call or {}).get("latency"),
+                        "error": r.error,
+                    }
+                    for r in results
+                ],
+            }
+    finally:
+        backend.stop()
+
+    # ru_maxrss is KiB on Linux
+    report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(f"\nmax RSS: {report['max_rss_mb']} MB")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end voice benchmark")
+    parser.add_argument("--scenario", default="all", help="booking, pricing, hesitant or all")
+    parser.add_argument("--runs", type=int, default=3, help="calls per scenario")
+    parser.add_argument("--profile", default="typical", help="typical, fast or zero")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--turn-detection", default="vad", choices=["vad", "multilingual"],
+                        help="TURN_DETECTION mode of the agent")
+    parser.add_argument("--preemptive-interims", action="store_true",
+                        help="start replies on stable interim transcripts")
+    parser.add_argument("--out", type=Path, default=BENCH_OUT_DIR)
+    parser.add_argument("--verbose", action="store_true", help="show agent logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    sys.path.insert(0, str(BASE_DIR))
+
+    report = asyncio.run(run_bench(args))
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    path = args.out / f"voice_bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+    print(f"report: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from bench.standins import ToolCall, Turn
+from utils import PST
+
+# =====================================================
+# SCENARIOS
+# =====================================================
+
+_WEEKDAYS = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+
+_MONTHS = [
+    "enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+    "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    turns: list[Turn]
+
+
+def _next_weekday(today: date, weekday: int) -> date:
+    """Next ``weekday`` at least two days away, so the slot is never in the past."""
+    day = today + timedelta(days=2)
+    return day + timedelta(days=(weekday - day.weekday()) % 7)
+
+
+def booking_flow(today: date | None = None) -> Scenario:
+    """
+    Full booking: name, date, time, purpose, confirmation through
+    agendar_cita_disponibilidad and a natural goodbye through end_call.
+    """
+
+    today = today or datetime.now(tz=PST).date()
+    visit = _next_weekday(today, 1)
+    spoken = f"{_WEEKDAYS[visit.weekday()]} {visit.day} de {_MONTHS[visit.month - 1]}"
+
+    return Scenario("booking", [
+        Turn(
+            caller="Hola, quiero agendar una visita para conocer el salón.",
+            reply="Con gusto te ayudo a agendar. ¿Me dices tu nombre, por favor?",
+        ),
+        Turn(
+            caller="Me llamo Laura Martínez.",
+            reply="Gracias, Laura. ¿Qué día te gustaría visitarnos?",
+        ),
+        Turn(
+            caller=f"El {spoken} a las once de la mañana.",
+            reply=f"¿Te refieres al {spoken} a las once de la mañana? ¿Cuál es el motivo de tu visita?",
+        ),
+        Turn(
+            caller="Sí, es para ver el salón para una boda.",
+            tool=ToolCall("agendar_cita_disponibilidad", {
+                "name": "Laura Martínez",
+                "visit_date": visit.isoformat(),
+                "visit_time": "11:00",
+                "purpose": "boda",
+            }),
+            reply="Listo, Laura, tu visita quedó confirmada. ¿Te puedo ayudar con algo más?",
+        ),
+        Turn(
+            caller="No, eso es todo, muchas gracias.",
+            tool=ToolCall("end_call", {"reason": "cliente terminó la llamada"}),
+        ),
+    ])
+
+
+def pricing_question(today: date | None = None) -> Scenario:
+    """
+    Information-only call: pricing question, availability lookup through
+    consultar_disponibilidad and a goodbye without booking.
+    """
+
+    today = today or datetime.now(tz=PST).date()
+    saturday = _next_weekday(today, 5)
+
+    return Scenario("pricing", [
+        Turn(
+            caller="Hola, ¿cuánto cuesta rentar el salón para una fiesta de cien personas?",
+            reply=(
+                "El precio depende del día y del paquete que elijas. "
+                "Lo mejor es que vengas a conocer el salón y ahí te damos la cotización. "
+                "¿Qué día te quedaría bien venir?"
+            ),
+        ),
+        Turn(
+            caller="¿Tienen algo este sábado?",
+            tool=ToolCall("consultar_disponibilidad", {"visit_date": saturday.isoformat()}),
+            reply="El sábado tenemos visitas a las diez y a las once de la mañana. ¿Alguna te acomoda?",
+        ),
+        Turn(
+            caller="Déjame checarlo y te llamo, gracias.",
+            tool=ToolCall("end_call", {"reason": "cliente llamará después"}),
+        ),
+    ])
+
+
+def hesitant_caller(today: date | None = None) -> Scenario:
+    """
+    Information-only call where the caller pauses mid-sentence on every
+    turn; the agent should wait for the rest instead of answering.
+    """
+
+    return Scenario("hesitant", [
+        Turn(
+            caller="Hola, quería saber si | se puede ir a ver el salón antes de rentarlo.",
+            reply="Claro que sí, con gusto agendamos una visita. ¿Qué día te gustaría venir?",
+            pause=1.0,
+        ),
+        Turn(
+            caller="¿Y cuánto tiempo dura | la visita más o menos?",
+            reply="La visita dura unos treinta minutos y te mostramos todo el salón.",
+            pause=1.0,
+        ),
+        Turn(
+            caller="Muy bien, lo platico con mi familia | y les llamo, gracias.",
+            tool=ToolCall("end_call", {"reason": "cliente llamará después"}),
+            pause=1.0,
+        ),
+    ])
+
+
+SCENARIOS = {
+    "booking": booking_flow,
+    "pricing": pricing_question,
+    "hesitant": hesitant_caller,
+}
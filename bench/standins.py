@@ -0,0 +1,806 @@
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+
+from dataclasses import dataclass
+
+from livekit import rtc
+from livekit.agents import llm, stt, tts, vad, utils
+from livekit.agents.inference_runner import _InferenceRunner
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions
+from livekit.agents.voice import io
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("bench_standins")
+
+
+# =====================================================
+# LATENCY MODEL
+# =====================================================
+
+@dataclass(frozen=True)
+class Latency:
+    """
+    Lognormal latency given by its median and p95, in seconds.
+
+    A zero median always samples 0, which turns a stage off.
+    """
+    median: float
+    p95: float
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+
+        sigma = math.log(max(self.p95, self.median) / self.median) / 1.645
+        return self.median * math.exp(rng.gauss(0.0, sigma))
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """
+    Provider and backend timings the stand-ins reproduce.
+    """
+    stt_final: Latency              # end of speech -> final transcript
+    llm_ttft: Latency               # request -> first token
+    llm_tokens_per_second: float
+    tts_ttfb: Latency               # request -> first audio chunk
+    tts_realtime_factor: float      # seconds of audio synthesized per second
+    backend_booking: Latency
+    backend_availability: Latency
+    backend_after_call: Latency
+    backend_health: Latency
+    caller_think: Latency           # agent stops speaking -> caller starts
+
+
+PROFILES: dict[str, LatencyProfile] = {
+    # Roughly what production logs show from a laptop on a good connection
+    "typical": LatencyProfile(
+        stt_final=Latency(0.25, 0.5),
+        llm_ttft=Latency(0.7, 1.5),
+        llm_tokens_per_second=60,
+        tts_ttfb=Latency(0.25, 0.5),
+        tts_realtime_factor=6,
+        backend_booking=Latency(1.5, 4.0),
+        backend_availability=Latency(0.6, 1.5),
+        backend_after_call=Latency(0.4, 1.0),
+        backend_health=Latency(0.1, 0.3),
+        caller_think=Latency(0.5, 1.0),
+    ),
+    "fast": LatencyProfile(
+        stt_final=Latency(0.1, 0.2),
+        llm_ttft=Latency(0.3, 0.5),
+        llm_tokens_per_second=120,
+        tts_ttfb=Latency(0.1, 0.2),
+        tts_realtime_factor=12,
+        backend_booking=Latency(0.4, 0.8),
+        backend_availability=Latency(0.2, 0.4),
+        backend_after_call=Latency(0.1, 0.2),
+        backend_health=Latency(0.05, 0.1),
+        caller_think=Latency(0.3, 0.5),
+    ),
+    # Providers answer instantly: what is left is the agent's own overhead
+    "zero": LatencyProfile(
+        stt_final=Latency(0, 0),
+        llm_ttft=Latency(0, 0),
+        llm_tokens_per_second=0,
+        tts_ttfb=Latency(0, 0),
+        tts_realtime_factor=0,
+        backend_booking=Latency(0, 0),
+        backend_availability=Latency(0, 0),
+        backend_after_call=Latency(0, 0),
+        backend_health=Latency(0, 0),
+        caller_think=Latency(0.3, 0.3),
+    ),
+}
+
+
+# =====================================================
+# SCRIPTED CALLER
+# =====================================================
+
+# Speaking pace of the simulated caller
+CALLER_SECONDS_PER_WORD = 0.32
+
+# Mirrors min_silence_duration of the Silero VAD loaded in prewarm
+VAD_SILENCE_SECONDS = 0.3
+
+INTERIM_INTERVAL = 0.25
+
+# Marks a mid-sentence pause in a scripted utterance
+PAUSE_MARK = "|"
+
+
+class ScriptedCaller:
+    """
+    Plays the caller's side of the conversation.
+
+    Each utterance is pushed as VAD and STT events to every stream opened
+    on FakeVAD / FakeSTT, with the timing a real caller and provider would
+    produce: speech for a duration proportional to its word count, VAD end
+    of speech after the configured silence, and the final transcript after
+    a sampled STT delay.
+
+    An utterance with PAUSE_MARKs is spoken as fragments separated by
+    silent pauses, each fragment ending like a complete utterance would.
+    """
+
+    def __init__(self, profile: LatencyProfile, rng: random.Random):
+        self.profile = profile
+        self.rng = rng
+
+        self.speaking = False
+        self.speech_started_at = 0.0
+        self.speech_ended_at = 0.0
+
+        # Wall-clock start of each mid-sentence pause of the last utterance
+        self.pauses: list[float] = []
+
+        self._vad_streams: set["_FakeVADStream"] = set()
+        self._stt_streams: set["_FakeSTTStream"] = set()
+
+    async def speak(self, text: str, pause: float = 0.0) -> float:
+        """
+        Speaks one utterance, pausing ``pause`` seconds at every PAUSE_MARK.
+        Returns the wall-clock time speech ended.
+        """
+
+        self.pauses = []
+        fragments = [f.strip() for f in text.split(PAUSE_MARK)]
+
+        for i, fragment in enumerate(fragments):
+            if i:
+                self.pauses.append(self.speech_ended_at)
+                await asyncio.sleep(max(0.0, self.speech_ended_at + pause - time.time()))
+
+            await self._speak_fragment(fragment)
+
+        return self.speech_ended_at
+
+    async def _speak_fragment(self, text: str):
+        words = text.split()
+        duration = max(0.6, len(words) * CALLER_SECONDS_PER_WORD)
+
+        self.speaking = True
+        self.speech_started_at = time.time()
+
+        for stream in list(self._vad_streams):
+            stream.emit_speech(vad.VADEventType.START_OF_SPEECH, speech_duration=0.0)
+
+        for stream in list(self._stt_streams):
+            stream.emit(stt.SpeechEventType.START_OF_SPEECH)
+
+        elapsed = 0.0
+
+        while elapsed + INTERIM_INTERVAL < duration:
+            await asyncio.sleep(INTERIM_INTERVAL)
+            elapsed += INTERIM_INTERVAL
+
+            heard = words[: max(1, int(len(words) * elapsed / duration))]
+            for stream in list(self._stt_streams):
+                stream.emit(stt.SpeechEventType.INTERIM_TRANSCRIPT, " ".join(heard))
+
+        await asyncio.sleep(duration - elapsed)
+
+        # Providers send the whole utterance as an interim before finalizing
+        for stream in list(self._stt_streams):
+            stream.emit(stt.SpeechEventType.INTERIM_TRANSCRIPT, text)
+
+        self.speaking = False
+        self.speech_ended_at = time.time()
+
+        await asyncio.gather(
+            self._vad_end_of_speech(duration),
+            self._final_transcript(text),
+        )
+
+    async def _vad_end_of_speech(self, duration: float):
+        await asyncio.sleep(VAD_SILENCE_SECONDS)
+
+        for stream in list(self._vad_streams):
+            stream.emit_speech(
+                vad.VADEventType.END_OF_SPEECH,
+                speech_duration=duration,
+                silence_duration=VAD_SILENCE_SECONDS,
+            )
+
+    async def _final_transcript(self, text: str):
+        await asyncio.sleep(self.profile.stt_final.sample(self.rng))
+
+        for stream in list(self._stt_streams):
+            stream.emit(stt.SpeechEventType.FINAL_TRANSCRIPT, text)
+            stream.emit(stt.SpeechEventType.END_OF_SPEECH)
+
+
+# =====================================================
+# VAD
+# =====================================================
+
+class FakeVAD(vad.VAD):
+    """
+    VAD driven by the ScriptedCaller instead of audio analysis.
+
+    Input frames are consumed and answered with INFERENCE_DONE events that
+    reflect whether the caller is speaking, like Silero's per-window output.
+
+    With ``inference_vad`` (e.g. the Silero VAD prewarm loads) every frame
+    is also run through that model and its events discarded, so load tests
+    pay the real per-call inference cost while turns stay scripted.
+    """
+
+    def __init__(self, caller: ScriptedCaller, inference_vad: vad.VAD | None = None):
+        super().__init__(capabilities=vad.VADCapabilities(update_interval=0.032))
+        self.caller = caller
+        self.inference_vad = inference_vad
+
+    @property
+    def provider(self) -> str:
+        return "bench"
+
+    def stream(self) -> "_FakeVADStream":
+        return _FakeVADStream(self)
+
+
+class _FakeVADStream(vad.VADStream):
+    def __init__(self, fake_vad: FakeVAD):
+        super().__init__(fake_vad)
+        self._caller = fake_vad.caller
+        self._caller._vad_streams.add(self)
+
+    async def _main_task(self) -> None:
+        inference = self._vad.inference_vad.stream() if self._vad.inference_vad else None
+        drain_task = asyncio.create_task(self._drain(inference)) if inference else None
+
+        try:
+            async for frame in self._input_ch:
+                if not isinstance(frame, rtc.AudioFrame):
+                    continue
+
+                if inference is not None:
+                    inference.push_frame(frame)
+
+                now = time.time()
+                speaking = self._caller.speaking
+
+                self._event_ch.send_nowait(vad.VADEvent(
+                    type=vad.VADEventType.INFERENCE_DONE,
+                    samples_index=0,
+                    timestamp=now,
+                    speech_duration=now - self._caller.speech_started_at if speaking else 0.0,
+                    silence_duration=0.0 if speaking else now - self._caller.speech_ended_at,
+                    probability=1.0 if speaking else 0.0,
+                    speaking=speaking,
+                    raw_accumulated_speech=now - self._caller.speech_started_at if speaking else 0.0,
+                    raw_accumulated_silence=0.0 if speaking else now - self._caller.speech_ended_at,
+                ))
+        finally:
+            self._caller._vad_streams.discard(self)
+
+            if inference is not None:
+                await inference.aclose()
+                await utils.aio.cancel_and_wait(drain_task)
+
+    @staticmethod
+    async def _drain(inference: vad.VADStream):
+        async for _ in inference:
+            pass
+
+    def emit_speech(
+        self,
+        type: vad.VADEventType,
+        *,
+        speech_duration: float,
+        silence_duration: float = 0.0,
+    ):
+        if self._event_ch.closed:
+            return
+
+        self._event_ch.send_nowait(vad.VADEvent(
+            type=type,
+            samples_index=0,
+            timestamp=time.time(),
+            speech_duration=speech_duration,
+            silence_duration=silence_duration,
+            speaking=type == vad.VADEventType.START_OF_SPEECH,
+        ))
+
+
+# =====================================================
+# STT
+# =====================================================
+
+class FakeSTT(stt.STT):
+    """Streaming STT whose transcripts come from the ScriptedCaller."""
+
+    def __init__(self, caller: ScriptedCaller):
+        super().__init__(
+            capabilities=stt.STTCapabilities(
+                streaming=True,
+                interim_results=True,
+                offline_recognize=False,
+            )
+        )
+        self.caller = caller
+
+    @property
+    def provider(self) -> str:
+        return "bench"
+
+    async def _recognize_impl(self, buffer, *, language=NOT_GIVEN, conn_options) -> stt.SpeechEvent:
+        raise NotImplementedError("FakeSTT only supports streaming")
+
+    def stream(
+        self,
+        *,
+        language=NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> "_FakeSTTStream":
+        return _FakeSTTStream(self, conn_options=conn_options)
+
+
+class _FakeSTTStream(stt.RecognizeStream):
+    def __init__(self, fake_stt: FakeSTT, *, conn_options: APIConnectOptions):
+        super().__init__(stt=fake_stt, conn_options=conn_options)
+        self._caller = fake_stt.caller
+        self._caller._stt_streams.add(self)
+
+    async def _run(self) -> None:
+        try:
+            # Audio is only drained; transcripts are pushed by the caller
+            async for _ in self._input_ch:
+                pass
+        finally:
+            self._caller._stt_streams.discard(self)
+
+    def emit(self, type: stt.SpeechEventType, text: str | None = None):
+        if self._event_ch.closed:
+            return
+
+        alternatives = []
+        if text is not None:
+            alternatives = [stt.SpeechData(language="es", text=text, confidence=0.95)]
+
+        self._event_ch.send_nowait(stt.SpeechEvent(type=type, alternatives=alternatives))
+
+
+# =====================================================
+# LLM
+# =====================================================
+
+@dataclass(frozen=True)
+class ToolCall:
+    name: str
+    arguments: dict
+
+
+@dataclass(frozen=True)
+class Turn:
+    """
+    One caller utterance and the model's scripted answer to it.
+
+    ``tool`` is called first when set; ``reply`` is spoken afterwards (or
+    directly when there is no tool). ``pause`` is the length of every
+    mid-sentence pause marked with PAUSE_MARK in ``caller``.
+    """
+    caller: str
+    reply: str | None = None
+    tool: ToolCall | None = None
+    pause: float = 0.0
+
+
+# What the model says when the turn is closed during a mid-sentence pause
+PREMATURE_REPLY = "Claro, te escucho."
+
+
+class ScriptedLLM(llm.LLM):
+    """
+    Answers from a scenario script with sampled TTFT and token pacing.
+
+    The answer is chosen from the chat context (last user message and
+    whether a tool result follows it), so cancelled or repeated requests
+    get the same answer a real model would likely give.
+    """
+
+    def __init__(self, turns: list[Turn], profile: LatencyProfile, rng: random.Random):
+        super().__init__()
+
+        self._turns: dict[str, Turn] = {}
+        self._partial: set[str] = set()
+
+        for turn in turns:
+            fragments = turn.caller.split(PAUSE_MARK)
+            self._turns[_normalize(turn.caller)] = turn
+
+            # After an interrupted reply the model may only see the rest
+            self._turns[_normalize(fragments[-1])] = turn
+
+            for i in range(1, len(fragments)):
+                self._partial.add(_normalize(" ".join(fragments[:i])))
+                self._partial.add(_normalize(fragments[i - 1]))
+        self.profile = profile
+        self.rng = rng
+
+        # (tool name, seconds from the call being emitted to its result)
+        self.tool_latencies: list[tuple[str, float]] = []
+        self._tool_emitted_at: dict[str, tuple[str, float]] = {}
+
+        self.replies_started: list[float] = []
+        self._reply_event = asyncio.Event()
+
+    @property
+    def model(self) -> str:
+        return "scripted"
+
+    @property
+    def provider(self) -> str:
+        return "bench"
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools=None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls=NOT_GIVEN,
+        tool_choice=NOT_GIVEN,
+        extra_kwargs=NOT_GIVEN,
+    ) -> "_ScriptedLLMStream":
+        return _ScriptedLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+    def respond(self, chat_ctx: llm.ChatContext) -> str | ToolCall | None:
+        last_user = None
+        tool_outputs = []
+
+        for item in chat_ctx.items:
+            if item.type == "message" and item.role == "user":
+                last_user = item
+                tool_outputs = []
+            elif item.type == "function_call_output":
+                tool_outputs.append(item)
+
+        if last_user is None:
+            return None
+
+        text = _normalize(last_user.text_content or "")
+        turn = self._turns.get(text)
+
+        if turn is None and text in self._partial:
+            return PREMATURE_REPLY
+
+        if turn is None:
+            logger.warning("No scripted turn for %r", last_user.text_content)
+            return None
+
+        for output in tool_outputs:
+            emitted = self._tool_emitted_at.pop(output.call_id, None)
+            if emitted:
+                self.tool_latencies.append((emitted[0], time.time() - emitted[1]))
+
+        if turn.tool and not tool_outputs:
+            return turn.tool
+
+        return turn.reply
+
+    async def wait_for_reply(self, after: float, timeout: float) -> float:
+        """Waits for a text reply started at or after ``after``."""
+
+        async def wait():
+            while True:
+                for started in self.replies_started:
+                    if started >= after:
+                        return started
+                self._reply_event.clear()
+                await self._reply_event.wait()
+
+        return await asyncio.wait_for(wait(), timeout)
+
+    def _mark_reply(self):
+        self.replies_started.append(time.time())
+        self._reply_event.set()
+
+
+class _ScriptedLLMStream(llm.LLMStream):
+    def __init__(self, scripted: ScriptedLLM, **kwargs):
+        super().__init__(scripted, **kwargs)
+        self._scripted = scripted
+
+    async def _run(self) -> None:
+        scripted = self._scripted
+        request_id = utils.shortuuid()
+        answer = scripted.respond(self._chat_ctx)
+
+        await asyncio.sleep(scripted.profile.llm_ttft.sample(scripted.rng))
+
+        prompt_tokens = sum(
+            len(item.text_content or "") for item in self._chat_ctx.items if item.type == "message"
+        ) // 4
+        completion_tokens = 0
+
+        if isinstance(answer, ToolCall):
+            call_id = utils.shortuuid("call_")
+            scripted._tool_emitted_at[call_id] = (answer.name, time.time())
+
+            self._event_ch.send_nowait(llm.ChatChunk(
+                id=request_id,
+                delta=llm.ChoiceDelta(
+                    role="assistant",
+                    tool_calls=[llm.FunctionToolCall(
+                        name=answer.name,
+                        arguments=json.dumps(answer.arguments, ensure_ascii=False),
+                        call_id=call_id,
+                    )],
+                ),
+            ))
+            completion_tokens = 20
+
+        elif answer:
+            scripted._mark_reply()
+            rate = scripted.profile.llm_tokens_per_second
+
+            for i, word in enumerate(answer.split(" ")):
+                if i and rate:
+                    await asyncio.sleep(1 / rate)
+
+                self._event_ch.send_nowait(llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(role="assistant", content=word if i == 0 else f" {word}"),
+                ))
+                completion_tokens += 1
+
+        self._event_ch.send_nowait(llm.ChatChunk(
+            id=request_id,
+            usage=llm.CompletionUsage(
+                completion_tokens=completion_tokens,
+                prompt_tokens=prompt_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        ))
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.replace(PAUSE_MARK, " ").lower().split())
+
+
+# =====================================================
+# TTS
+# =====================================================
+
+TTS_SAMPLE_RATE = 24000
+
+# Speech rate of the synthesized voice
+TTS_SECONDS_PER_CHAR = 0.06
+
+TTS_CHUNK_SECONDS = 0.2
+
+
+class FakeTTS(tts.TTS):
+    """
+    Non-streaming TTS that returns silence of a realistic duration after a
+    sampled time to first byte, delivered faster than real time.
+    """
+
+    def __init__(self, profile: LatencyProfile, rng: random.Random):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=TTS_SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.profile = profile
+        self.rng = rng
+
+    @property
+    def model(self) -> str:
+        return "silence"
+
+    @property
+    def provider(self) -> str:
+        return "bench"
+
+    def synthesize(
+        self,
+        text: str,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> "_FakeChunkedStream":
+        return _FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class _FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        fake: FakeTTS = self._tts
+
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=fake.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+
+        await asyncio.sleep(fake.profile.tts_ttfb.sample(fake.rng))
+
+        remaining = max(TTS_CHUNK_SECONDS, len(self._input_text) * TTS_SECONDS_PER_CHAR)
+        rtf = fake.profile.tts_realtime_factor
+
+        while remaining > 0:
+            chunk = min(TTS_CHUNK_SECONDS, remaining)
+            output_emitter.push(bytes(int(chunk * fake.sample_rate) * 2))
+            remaining -= chunk
+
+            if rtf and remaining > 0:
+                await asyncio.sleep(chunk / rtf)
+
+
+# =====================================================
+# INFERENCE
+# =====================================================
+
+class LocalInferenceExecutor:
+    """
+    Runs livekit inference runners (e.g. the turn detector) in-process, in
+    place of the worker's shared inference process.
+    """
+
+    def __init__(self):
+        self._runners: dict[str, _InferenceRunner] = {}
+        self._lock = asyncio.Lock()
+
+    async def do_inference(self, method: str, data: bytes) -> bytes | None:
+        async with self._lock:
+            runner = self._runners.get(method)
+
+            if runner is None:
+                runner = _InferenceRunner.registered_runners[method]()
+                await asyncio.to_thread(runner.initialize)
+                self._runners[method] = runner
+
+        return await asyncio.to_thread(runner.run, data)
+
+
+# =====================================================
+# LOCAL AUDIO I/O
+# =====================================================
+
+INPUT_SAMPLE_RATE = 16000
+INPUT_FRAME_SECONDS = 0.02
+
+
+class LocalAudioInput(io.AudioInput):
+    """Real-time stream of silent 20 ms frames standing in for the caller's track."""
+
+    def __init__(self):
+        super().__init__(label="bench-caller")
+        self._closed = False
+        self._next_at: float | None = None
+        self._samples = int(INPUT_SAMPLE_RATE * INPUT_FRAME_SECONDS)
+
+    def close(self):
+        self._closed = True
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        if self._closed:
+            raise StopAsyncIteration
+
+        now = time.monotonic()
+        self._next_at = max(self._next_at or now, now - 1.0) + INPUT_FRAME_SECONDS
+        await asyncio.sleep(max(0.0, self._next_at - now))
+
+        return rtc.AudioFrame(
+            data=bytes(self._samples * 2),
+            sample_rate=INPUT_SAMPLE_RATE,
+            num_channels=1,
+            samples_per_channel=self._samples,
+        )
+
+
+class LocalAudioOutput(io.AudioOutput):
+    """
+    Audio sink that "plays" each segment in real time, back to back, and
+    records when every segment started playing.
+    """
+
+    def __init__(self):
+        super().__init__(
+            label="bench-speaker",
+            capabilities=io.AudioOutputCapabilities(pause=False),
+        )
+
+        self.segment_starts: list[float] = []
+
+        self._segment_start: float | None = None
+        self._segment_duration = 0.0
+        self._busy_until = 0.0
+        self._pending: list[tuple[asyncio.Task, float, float]] = []
+        self._segment_event = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+
+        if self._segment_start is None:
+            self._segment_start = max(time.time(), self._busy_until)
+            self._segment_duration = 0.0
+            self._idle.clear()
+
+            self.segment_starts.append(self._segment_start)
+            self._segment_event.set()
+            self.on_playback_started(created_at=self._segment_start)
+
+        self._segment_duration += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+
+        if self._segment_start is None:
+            return
+
+        start, duration = self._segment_start, self._segment_duration
+        self._segment_start = None
+        self._busy_until = start + duration
+
+        task = asyncio.create_task(self._play_out(start, duration))
+        self._pending.append((task, start, duration))
+
+    def clear_buffer(self) -> None:
+        now = time.time()
+
+        for task, start, duration in self._pending:
+            task.cancel()
+            self.on_playback_finished(
+                playback_position=min(duration, max(0.0, now - start)),
+                interrupted=True,
+            )
+
+        self._pending.clear()
+        self._busy_until = now
+        self._update_idle()
+
+    async def _play_out(self, start: float, duration: float):
+        await asyncio.sleep(max(0.0, start + duration - time.time()))
+
+        self._pending = [p for p in self._pending if p[0] is not asyncio.current_task()]
+        self.on_playback_finished(playback_position=duration, interrupted=False)
+        self._update_idle()
+
+    def _update_idle(self):
+        if not self._pending and self._segment_start is None:
+            self._idle.set()
+
+    async def wait_for_segment(self, after: float, timeout: float) -> float:
+        """Returns the start time of the first segment started at or after ``after``."""
+
+        async def wait():
+            while True:
+                for started in self.segment_starts:
+                    if started >= after:
+                        return started
+                self._segment_event.clear()
+                await self._segment_event.wait()
+
+        return await asyncio.wait_for(wait(), timeout)
+
+    async def wait_idle(self, timeout: float):
+        await asyncio.wait_for(self._idle.wait(), timeout)
+
+
+class LocalAudioIO:
+    """
+    Plugged into proc.userdata["local_audio_io"]; entrypoint attaches it to
+    the session in place of the room.
+    """
+
+    def __init__(self):
+        self.input = LocalAudioInput()
+        self.output = LocalAudioOutput()
+        self.session = None
+
+    def attach(self, session):
+        session.input.audio = self.input
+        session.output.audio = self.output
+        self.session = session
@@ -0,0 +1,189 @@
+import math
+import logging
+
+from collections import defaultdict
+
+from livekit.agents import metrics
+
+from worker_metrics import inc, observe
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("call_metrics")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+# Per-turn stages, in pipeline order:
+#   stt_final         end of user speech -> final STT transcript
+#   end_of_utterance  end of user speech -> turn committed to the LLM
+#   llm_ttft          LLM request -> first token
+#   tts_ttfb          TTS request -> first audio byte
+#   response          end of user speech -> agent playout starts
+#   preflight_lead    speculative LLM start on a stable interim -> final
+#                     transcript, on turns where the speculation was kept
+TURN_STAGES = (
+    "stt_final",
+    "end_of_utterance",
+    "llm_ttft",
+    "tts_ttfb",
+    "response",
+    "preflight_lead",
+)
+
+
+# =====================================================
+# PERCENTILES
+# =====================================================
+
+def percentiles(values: list[float]) -> dict:
+    """
+    Nearest-rank p50/p90/p95/max of a list of seconds, in milliseconds.
+    """
+
+    if not values:
+        return {"count": 0}
+
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        index = max(0, math.ceil(p * len(ordered)) - 1)
+        return round(ordered[index] * 1000, 1)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": rank(0.50),
+        "p90_ms": rank(0.90),
+        "p95_ms": rank(0.95),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+# =====================================================
+# PER-CALL TURN LATENCY
+# =====================================================
+
+class TurnLatencyTracker:
+    """
+    Records per-turn pipeline latency from AgentSession events.
+
+    A turn opens when VAD reports the caller stopped speaking and closes
+    when the agent starts playing its reply. STT, end-of-utterance, LLM and
+    TTS stage timings come from the framework's metrics events; backend
+    calls made by tools are reported through ``record_automation`` and
+    speculative replies on interim transcripts through ``record_preflight``.
+    """
+
+    def __init__(self):
+        self._stages: dict[str, list[float]] = defaultdict(list)
+        self._automation: dict[str, list[float]] = defaultdict(list)
+        self._preflight = {"hits": 0, "misses": 0}
+        self._turn: dict[str, float] | None = None
+        self.turns = 0
+
+    def attach(self, session):
+        session.on("user_state_changed", self._on_user_state_changed)
+        session.on("agent_state_changed", self._on_agent_state_changed)
+        session.on("metrics_collected", self._on_metrics_collected)
+
+    # ── Event handlers ────────────────────────────────────────────────────────
+
+    def _on_user_state_changed(self, ev):
+        if ev.old_state == "speaking" and ev.new_state == "listening":
+            self._turn = {"user_stopped_at": ev.created_at}
+
+    def _on_agent_state_changed(self, ev):
+        if ev.new_state != "speaking" or self._turn is None:
+            return
+
+        turn = self._turn
+        self._turn = None
+
+        turn["response"] = ev.created_at - turn.pop("user_stopped_at")
+
+        for stage, value in turn.items():
+            self._observe(stage, value)
+
+        self.turns += 1
+
+        logger.info(
+            "TURN | %s",
+            " | ".join(f"{stage}={turn[stage] * 1000:.0f}ms" for stage in TURN_STAGES if stage in turn),
+        )
+
+    def _on_metrics_collected(self, ev):
+        if self._turn is None:
+            return
+
+        m = ev.metrics
+
+        if isinstance(m, metrics.EOUMetrics):
+            self._turn.setdefault("stt_final", m.transcription_delay)
+            self._turn.setdefault("end_of_utterance", m.end_of_utterance_delay)
+        elif isinstance(m, metrics.LLMMetrics):
+            self._turn.setdefault("llm_ttft", m.ttft)
+        elif isinstance(m, metrics.TTSMetrics):
+            self._turn.setdefault("tts_ttfb", m.ttfb)
+
+    # ── Recording ─────────────────────────────────────────────────────────────
+
+    def _observe(self, stage: str, value: float):
+        if value < 0:
+            return
+
+        self._stages[stage].append(value)
+        observe("salon_turn_latency_seconds", value, stage=stage)
+
+    def record_automation(self, endpoint: str, seconds: float, ok: bool):
+        """Listener for utils.add_automation_listener."""
+
+        self._automation[endpoint].append(seconds)
+
+    def record_preflight(self, outcome):
+        """
+        Listener for PreflightSTT's "preflight_resolved" event. On a hit the
+        reply started ``outcome.lead`` seconds before the final transcript,
+        which is the most it can have saved.
+        """
+
+        inc("salon_preflight_total", outcome="hit" if outcome.hit else "miss")
+
+        if not outcome.hit:
+            self._preflight["misses"] += 1
+            return
+
+        self._preflight["hits"] += 1
+
+        if self._turn is not None:
+            self._turn["preflight_lead"] = outcome.lead
+        else:
+            self._observe("preflight_lead", outcome.lead)
+
+    # ── Reporting ─────────────────────────────────────────────────────────────
+
+    def summary(self) -> dict:
+        """
+        Per-call percentiles for the after-call payload.
+        """
+
+        resolved = self._preflight["hits"] + self._preflight["misses"]
+
+        return {
+            "turns": self.turns,
+            "stages": {
+                stage: percentiles(self._stages[stage])
+                for stage in TURN_STAGES
+            },
+            "automation": {
+                endpoint: percentiles(values)
+                for endpoint, values in self._automation.items()
+            },
+            "preflight": {
+                **self._preflight,
+                "hit_rate": round(self._preflight["hits"] / resolved, 3) if resolved else None,
+            },
+        }
@@ -0,0 +1,327 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import unicodedata
+
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable
+
+import numpy as np
+
+from livekit import rtc
+
+import worker_metrics
+from deadlines import DEADLINES, Deadline
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("call_screening")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+# Seconds after the caller joins during which machine signals are looked
+# for; 0 turns screening off
+SCREENING_SECONDS = float(os.getenv("CALL_SCREENING_SECONDS", 10))
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+
+# Frames quieter than this count as silence
+SPEECH_DBFS = -45.0
+
+# Single-frequency tones: fax calling (CNG) and answer (CED) tones,
+# answering-machine beeps and the special information tones carriers play
+TONE_FREQUENCIES = {
+    "fax": (1100.0, 2100.0),
+    "beep": (1000.0, 1400.0),
+    "sit": (913.8, 1370.6, 1776.7),
+}
+
+# Share of a frame's energy at one frequency for it to count as a tone,
+# and how long the tone must hold
+TONE_ENERGY_RATIO = 0.8
+TONE_MIN_SECONDS = 0.25
+
+# Phrases of voicemail greetings, IVR menus and robocalls, matched against
+# the first transcripts after accents and case are folded. Kept to wording
+# a person calling a salon would not use
+MACHINE_PHRASES = {
+    "voicemail": (
+        "deje su mensaje",
+        "deja tu mensaje",
+        "despues del tono",
+        "buzon de voz",
+        "leave a message",
+        "after the tone",
+    ),
+    "ivr": (
+        "oprima uno",
+        "marque uno",
+        "presione uno",
+        "oprima el numero",
+        "marque el numero",
+        "presione el numero",
+        "su llamada es importante",
+        "esta llamada puede ser grabada",
+        "press one",
+        "this call may be recorded",
+    ),
+    "robocall": (
+        "ha sido seleccionado",
+        "esta es una grabacion",
+        "mensaje pregrabado",
+        "this is a recorded message",
+    ),
+}
+
+LABEL_HUMAN = "human"
+LABEL_MACHINE = "machine"
+LABEL_UNKNOWN = "unknown"
+
+
+# =====================================================
+# RESULT
+# =====================================================
+
+@dataclass(frozen=True)
+class Screening:
+    """
+    Outcome of screening one call, sent in the after-call payload.
+    """
+
+    label: str
+    reason: str
+    decided_after_s: float
+
+    def to_payload(self) -> dict:
+        return asdict(self)
+
+
+# =====================================================
+# SIGNALS
+# =====================================================
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def match_machine_phrase(transcript: str) -> str | None:
+    """Kind of machine whose phrasing ``transcript`` contains, if any."""
+
+    folded = _fold(transcript)
+
+    for kind, phrases in MACHINE_PHRASES.items():
+        if any(phrase in folded for phrase in phrases):
+            return kind
+
+    return None
+
+
+class _ToneBank:
+    """
+    Goertzel energy at each TONE_FREQUENCIES entry, for frames of one size,
+    as a share of the frame's total energy.
+    """
+
+    def __init__(self, frame_samples: int):
+        self.names: list[str] = []
+        frequencies = []
+
+        for name, values in TONE_FREQUENCIES.items():
+            for frequency in values:
+                self.names.append(name)
+                frequencies.append(frequency)
+
+        n = np.arange(frame_samples)
+        self._kernels = np.exp(
+            -2j * np.pi * np.outer(frequencies, n) / SAMPLE_RATE
+        )
+
+    def dominant(self, samples: np.ndarray, energy: float) -> str | None:
+        """Name of the tone holding most of the frame's energy, if any."""
+
+        if energy <= 0 or samples.shape[0] != self._kernels.shape[1]:
+            return None
+
+        ratios = 2 * np.abs(self._kernels @ samples) ** 2 / (samples.shape[0] * energy)
+        best = int(np.argmax(ratios))
+
+        return self.names[best] if ratios[best] >= TONE_ENERGY_RATIO else None
+
+
+# =====================================================
+# SCREENER
+# =====================================================
+
+class CallScreener:
+    """
+    Tags the start of a call as a person or a machine.
+
+    During the first SCREENING_SECONDS after the caller joins it looks for:
+
+    - a fax, beep or carrier information tone on the caller's audio
+    - voicemail, IVR or robocall phrasing in the first transcripts
+
+    Any of them tags the call as a machine at once and runs ``on_machine``.
+    Otherwise the call is tagged human when the window ends, or unknown if
+    the caller never made a sound.
+
+    Loudness alone never tags a machine: street noise, a TV or a caller
+    who talks without pausing would look the same as a recording.
+    """
+
+    def __init__(
+        self,
+        owner: str,
+        *,
+        on_machine: Callable[[Screening], Awaitable],
+        window_seconds: float = SCREENING_SECONDS,
+    ):
+        self._owner = owner
+        self._on_machine = on_machine
+        self._window_seconds = window_seconds
+
+        self._started_at = time.monotonic()
+        self._heard_caller = False
+        self._deadline: Deadline | None = None
+        self._audio_task: asyncio.Task | None = None
+        self._machine_task: asyncio.Task | None = None
+
+        self.result: Screening | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._window_seconds > 0
+
+    def attach(self, session):
+        if not self.enabled:
+            return
+
+        self._started_at = time.monotonic()
+        session.on("user_input_transcribed", self._on_transcribed)
+
+        self._deadline = DEADLINES.schedule(
+            "call_screening",
+            self._window_seconds,
+            self._on_window_elapsed,
+            owner=self._owner,
+        )
+
+    def watch_audio(self, participant: rtc.RemoteParticipant):
+        """Analyzes the caller's microphone track until a decision is made."""
+
+        if self.enabled:
+            self._audio_task = asyncio.create_task(self._watch_audio(participant))
+
+    def close(self):
+        if self._deadline is not None:
+            self._deadline.cancel()
+
+        if self._audio_task is not None:
+            self._audio_task.cancel()
+
+        if self.enabled and self.result is None:
+            self._decide(LABEL_UNKNOWN, "call_ended")
+
+    # ── Transcripts ───────────────────────────────────────────────────────────
+
+    def _on_transcribed(self, ev):
+        if self.result is not None or not ev.is_final or not ev.transcript.strip():
+            return
+
+        self._heard_caller = True
+
+        kind = match_machine_phrase(ev.transcript)
+        if kind is not None:
+            self._decide(LABEL_MACHINE, f"{kind}_phrase")
+
+    # ── Audio ─────────────────────────────────────────────────────────────────
+
+    async def _watch_audio(self, participant: rtc.RemoteParticipant):
+        stream = rtc.AudioStream.from_participant(
+            participant=participant,
+            track_source=rtc.TrackSource.SOURCE_MICROPHONE,
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+            frame_size_ms=FRAME_MS,
+        )
+
+        tones = _ToneBank(SAMPLE_RATE * FRAME_MS // 1000)
+        frame_seconds = FRAME_MS / 1000
+
+        tone_name: str | None = None
+        tone_run = 0.0
+
+        try:
+            async for event in stream:
+                if self.result is not None:
+                    return
+
+                samples = np.frombuffer(event.frame.data, dtype=np.int16).astype(np.float64)
+                energy = float(np.dot(samples, samples))
+                rms = (energy / max(1, samples.shape[0])) ** 0.5
+                dbfs = 20 * np.log10(max(rms, 1.0) / 32768)
+
+                # ── Tones ──
+                tone = tones.dominant(samples, energy) if dbfs > SPEECH_DBFS else None
+
+                if tone is not None and tone == tone_name:
+                    tone_run += frame_seconds
+                else:
+                    tone_name, tone_run = tone, frame_seconds if tone else 0.0
+
+                if tone_name is not None and tone_run >= TONE_MIN_SECONDS:
+                    self._decide(LABEL_MACHINE, f"{tone_name}_tone")
+                    return
+
+                # Any sound counts as the caller being there (human or
+                # unknown), never as a machine on its own
+                if dbfs > SPEECH_DBFS:
+                    self._heard_caller = True
+        finally:
+            await stream.aclose()
+
+    # ── Decision ──────────────────────────────────────────────────────────────
+
+    def _on_window_elapsed(self):
+        if self.result is None:
+            self._decide(
+                LABEL_HUMAN if self._heard_caller else LABEL_UNKNOWN,
+                "no_machine_signals" if self._heard_caller else "silence",
+            )
+
+        if self._audio_task is not None:
+            self._audio_task.cancel()
+
+    def _decide(self, label: str, reason: str):
+        if self.result is not None:
+            return
+
+        self.result = Screening(
+            label=label,
+            reason=reason,
+            decided_after_s=round(time.monotonic() - self._started_at, 2),
+        )
+
+        worker_metrics.inc("salon_call_screening_total", label=label, reason=reason)
+        logger.info(
+            "Caller screened | label=%s | reason=%s | after_s=%.2f",
+            label,
+            reason,
+            self.result.decided_after_s,
+        )
+
+        if label == LABEL_MACHINE:
+            if self._deadline is not None:
+                self._deadline.cancel()
+
+            self._machine_task = asyncio.ensure_future(self._on_machine(self.result))
@@ -0,0 +1,310 @@
+import os
+import time
+import heapq
+import asyncio
+import inspect
+import logging
+import itertools
+
+from collections import Counter, defaultdict
+from typing import Awaitable, Callable
+
+import worker_metrics
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("deadlines")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+# Cancelled entries stay in the heap until popped; rebuild it once they
+# outnumber the live ones
+_COMPACT_MIN_CANCELLED = 64
+
+
+# =====================================================
+# DEADLINE
+# =====================================================
+
+class Deadline:
+    """
+    One registered deadline. Returned by ``DeadlineScheduler.schedule``;
+    keep it to cancel the deadline or read how long is left.
+    """
+
+    __slots__ = ("name", "owner", "when", "expired", "cancelled", "_callback", "_scheduler", "_task")
+
+    def __init__(
+        self,
+        scheduler: "DeadlineScheduler",
+        name: str,
+        when: float,
+        callback: Callable[[], Awaitable | None],
+        owner: str | None,
+    ):
+        self.name = name
+        self.owner = owner
+        self.when = when
+        self.expired = False
+        self.cancelled = False
+
+        self._callback = callback
+        self._scheduler = scheduler
+        self._task: asyncio.Task | None = None
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.when - self._scheduler._loop.time())
+
+    def cancel(self) -> bool:
+        """
+        Cancels the deadline, or the callback it started if it already
+        expired. Returns False when there was nothing left to cancel.
+        """
+
+        if self.expired:
+            if self._task is not None and not self._task.done():
+                self._task.cancel()
+                return True
+            return False
+
+        if self.cancelled:
+            return False
+
+        self.cancelled = True
+        self._scheduler._discard(self)
+        return True
+
+    def __repr__(self) -> str:
+        return f"<Deadline {self.name} owner={self.owner} when={self.when:.3f}>"
+
+
+# =====================================================
+# SCHEDULER
+# =====================================================
+
+class DeadlineScheduler:
+    """
+    Every timed deadline of this process on one heap and one loop timer.
+
+    Registering is O(log n) and cancelling O(1): a cancelled entry is only
+    marked and skipped when it reaches the top of the heap. A single
+    ``call_at`` handle is armed for the earliest live deadline, so calls in
+    progress hold no sleeping tasks.
+
+    Callbacks run on the event loop when their deadline passes. A callback
+    returning an awaitable runs as a task, which ``Deadline.cancel`` also
+    cancels; exceptions are logged.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, Deadline]] = []
+        self._seq = itertools.count()
+        self._by_owner: dict[str, set[Deadline]] = defaultdict(set)
+        self._live_by_name: Counter[str] = Counter()
+        self._cancelled = 0
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_at: float | None = None
+
+    # ── Registration ──────────────────────────────────────────────────────────
+
+    def schedule(
+        self,
+        name: str,
+        delay: float,
+        callback: Callable[[], Awaitable | None],
+        *,
+        owner: str | None = None,
+    ) -> Deadline:
+        """
+        Calls ``callback`` after ``delay`` seconds unless the returned
+        Deadline is cancelled first.
+
+        Parameters
+        ----------
+        name : str
+            What the deadline is for, e.g. "max_call_duration"; used in logs,
+            metrics, ``upcoming`` and the salon_pending_deadlines and
+            salon_next_deadline_timestamp_seconds gauges
+
+        owner : str, optional
+            Call the deadline belongs to, for ``cancel_owner``
+        """
+
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop:
+            # Handles armed on a closed loop can never fire
+            self._reset(loop)
+
+        deadline = Deadline(self, name, loop.time() + delay, callback, owner)
+
+        heapq.heappush(self._heap, (deadline.when, next(self._seq), deadline))
+        self._live_by_name[name] += 1
+        if owner is not None:
+            self._by_owner[owner].add(deadline)
+
+        if self._timer_at is None or deadline.when < self._timer_at:
+            self._arm()
+
+        logger.debug("Deadline scheduled | name=%s | owner=%s | in_s=%.1f", name, owner, delay)
+
+        self._report()
+        return deadline
+
+    def cancel_owner(self, owner: str) -> int:
+        """Cancels every deadline of ``owner``. Returns how many were live."""
+
+        return sum(deadline.cancel() for deadline in list(self._by_owner.get(owner, ())))
+
+    # ── Inspection ────────────────────────────────────────────────────────────
+
+    def upcoming(self, limit: int | None = None) -> list[dict]:
+        """
+        Live deadlines, earliest first, for debugging.
+        """
+
+        live = sorted(entry for entry in self._heap if not entry[2].cancelled)
+
+        return [
+            {
+                "name": deadline.name,
+                "owner": deadline.owner,
+                "remaining_s": round(deadline.remaining, 3),
+            }
+            for _, _, deadline in live[:limit]
+        ]
+
+    def __len__(self) -> int:
+        return len(self._heap) - self._cancelled
+
+    # ── Timer ─────────────────────────────────────────────────────────────────
+
+    def _arm(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_at = None
+
+        if self._heap:
+            self._timer_at = self._heap[0][0]
+            self._timer = self._loop.call_at(self._timer_at, self._fire)
+
+    def _fire(self):
+        self._timer = None
+        self._timer_at = None
+
+        now = self._loop.time()
+
+        while self._heap and self._heap[0][0] <= now:
+            _, _, deadline = heapq.heappop(self._heap)
+
+            if deadline.cancelled:
+                self._cancelled -= 1
+                continue
+
+            self._expire(deadline)
+
+        self._arm()
+        self._report()
+
+    def _expire(self, deadline: Deadline):
+        deadline.expired = True
+        self._forget(deadline)
+
+        worker_metrics.inc("salon_deadlines_expired_total", deadline=deadline.name)
+        logger.info("Deadline expired | name=%s | owner=%s", deadline.name, deadline.owner)
+
+        try:
+            result = deadline._callback()
+        except Exception:
+            logger.exception("Deadline callback failed | name=%s", deadline.name)
+            return
+
+        if inspect.isawaitable(result):
+            deadline._task = asyncio.ensure_future(result)
+            deadline._task.add_done_callback(
+                lambda task: _log_task_failure(task, deadline.name)
+            )
+
+    # ── Bookkeeping ───────────────────────────────────────────────────────────
+
+    def _discard(self, deadline: Deadline):
+        self._forget(deadline)
+        self._cancelled += 1
+
+        if self._cancelled >= _COMPACT_MIN_CANCELLED and self._cancelled * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+        # Leave the timer armed for a cancelled head: _fire skips it
+        self._report()
+
+    def _forget(self, deadline: Deadline):
+        # Deadlines of a loop that was reset were already zeroed
+        if self._live_by_name[deadline.name] > 0:
+            self._live_by_name[deadline.name] -= 1
+
+        owned = self._by_owner.get(deadline.owner)
+        if owned is not None:
+            owned.discard(deadline)
+            if not owned:
+                del self._by_owner[deadline.owner]
+
+    def _reset(self, loop: asyncio.AbstractEventLoop):
+        self._heap.clear()
+        self._by_owner.clear()
+        for name in self._live_by_name:
+            self._live_by_name[name] = 0
+        self._cancelled = 0
+        self._loop = loop
+        self._timer = None
+        self._timer_at = None
+
+    def _report(self):
+        next_at: dict[str, float] = {}
+
+        for when, _, deadline in self._heap:
+            if not deadline.cancelled and when < next_at.get(deadline.name, float("inf")):
+                next_at[deadline.name] = when
+
+        # Loop time is monotonic; the snapshot needs a wall-clock time that
+        # stays right between flushes
+        to_wall = time.time() - self._loop.time() if self._loop is not None else 0.0
+        pid = os.getpid()
+
+        # Names stay in the counter at 0, so a drained kind reads 0 instead
+        # of keeping its last value
+        for name, live in self._live_by_name.items():
+            worker_metrics.set_gauge("salon_pending_deadlines", live, deadline=name)
+            worker_metrics.set_gauge(
+                "salon_next_deadline_timestamp_seconds",
+                next_at[name] + to_wall if name in next_at else 0,
+                deadline=name,
+                pid=pid,
+            )
+
+
+def _log_task_failure(task: asyncio.Task, name: str):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(
+            "Deadline callback failed | name=%s",
+            name,
+            exc_info=task.exception(),
+        )
+
+
+# Deadlines of this process
+DEADLINES = DeadlineScheduler()
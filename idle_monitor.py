@@ -0,0 +1,138 @@
+import os
+import logging
+
+from typing import Awaitable, Callable
+
+import worker_metrics
+from deadlines import DEADLINES, Deadline
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("idle_monitor")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+# Silence, with the agent waiting on the caller, before asking if they are
+# still there; 0 turns idle detection off
+IDLE_SILENCE_SECONDS = float(os.getenv("IDLE_SILENCE_SECONDS", 20))
+
+# Silence after that prompt before the call is ended
+IDLE_PROMPT_GRACE_SECONDS = float(os.getenv("IDLE_PROMPT_GRACE_SECONDS", 10))
+
+
+# =====================================================
+# IDLE CALLER MONITOR
+# =====================================================
+
+class IdleCallMonitor:
+    """
+    Ends calls where nobody is talking.
+
+    Silence is what AgentSession reports from the Silero VAD: the window
+    runs while the caller is not speaking and the agent is listening, and
+    any caller speech or agent activity resets it. When it elapses the
+    caller is prompted once; if the line stays silent for the grace period
+    after the prompt, the call is ended.
+
+    Both timers live on the process-wide deadline scheduler under the
+    call's conversation id.
+    """
+
+    def __init__(
+        self,
+        owner: str,
+        *,
+        prompt: Callable[[], Awaitable],
+        end_call: Callable[[], Awaitable],
+        silence_seconds: float = IDLE_SILENCE_SECONDS,
+        grace_seconds: float = IDLE_PROMPT_GRACE_SECONDS,
+    ):
+        self._owner = owner
+        self._prompt = prompt
+        self._end_call = end_call
+        self._silence_seconds = silence_seconds
+        self._grace_seconds = grace_seconds
+
+        self._user_speaking = False
+        self._agent_state = "initializing"
+        self._deadline: Deadline | None = None
+        self._closed = False
+
+        self.prompted = False
+
+    def attach(self, session):
+        if self._silence_seconds <= 0:
+            return
+
+        session.on("user_state_changed", self._on_user_state_changed)
+        session.on("agent_state_changed", self._on_agent_state_changed)
+        session.on("close", lambda ev: self.close())
+
+    def close(self):
+        self._closed = True
+        self._cancel()
+
+    # ── Event handlers ────────────────────────────────────────────────────────
+
+    def _on_user_state_changed(self, ev):
+        if ev.new_state == "speaking":
+            self._user_speaking = True
+            # The caller answered; the next silence gets a fresh prompt
+            self.prompted = False
+        elif ev.old_state == "speaking":
+            self._user_speaking = False
+        else:
+            # listening <-> away is the session's own silence timer
+            # (user_away_timeout); it is no caller activity and must not
+            # restart the window
+            return
+
+        self._rearm()
+
+    def _on_agent_state_changed(self, ev):
+        self._agent_state = ev.new_state
+        self._rearm()
+
+    # ── Timer ─────────────────────────────────────────────────────────────────
+
+    def _rearm(self):
+        self._cancel()
+
+        if self._closed or self._user_speaking or self._agent_state != "listening":
+            return
+
+        self._deadline = DEADLINES.schedule(
+            "idle_grace" if self.prompted else "idle_silence",
+            self._grace_seconds if self.prompted else self._silence_seconds,
+            self._on_expired,
+            owner=self._owner,
+        )
+
+    def _cancel(self):
+        if self._deadline is not None and not self._deadline.expired:
+            self._deadline.cancel()
+        self._deadline = None
+
+    def _on_expired(self):
+        if not self.prompted:
+            try:
+                handle = self._prompt()
+            except RuntimeError:
+                # The session started closing (e.g. after a goodbye) and no
+                # longer takes speech
+                self._closed = True
+                return None
+
+            self.prompted = True
+            worker_metrics.inc("salon_idle_prompts_total")
+            logger.info("Caller silent for %.0fs | prompted", self._silence_seconds)
+            return handle
+
+        self._closed = True
+        logger.info("Caller still silent %.0fs after prompt | ending call", self._grace_seconds)
+        return self._end_call()
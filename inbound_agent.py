@@ -1,5 +1,7 @@
 import logging
 import os
+import sys
+import time
 import secrets
 import asyncio
 import httpx
@@ -12,8 +14,10 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 from livekit.agents import (
+    NOT_GIVEN,
     Agent,
     AgentSession,
+    ChatContext,
     JobContext,
     JobProcess,
     WorkerOptions,
@@ -21,21 +25,48 @@ from livekit.agents import (
     AutoSubscribe,
     function_tool,
     RunContext,
+    metrics,
 )
 
 from livekit.plugins import silero
 from livekit.plugins import openai
 from livekit.plugins import deepgram
 from livekit.plugins.google import tts as google_tts
-from livekit import api
+from livekit import api, rtc
 from livekit.protocol import sip as proto_sip
+from livekit.agents.utils import http_context
 
 from utils import (
+    CircuitOpenError,
+    automation_available,
     generate_call_id,
     call_automation,
+    close_livekit_api,
+    get_livekit_api,
+    warm_automation_backend,
+    add_automation_listener,
+    remove_automation_listener,
     get_current_time_spanish_pst,
     PST,
 )
+from schedule import check_visit_slot, parse_visit_date, parse_visit_time
+from availability import AVAILABILITY_ENDPOINT, describe_open_slots, get_availability_cache
+from prompt_store import PromptTemplateStore, render_call_context
+from call_metrics import TurnLatencyTracker
+import worker_metrics
+from worker_load import LOAD_THRESHOLD, WORKER_LOAD, admitted_busy
+from outbox import start_drainer_thread, submit_after_call
+from deadlines import DEADLINES, Deadline
+from idle_monitor import IdleCallMonitor
+from call_screening import CallScreener, Screening
+from transcript_stream import TRANSCRIPT_STREAMING, TranscriptStreamer
+from transcript_journal import TranscriptJournal, recover_orphaned_journals
+from stt_preflight import PreflightSTT
+from tts_cache import (
+    PhraseAudioCache,
+    build_sentence_cached_tts,
+    split_sentences,
+)
 
 
 # =====================================================
@@ -51,6 +82,145 @@ load_dotenv(BASE_DIR / ".env")
 
 INSTRUCTIONS_PATH = BASE_DIR / "instructions.txt"
 
+# Time left after the goodbye finishes playing out before the SIP leg is
+# dropped, covering the trunk's own buffering
+HANGUP_TAIL_SECONDS = float(os.getenv("HANGUP_TAIL_SECONDS", 0.3))
+
+# Longest call before the agent says goodbye and hangs up
+MAX_CALL_SECONDS = int(os.getenv("MAX_CALL_SECONDS", 600))
+
+# Longest the job waits for the SIP caller to join the room
+PARTICIPANT_JOIN_SECONDS = float(os.getenv("PARTICIPANT_JOIN_SECONDS", 60))
+
+# Routes requests sharing the static instructions prefix to the same cache
+OPENAI_PROMPT_CACHE_KEY = os.getenv("OPENAI_PROMPT_CACHE_KEY")
+
+VAD_OPTIONS = {
+    "activation_threshold": 0.5,
+    "min_speech_duration": 0.15,
+    "min_silence_duration": 0.3,
+}
+
+TTS_OPTIONS = {
+    "language": "es-US",
+    "voice_name": "es-US-Chirp3-HD-Achernar",
+    "model_name": "chirp_3",
+    "speaking_rate": 1.1,
+}
+TTS_SAMPLE_RATE = 24000
+
+# Time prewarm may spend synthesizing phrases missing from .tts_cache (it
+# is filled at build time by `python inbound_agent.py download-files`);
+# what is left plays through live TTS. Stays under livekit's 10 s
+# initialize_process_timeout
+PHRASE_CACHE_PREWARM_TIMEOUT = float(os.getenv("PHRASE_CACHE_PREWARM_TIMEOUT", 5))
+
+# End-of-turn detection. Unset keeps livekit's default; "vad" ends turns on
+# Silero silence alone; "multilingual" adds the text-based turn detector
+# model (fetch it at build time with `python inbound_agent.py download-files`)
+TURN_DETECTION = os.getenv("TURN_DETECTION", "").lower()
+
+# With the turn detector: wait after a likely / an unlikely end of turn
+EOT_MIN_DELAY = float(os.getenv("EOT_MIN_DELAY", 0.2))
+EOT_MAX_DELAY = float(os.getenv("EOT_MAX_DELAY", 3.0))
+
+if TURN_DETECTION == "multilingual":
+    # Importing the plugin loads the model once in the worker's inference
+    # process, shared by every job process; skip it unless the mode is on
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+# Start the LLM reply on stable Deepgram interims instead of waiting for the
+# final transcript; it is kept when the final matches, redone otherwise
+PREEMPTIVE_INTERIMS = os.getenv("PREEMPTIVE_INTERIMS", "").lower() in ("1", "true", "yes")
+
+# Speculative replies per caller turn; each distinct stable interim and a
+# differing final transcript take one
+PREEMPTIVE_MAX_RETRIES = int(os.getenv("PREEMPTIVE_MAX_RETRIES", 6))
+
+# Synthesized once per call to open the gRPC channel before the first reply
+TTS_WARMUP_TEXT = "Hola."
+
+# Any response will do: it leaves a TLS connection in the pool
+DEEPGRAM_WARMUP_URL = "https://api.deepgram.com/"
+
+
+# =====================================================
+# FIXED PHRASES (PRE-SYNTHESIZED IN PREWARM)
+# =====================================================
+
+GREETING_TEXT = "Hola, soy Mía de Salón Ibargo. ¿En qué puedo ayudarte?"
+
+CLOSING_TEXT = "Gracias por llamar a Salon Ibargo. Que tengas excelente día."
+
+BOOKING_FILLER_TEXT = (
+    "Gracias por proporcionar los datos para agendar tu cita. "
+    "Espera un momento mientras verifico tus datos para mayor precisión"
+)
+
+MAX_DURATION_TEXT = (
+    "La llamada ha alcanzado el tiempo máximo permitido. "
+    "Gracias por comunicarte con Salon Ibargo. Que tengas excelente día."
+)
+
+# Asked once when the line goes quiet (see idle_monitor)
+IDLE_PROMPT_TEXT = "¿Sigues ahí?"
+
+# Played instead of the agent when the worker is saturated
+BUSY_TEXT = (
+    "En este momento todas nuestras líneas están ocupadas. "
+    "Por favor llámanos de nuevo en unos minutos. Gracias por llamar a Salon Ibargo."
+)
+
+FIXED_PHRASES = [
+    GREETING_TEXT,
+    CLOSING_TEXT,
+    BOOKING_FILLER_TEXT,
+    MAX_DURATION_TEXT,
+    IDLE_PROMPT_TEXT,
+    BUSY_TEXT,
+]
+
+# Lines instructions.txt has the agent say word for word. Their sentences
+# are pre-synthesized with the fixed phrases and played from the cache when
+# the LLM says them; tests/test_inbound_agent.py fails when the instructions
+# no longer contain one of them
+SCRIPTED_REPLIES = [
+    "Con gusto te ayudo a agendar. ¿Me dices tu nombre, por favor?",
+    (
+        "Ese horario ya queda fuera del horario de visitas. "
+        "Entre semana podemos agendar de diez de la mañana a cuatro de la tarde."
+    ),
+    "Los sábados podemos agendar visitas de diez de la mañana a doce del día.",
+    "Estamos en Calle del Hospital número quinientos sesenta y tres en Mexicali.",
+    (
+        "Para ubicarlo más fácil te recomiendo buscar 'Salón Ibargo' en Google Maps "
+        "o Apple Maps y ahí te aparece la ruta directa."
+    ),
+    (
+        "Los precios dependen de varios factores como el tipo de evento, número de "
+        "invitados y los servicios que se requieran, por eso normalmente lo vemos "
+        "directamente en el salón. Si gustas puedes venir a conocerlo y con gusto te "
+        "damos toda la información."
+    ),
+    (
+        "Una disculpa, pero por teléfono no tenemos permitido compartir precios. "
+        "Con gusto puedes venir a conocer el salón y ahí te damos toda la información "
+        "para tu evento."
+    ),
+    "Estamos en el Centro Cívico de Mexicali. ¿Te gustaría venir a conocer el salón?",
+    (
+        "Lo siento, solo puedo ayudarte con información del Salón Ibargo. "
+        "¿En qué te puedo apoyar?"
+    ),
+    (
+        "Si necesitas información sobre el salón con gusto puedo ayudarte. De lo "
+        "contrario, te recomiendo comunicarte nuevamente cuando lo necesites."
+    ),
+    "Si gustas podemos agendar una visita para que conozcas el salón.",
+]
+
+REPLY_CACHE_SENTENCES = split_sentences(SCRIPTED_REPLIES)
+
 
 # =====================================================
 # GOOGLE SERVICE ACCOUNT BOOTSTRAP (REQUIRED FOR RENDER)
@@ -78,36 +248,42 @@ else:
 
 
 # =====================================================
-# FUNCTION TOOLS (FORWARDERS)
+# CALL HELPERS
 # =====================================================
 
-@function_tool()
-async def end_call(
-    context: RunContext,
-    reason: str,
-) -> str:
+def say_phrase(session: AgentSession, text: str, *, allow_interruptions: bool):
     """
-    Usa esta función únicamente cuando la conversación haya terminado de forma natural.
+    Speaks a fixed phrase, replaying pre-synthesized audio when it is cached
+    and falling back to live TTS otherwise.
     """
 
-    logger.info("end_call triggered. reason=%s", reason)
+    cache = session.userdata.get("phrase_cache")
 
-    # Speak closing message
-    await context.session.say(
-        "Gracias por llamar a Salon Ibargo. Que tengas excelente día.",
-        allow_interruptions=False,
-    )
+    if cache is not None and cache.get(text) is not None:
+        return session.say(
+            text,
+            audio=cache.frames(text),
+            allow_interruptions=allow_interruptions,
+        )
 
-    # Small buffer
-    await asyncio.sleep(1)
+    return session.say(text, allow_interruptions=allow_interruptions)
 
-    room_name = context.session.userdata.get("room_name")
-    identity = context.session.userdata.get("participant_identity")
 
-    lkapi = api.LiveKitAPI()
+async def hang_up(session: AgentSession) -> bool:
+    """
+    Removes the caller from the room through the shared LiveKitAPI client.
+    Returns True if the participant was removed by this call.
+    """
 
+    return await remove_participant(
+        session.userdata.get("room_name"),
+        session.userdata.get("participant_identity"),
+    )
+
+
+async def remove_participant(room_name: str, identity: str) -> bool:
     try:
-        await lkapi.room.remove_participant(
+        await get_livekit_api().room.remove_participant(
             api.RoomParticipantIdentity(
                 room=room_name,
                 identity=identity,
@@ -115,6 +291,7 @@ async def end_call(
         )
 
         logger.info("Successfully hung up participant %s", identity)
+        return True
 
     except Exception as e:
         if "not_found" in str(e):
@@ -122,8 +299,85 @@ async def end_call(
         else:
             logger.warning("Error while ending call: %s", e)
 
-    finally:
-        await lkapi.aclose()
+        return False
+
+
+async def answer_busy(ctx: JobContext, identity: str):
+    """
+    Plays the pre-synthesized busy message straight into the room and hangs
+    up, without starting STT, LLM or TTS for the call.
+    """
+
+    cache = ctx.proc.userdata.get("phrase_cache")
+
+    if cache is not None and cache.get(BUSY_TEXT) is not None:
+        source = rtc.AudioSource(TTS_SAMPLE_RATE, 1)
+        track = rtc.LocalAudioTrack.create_audio_track("busy_message", source)
+
+        await ctx.room.local_participant.publish_track(
+            track,
+            rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE),
+        )
+
+        async for frame in cache.frames(BUSY_TEXT):
+            await source.capture_frame(frame)
+
+        await source.wait_for_playout()
+        await asyncio.sleep(HANGUP_TAIL_SECONDS)
+
+    await remove_participant(ctx.room.name, identity)
+    await close_livekit_api()
+
+
+def record_tool(tool: str, outcome: str):
+    worker_metrics.inc("salon_tool_invocations_total", tool=tool, outcome=outcome)
+
+
+async def say_and_hang_up(session: AgentSession, text: str) -> bool:
+    """
+    Speaks a closing phrase and removes the caller as soon as it has played
+    out, plus HANGUP_TAIL_SECONDS for the trunk's buffering.
+    """
+
+    handle = say_phrase(session, text, allow_interruptions=False)
+    await handle.wait_for_playout()
+
+    played_out_at = time.monotonic()
+    await asyncio.sleep(HANGUP_TAIL_SECONDS)
+
+    removed = await hang_up(session)
+
+    hangup_s = time.monotonic() - played_out_at
+    # Compared with the fixed 1 s sleep this replaced: the trunk time saved
+    # per hang-up
+    worker_metrics.observe("salon_hangup_after_playout_seconds", hangup_s)
+
+    logger.info(
+        "Hang-up after playout | tail_ms=%.0f | playout_to_removal_ms=%.0f",
+        HANGUP_TAIL_SECONDS * 1000,
+        hangup_s * 1000,
+    )
+
+    return removed
+
+
+# =====================================================
+# FUNCTION TOOLS (FORWARDERS)
+# =====================================================
+
+@function_tool()
+async def end_call(
+    context: RunContext,
+    reason: str,
+) -> str:
+    """
+    Usa esta función únicamente cuando la conversación haya terminado de forma natural.
+    """
+
+    logger.info("end_call triggered. reason=%s", reason)
+
+    await say_and_hang_up(context.session, CLOSING_TEXT)
+    record_tool("end_call", "ok")
 
     return "Call ended."
 
@@ -150,8 +404,38 @@ async def agendar_cita_disponibilidad(
     Solo ejecútala cuando toda la información esté confirmada.
     """
 
+    # Reject slots that can never be booked before touching the backend
+    rejection = check_visit_slot(visit_date, visit_time)
+
+    if rejection:
+        logger.info(
+            "Slot rejected locally | date=%s | time=%s",
+            visit_date,
+            visit_time,
+        )
+        record_tool("agendar_cita_disponibilidad", "rejected_local")
+        return rejection
+
     call_id = context.session.userdata.get("conversation_id")
 
+    # Skip the backend for slots the prefetched availability knows are taken
+    availability = get_availability_cache()
+    day = parse_visit_date(visit_date, datetime.now(tz=PST).date())
+    at = parse_visit_time(visit_time)
+
+    if day and at and availability.is_taken(day, at):
+        logger.info("Slot known taken from cache | date=%s | time=%s", day, at)
+        record_tool("agendar_cita_disponibilidad", "taken_cached")
+
+        open_slots = availability.open_slots(day)
+        if open_slots:
+            return (
+                "Ese horario ya está ocupado. Ese día tenemos disponible "
+                f"{describe_open_slots(open_slots)}. ¿Cuál te acomoda?"
+            )
+
+        return "Ese horario ya está ocupado. ¿Qué otro día u hora te acomoda?"
+
     payload = {
         "conversation_id": call_id,
         "channel": "voice",
@@ -161,10 +445,27 @@ async def agendar_cita_disponibilidad(
         "purpose": purpose,
     }
 
+    def degraded_booking() -> str:
+        # Backend unhealthy: keep the request for a human callback instead
+        # of holding the caller on dead air
+        context.session.userdata["pending_visit_request"] = payload
+        context.session.userdata["transcript_journal"].note("pending_visit_request", payload)
+        logger.warning("Booking deferred to callback | conversation_id=%s", call_id)
+        record_tool("agendar_cita_disponibilidad", "degraded")
+
+        return (
+            "En este momento no puedo confirmar la cita en el sistema. "
+            "Ya tengo tus datos y te llamaremos a este número para confirmarla."
+        )
+
+    if not automation_available():
+        return degraded_booking()
+
     api_task = None
 
     try:
         # Start API immediately
+        booking_started = time.monotonic()
         api_task = asyncio.create_task(
             call_automation(
                 "/salon_ibargo_agendar_cita_disponibilidad",
@@ -173,31 +474,50 @@ async def agendar_cita_disponibilidad(
         )
 
         # Speak while backend runs
-        await context.session.say(
-            "Gracias por proporcionar los datos para agendar tu cita. "
-            "Espera un momento mientras verifico tus datos para mayor precisión",
+        await say_phrase(
+            context.session,
+            BOOKING_FILLER_TEXT,
             allow_interruptions=False,
         )
 
         result = await asyncio.wait_for(api_task, timeout=20)
 
+        logger.info(
+            "Booking backend latency_ms=%.0f | warmup_s=%s",
+            (time.monotonic() - booking_started) * 1000,
+            context.session.userdata.get("backend_warmup_s"),
+        )
+
         if not isinstance(result, dict):
             logger.error("Invalid API response: %s", result)
+            record_tool("agendar_cita_disponibilidad", "error")
             return "Lo siento, ocurrió un problema al verificar la disponibilidad."
 
         if result.get("confirmed_visit"):
             context.session.userdata["confirmed_visit"] = result["confirmed_visit"]
+            context.session.userdata["transcript_journal"].note(
+                "confirmed_visit",
+                result["confirmed_visit"],
+            )
+            availability.invalidate()
 
         message = result.get("message")
 
         if not message:
             logger.error("API response missing message: %s", result)
+            record_tool("agendar_cita_disponibilidad", "error")
             return "Hubo un problema al confirmar la cita."
 
+        record_tool(
+            "agendar_cita_disponibilidad",
+            "confirmed" if result.get("confirmed_visit") else "not_confirmed",
+        )
         return message
 
     except httpx.HTTPStatusError as e:
         # Backend returned 4xx / 5xx
+        record_tool("agendar_cita_disponibilidad", f"http_{e.response.status_code}")
+
         try:
             error_json = e.response.json()
             detail = error_json.get("detail")
@@ -212,8 +532,12 @@ async def agendar_cita_disponibilidad(
         logger.warning("HTTP error from appointment API: %s", e)
         return "Lo siento, ocurrió un problema al verificar la disponibilidad."
 
+    except CircuitOpenError:
+        return degraded_booking()
+
     except asyncio.TimeoutError:
         logger.warning("Appointment API timed out")
+        record_tool("agendar_cita_disponibilidad", "timeout")
         return (
             "Lo siento, el sistema está tardando más de lo esperado "
             "en verificar la disponibilidad."
@@ -221,6 +545,7 @@ async def agendar_cita_disponibilidad(
 
     except Exception:
         logger.exception("Unexpected error in agendar_cita_disponibilidad")
+        record_tool("agendar_cita_disponibilidad", "error")
         return (
             "Lo siento, ocurrió un problema al verificar la disponibilidad."
         )
@@ -230,6 +555,47 @@ async def agendar_cita_disponibilidad(
             api_task.cancel()
 
 
+@function_tool()
+async def consultar_disponibilidad(
+    context: RunContext,
+    visit_date: str,
+) -> str:
+    """
+    Usa esta función cuando el cliente pregunte qué horarios hay disponibles
+    para visitar el salón en un día específico (por ejemplo "¿tienen algo el sábado?").
+
+    No agenda la cita. Para agendar usa agendar_cita_disponibilidad.
+    """
+
+    day = parse_visit_date(visit_date, datetime.now(tz=PST).date())
+
+    if day is None:
+        record_tool("consultar_disponibilidad", "unparsed_date")
+        return "No pude identificar la fecha. Confirma el día con el cliente."
+
+    availability = get_availability_cache()
+    call_id = context.session.userdata.get("conversation_id")
+
+    if not availability.covers(day):
+        await availability.wait(call_id)
+
+    open_slots = availability.open_slots(day)
+
+    if open_slots is None:
+        record_tool("consultar_disponibilidad", "unavailable")
+        return (
+            "No tengo la disponibilidad de ese día a la mano. "
+            "Pide la hora que prefiere el cliente y verifícala al agendar."
+        )
+
+    record_tool("consultar_disponibilidad", "answered")
+
+    if not open_slots:
+        return "Ese día ya no hay horarios disponibles para visitas."
+
+    return f"Ese día hay horarios disponibles {describe_open_slots(open_slots)}."
+
+
 # =====================================================
 # AGENT
 # =====================================================
@@ -238,14 +604,164 @@ class Assistant(Agent):
     agendar_cita_disponibilidad = agendar_cita_disponibilidad
     end_call = end_call
 
+    def __init__(self, **kwargs):
+        # Offered only where the backend serves the slot lookup; otherwise
+        # it could only ever answer "unavailable"
+        tools = [consultar_disponibilidad] if AVAILABILITY_ENDPOINT else []
+
+        super().__init__(tools=tools, **kwargs)
+
+
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load(
-        activation_threshold=0.5,
-        min_speech_duration=0.15,
-        min_silence_duration=0.3,
+    proc.userdata["vad"] = silero.VAD.load(**VAD_OPTIONS)
+
+    # Built once per process; their connections open lazily, on the job's
+    # loop, in open_provider_connections
+    proc.userdata["stt"] = deepgram.STT(
+        model="nova-3",
+        language="es",
+        punctuate=True,
+        smart_format=True,
+        interim_results=True,
+    )
+    if PREEMPTIVE_INTERIMS:
+        proc.userdata["stt"] = PreflightSTT(proc.userdata["stt"])
+    proc.userdata["llm"] = openai.LLM(
+        model="gpt-5.2",
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        prompt_cache_key=OPENAI_PROMPT_CACHE_KEY or NOT_GIVEN,
+    )
+    proc.userdata["tts"] = google_tts.TTS(**TTS_OPTIONS, sample_rate=TTS_SAMPLE_RATE)
+
+    add_automation_listener(worker_metrics.record_automation)
+
+    phrase_cache = build_phrase_cache()
+
+    try:
+        asyncio.run(
+            asyncio.wait_for(_fill_phrase_cache(phrase_cache), PHRASE_CACHE_PREWARM_TIMEOUT)
+        )
+    except asyncio.TimeoutError:
+        logger.warning(
+            "prewarm: phrase audio cache incomplete after %.0fs; the rest uses live TTS",
+            PHRASE_CACHE_PREWARM_TIMEOUT,
+        )
+    except Exception:
+        logger.exception("prewarm: failed to fill phrase audio cache")
+
+    proc.userdata["phrase_cache"] = phrase_cache
+
+    prompt_store = PromptTemplateStore(INSTRUCTIONS_PATH)
+
+    try:
+        prompt_store.load()
+    except OSError:
+        # entrypoint retries the load and ends the call if it still fails
+        logger.exception("prewarm: failed to load instructions file")
+
+    proc.userdata["prompt_store"] = prompt_store
+
+
+def build_phrase_cache() -> PhraseAudioCache:
+    return PhraseAudioCache(
+        voice_name=TTS_OPTIONS["voice_name"],
+        model_name=TTS_OPTIONS["model_name"],
+        speaking_rate=TTS_OPTIONS["speaking_rate"],
+        sample_rate=TTS_SAMPLE_RATE,
+    )
+
+
+async def _fill_phrase_cache(phrase_cache: PhraseAudioCache):
+    # Throwaway engine: its gRPC channel is bound to this short-lived loop
+    tts = google_tts.TTS(**TTS_OPTIONS, sample_rate=TTS_SAMPLE_RATE)
+
+    try:
+        await phrase_cache.fill(tts, FIXED_PHRASES + REPLY_CACHE_SENTENCES)
+    finally:
+        await tts.aclose()
+
+
+async def open_provider_connections(userdata: dict, room_name: str):
+    """
+    Opens the connections a call needs while the caller is still being
+    connected: OpenAI's HTTPS pool, a pooled TLS connection to Deepgram that
+    the streaming websocket reuses, Google TTS's gRPC channel and token, and
+    the LiveKit server API session every hang-up goes through.
+    """
+
+    started = time.perf_counter()
+
+    userdata["llm"].prewarm()
+
+    warmups = []
+
+    stt = userdata["stt"]
+    if isinstance(stt, PreflightSTT):
+        stt = stt.wrapped_stt
+
+    if isinstance(stt, deepgram.STT):
+        warmups.append(_warm_deepgram())
+
+    if isinstance(userdata["tts"], google_tts.TTS):
+        warmups.append(_warm_google_tts(userdata["tts"]))
+
+    warmups.append(_warm_livekit_api(room_name))
+
+    for result in await asyncio.gather(*warmups, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.warning("Provider warm-up failed: %s", result)
+
+    logger.info(
+        "Provider connections warm | latency_ms=%.0f",
+        (time.perf_counter() - started) * 1000,
     )
 
 
+async def _warm_deepgram():
+    # Same session the plugin streams through, so the connection is reused
+    async with http_context.http_session().head(DEEPGRAM_WARMUP_URL) as response:
+        await response.read()
+
+
+async def _warm_google_tts(tts: google_tts.TTS):
+    async with tts.synthesize(TTS_WARMUP_TEXT) as stream:
+        async for _ in stream:
+            pass
+
+
+async def _warm_livekit_api(room_name: str):
+    # Cheapest authenticated RoomService call; leaves the TLS connection in
+    # the shared client's pool for the hang-up
+    await get_livekit_api().room.list_rooms(api.ListRoomsRequest(names=[room_name]))
+
+
+def build_turn_handling() -> dict | None:
+    """
+    Turn handling for TURN_DETECTION and PREEMPTIVE_INTERIMS, or None for
+    livekit's default.
+
+    Built per job: the turn detector binds to the job's inference executor,
+    which does not exist yet in prewarm.
+    """
+
+    turn_handling = {}
+
+    if TURN_DETECTION == "vad":
+        turn_handling["turn_detection"] = "vad"
+
+    elif TURN_DETECTION == "multilingual":
+        turn_handling["turn_detection"] = MultilingualModel()
+        turn_handling["endpointing"] = {"min_delay": EOT_MIN_DELAY, "max_delay": EOT_MAX_DELAY}
+
+    if PREEMPTIVE_INTERIMS:
+        turn_handling["preemptive_generation"] = {
+            "enabled": True,
+            "max_retries": PREEMPTIVE_MAX_RETRIES,
+        }
+
+    return turn_handling or None
+
+
 # =====================================================
 # ENTRYPOINT
 # =====================================================
@@ -256,9 +772,41 @@ async def entrypoint(ctx: JobContext):
 
     conversation_id = generate_call_id()
     ctx.proc.userdata["conversation_id"] = conversation_id
-    watchdog_task = None
+    max_duration = None
     transcript: list[dict[str, str]] = []
 
+    # With streaming on, transcript items reach the backend during the call
+    # and the after-call payload only carries what was not acknowledged
+    streamer = TranscriptStreamer(conversation_id) if TRANSCRIPT_STREAMING else None
+
+    # On-disk copy of the transcript, replayed at the next worker start if
+    # this process dies before on_shutdown
+    journal = TranscriptJournal(conversation_id)
+    ctx.proc.userdata["transcript_journal"] = journal
+
+    # ── Backend warm-up ───────────────────────────────────────────────────────
+
+    # Runs while the caller is still being connected, so the booking request
+    # later in the call finds the backend awake and the TLS connection open
+    async def warm_backend():
+        warmup_s = await warm_automation_backend()
+        ctx.proc.userdata["backend_warmup_s"] = warmup_s
+
+        if warmup_s is not None:
+            worker_metrics.observe("salon_automation_warmup_seconds", warmup_s)
+
+    warmup_task = asyncio.create_task(warm_backend())
+
+    # Same for the STT, LLM and TTS clients built in prewarm
+    providers_task = asyncio.create_task(open_provider_connections(ctx.proc.userdata, ctx.room.name))
+
+    # ── Worker metrics ────────────────────────────────────────────────────────
+
+    metrics_tasks = [
+        asyncio.create_task(worker_metrics.run_metrics_flusher()),
+        asyncio.create_task(worker_metrics.monitor_event_loop_lag()),
+    ]
+
     # ── Connect ───────────────────────────────────────────────────────────────
 
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
@@ -266,27 +814,103 @@ async def entrypoint(ctx: JobContext):
 
     # ── Ghost call guard ──────────────────────────────────────────────────────
 
+    join_task = asyncio.ensure_future(ctx.wait_for_participant())
+    join_deadline = DEADLINES.schedule(
+        "participant_join",
+        PARTICIPANT_JOIN_SECONDS,
+        join_task.cancel,
+        owner=conversation_id,
+    )
+
     try:
-        participant = await ctx.wait_for_participant()
+        participant = await join_task
+    except asyncio.CancelledError:
+        if not join_deadline.expired:
+            raise
+        participant = None
+        logger.info(
+            "entrypoint: ghost call — caller did not join in %.0fs",
+            PARTICIPANT_JOIN_SECONDS,
+        )
     except RuntimeError as e:
-        if "room disconnected" in str(e).lower():
-            logger.info("entrypoint: ghost call — caller disconnected before joining")
-            try:
-                await call_automation("/salon_ibargo_after_call", {
-                    "conversation_id": conversation_id,
-                    "channel": "voice",
-                    "from_phone_number": None,
-                    "to_phone_number": None,
-                    "conversation_started_at": call_started_at.strftime("%Y-%m-%d %H:%M:%S"),
-                    "conversation_ended_at": datetime.now(tz=PST).strftime("%Y-%m-%d %H:%M:%S"),
-                    "call_sid": None,
-                    "transcript": [],
-                    "confirmed_visit": None,
-                })
-            except Exception:
-                logger.exception("entrypoint: ghost call after-call forwarding failed")
-            return
-        raise
+        if "room disconnected" not in str(e).lower():
+            raise
+        participant = None
+        logger.info("entrypoint: ghost call — caller disconnected before joining")
+    finally:
+        join_deadline.cancel()
+
+    if participant is None:
+        providers_task.cancel()
+
+        try:
+            await submit_after_call({
+                "conversation_id": conversation_id,
+                "channel": "voice",
+                "from_phone_number": None,
+                "to_phone_number": None,
+                "conversation_started_at": call_started_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "conversation_ended_at": datetime.now(tz=PST).strftime("%Y-%m-%d %H:%M:%S"),
+                "call_sid": None,
+                "transcript": [],
+                "confirmed_visit": None,
+            })
+        except Exception:
+            logger.exception("entrypoint: ghost call after-call forwarding failed")
+        finally:
+            # The provider warm-up may already have opened the LiveKit API
+            # session; wait for it to stop so it cannot open one afterwards
+            await asyncio.gather(providers_task, return_exceptions=True)
+            await close_livekit_api()
+
+        worker_metrics.inc("salon_calls_ghosted_total")
+        for task in metrics_tasks:
+            task.cancel()
+
+        if join_deadline.expired:
+            ctx.shutdown(reason="caller did not join")
+        return
+
+    # ── Admission control ─────────────────────────────────────────────────────
+
+    if admitted_busy(ctx):
+        logger.warning("entrypoint: worker saturated — playing busy message")
+
+        warmup_task.cancel()
+        providers_task.cancel()
+
+        try:
+            await answer_busy(ctx, participant.identity)
+        except Exception:
+            logger.exception("entrypoint: failed to play busy message")
+
+        attrs = participant.attributes or {}
+
+        try:
+            await submit_after_call({
+                "conversation_id": conversation_id,
+                "channel": "voice",
+                "from_phone_number": attrs.get("sip.phoneNumber"),
+                "to_phone_number": attrs.get("sip.trunkPhoneNumber"),
+                "conversation_started_at": call_started_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "conversation_ended_at": datetime.now(tz=PST).strftime("%Y-%m-%d %H:%M:%S"),
+                "call_sid": attrs.get("sip.twilio.callSid"),
+                "transcript": [{"role": "assistant", "content": BUSY_TEXT}],
+                "confirmed_visit": None,
+            })
+        except Exception:
+            logger.exception("entrypoint: busy call after-call forwarding failed")
+
+        for task in metrics_tasks:
+            task.cancel()
+
+        # Frees this process now instead of when the room empties; the
+        # worker is already over its load threshold
+        ctx.shutdown(reason="worker saturated")
+        return
+
+    worker_metrics.inc("salon_calls_started_total")
+    worker_metrics.set_gauge("salon_active_calls", 1)
 
     # ── Participant metadata ──────────────────────────────────────────────────
 
@@ -305,44 +929,58 @@ async def entrypoint(ctx: JobContext):
 
     logger.info("entrypoint: call metadata | from=%s | to=%s", caller_number, to_number)
 
+    # Warm the slot cache while the caller is still talking
+    get_availability_cache().prefetch(conversation_id)
+
     # ── Instructions ──────────────────────────────────────────────────────────
 
+    prompt_store = ctx.proc.userdata["prompt_store"]
+
     try:
-        with open(INSTRUCTIONS_PATH, "r", encoding="utf-8") as f:
-            raw_instructions = f.read()
+        await prompt_store.refresh()
     except OSError:
         logger.exception("entrypoint: failed to load instructions file")
         return
 
-    class SafeDict(dict):
-        def __missing__(self, key):
-            return "{" + key + "}"
-
-    instructions = raw_instructions.format_map(
-        SafeDict(current_time=get_current_time_spanish_pst())
+    # Opened once nothing can end the call before on_shutdown is registered,
+    # which closes it
+    await asyncio.to_thread(journal.open, {
+        "conversation_id": conversation_id,
+        "from_phone_number": caller_number,
+        "to_phone_number": to_number,
+        "conversation_started_at": call_started_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "call_sid": call_sid,
+    })
+
+    # Static prefix (identical across calls) + per-call facts in their own
+    # message right after it, so the provider's prompt cache keeps hitting
+    instructions = prompt_store.render()
+
+    initial_ctx = ChatContext.empty()
+    initial_ctx.add_message(
+        role="system",
+        content=render_call_context(
+            current_time=get_current_time_spanish_pst(),
+            caller_number=caller_number,
+        ),
     )
 
     # ── Session ───────────────────────────────────────────────────────────────
 
+    # Providers come from prewarm; the offline benchmark (bench/) puts
+    # local stand-ins in their place
+    reply_tts = build_sentence_cached_tts(
+        ctx.proc.userdata["tts"],
+        cache=ctx.proc.userdata["phrase_cache"],
+        sentences=REPLY_CACHE_SENTENCES,
+    )
+
     session = AgentSession(
-        stt=deepgram.STT(
-            model="nova-3",
-            language="es",
-            punctuate=True,
-            smart_format=True,
-            interim_results=True,
-        ),
-        llm=openai.LLM(
-            model="gpt-5.2",
-            api_key=os.environ.get("OPENAI_API_KEY"),
-        ),
-        tts=google_tts.TTS(
-            language="es-US",
-            voice_name="es-US-Chirp3-HD-Achernar",
-            model_name="chirp_3",
-            speaking_rate=1.1,
-        ),
+        stt=ctx.proc.userdata["stt"],
+        llm=ctx.proc.userdata["llm"],
+        tts=reply_tts,
         vad=ctx.proc.userdata["vad"],
+        turn_handling=build_turn_handling() or NOT_GIVEN,
         userdata=ctx.proc.userdata,
     )
 
@@ -365,15 +1003,86 @@ async def entrypoint(ctx: JobContext):
             return
 
         transcript.append({"role": role, "content": text})
+        journal.append(transcript[-1])
+        if streamer is not None:
+            streamer.append(transcript[-1])
         logger.info("SPEECH | role=%s | text=%s", role, text)
 
     session.on("conversation_item_added", on_conversation_item)
 
+    # ── LLM prompt cache usage ────────────────────────────────────────────────
+
+    llm_usage = {
+        "requests": 0,
+        "prompt_tokens": 0,
+        "cached_prompt_tokens": 0,
+    }
+
+    def on_metrics_collected(ev):
+        if isinstance(ev.metrics, metrics.VADMetrics):
+            worker_metrics.record_vad_load(
+                ev.metrics.inference_duration_total,
+                ev.metrics.inference_count,
+            )
+            return
+
+        if not isinstance(ev.metrics, metrics.LLMMetrics):
+            return
+
+        llm_usage["requests"] += 1
+        llm_usage["prompt_tokens"] += ev.metrics.prompt_tokens
+        llm_usage["cached_prompt_tokens"] += ev.metrics.prompt_cached_tokens
+
+    session.on("metrics_collected", on_metrics_collected)
+
+    # ── Turn latency ──────────────────────────────────────────────────────────
+
+    latency_tracker = TurnLatencyTracker()
+    latency_tracker.attach(session)
+    add_automation_listener(latency_tracker.record_automation)
+
+    if isinstance(session.stt, PreflightSTT):
+        session.stt.on("preflight_resolved", latency_tracker.record_preflight)
+
+    # ── Machine screening ─────────────────────────────────────────────────────
+
+    # Voicemail, IVR menus, robocalls and fax machines are hung up on within
+    # seconds instead of holding the pipeline until the max-duration deadline
+    screener = CallScreener(
+        conversation_id,
+        on_machine=lambda screening: hang_up_machine(session, screening),
+    )
+    screener.attach(session)
+
+    # ── Idle caller ───────────────────────────────────────────────────────────
+
+    # Frees the worker slot and the trunk when the line goes silent, well
+    # before the max-duration deadline would
+    idle_monitor = IdleCallMonitor(
+        conversation_id,
+        prompt=lambda: say_phrase(session, IDLE_PROMPT_TEXT, allow_interruptions=True),
+        end_call=lambda: end_idle_call(session, max_duration),
+    )
+    idle_monitor.attach(session)
+
     # ── Shutdown callback ─────────────────────────────────────────────────────
 
     async def on_shutdown(reason: str):
-        if watchdog_task:
-            watchdog_task.cancel()
+        idle_monitor.close()
+        screener.close()
+
+        if max_duration is not None and not max_duration.expired and max_duration.cancel():
+            logger.info("Call duration watchdog cancelled (call ended normally)")
+
+        DEADLINES.cancel_owner(conversation_id)
+
+        if not warmup_task.done():
+            warmup_task.cancel()
+
+        if not providers_task.done():
+            providers_task.cancel()
+
+        transcript_offset = await streamer.close() if streamer is not None else 0
 
         payload = {
             "conversation_id": conversation_id,
@@ -383,80 +1092,167 @@ async def entrypoint(ctx: JobContext):
             "conversation_started_at": call_started_at.strftime("%Y-%m-%d %H:%M:%S"),
             "conversation_ended_at": datetime.now(tz=PST).strftime("%Y-%m-%d %H:%M:%S"),
             "call_sid": ctx.proc.userdata.get("call_sid"),
-            "transcript": transcript,
+            "transcript": transcript[transcript_offset:],
             "confirmed_visit": ctx.proc.userdata.get("confirmed_visit"),
+            "pending_visit_request": ctx.proc.userdata.get("pending_visit_request"),
+            "latency": latency_tracker.summary(),
+            # Next to latency.automation, to compare the booking with and
+            # without a warm backend
+            "backend_warmup_s": ctx.proc.userdata.get("backend_warmup_s"),
+            "caller_classification": screener.result.to_payload() if screener.result else None,
         }
 
+        if streamer is not None:
+            # The backend already holds items [0, offset) of the transcript
+            payload["transcript_offset"] = transcript_offset
+
+        remove_automation_listener(latency_tracker.record_automation)
+
+        if isinstance(session.stt, PreflightSTT):
+            session.stt.off("preflight_resolved", latency_tracker.record_preflight)
+
         logger.info("on_shutdown: payload: %s", payload)
+        logger.info(
+            "on_shutdown: LLM input tokens | requests=%s | cached=%s | uncached=%s",
+            llm_usage["requests"],
+            llm_usage["cached_prompt_tokens"],
+            llm_usage["prompt_tokens"] - llm_usage["cached_prompt_tokens"],
+        )
+        logger.info("on_shutdown: cached reply sentences: %s", reply_tts.stats())
+
+        # The journal stays on disk unless the payload reached the outbox
+        queued = False
 
         try:
-            await call_automation("/salon_ibargo_after_call", payload)
-            logger.info("on_shutdown: after-call forwarded successfully")
+            if await submit_after_call(payload):
+                logger.info("on_shutdown: after-call forwarded successfully")
+            else:
+                logger.warning("on_shutdown: after-call queued in outbox for retry")
+            queued = True
         except Exception:
             logger.exception("on_shutdown: after-call forwarding failed")
 
+        await journal.close(remove=queued)
+
+        # Shutdown callbacks run concurrently, so the shared client is closed
+        # here, after every hang-up path is done with it
+        await close_livekit_api()
+
+        worker_metrics.inc("salon_calls_completed_total")
+        worker_metrics.set_gauge("salon_active_calls", 0)
+
+        # The flusher writes a final snapshot when cancelled
+        for task in metrics_tasks:
+            task.cancel()
+
     ctx.add_shutdown_callback(on_shutdown)
 
     # ── Start agent ─────────
 
-    agent = Assistant(instructions=instructions)
-    await session.start(agent=agent, room=ctx.room)
-    watchdog_task = asyncio.create_task(enforce_max_call_duration(session))
+    agent = Assistant(instructions=instructions, chat_ctx=initial_ctx)
+
+    # bench/ plays the caller through local audio I/O instead of the room
+    local_io = ctx.proc.userdata.get("local_audio_io")
+
+    if local_io is not None:
+        local_io.attach(session)
+        await session.start(agent=agent)
+    else:
+        await session.start(agent=agent, room=ctx.room)
+        screener.watch_audio(participant)
+
+    max_duration = DEADLINES.schedule(
+        "max_call_duration",
+        MAX_CALL_SECONDS,
+        lambda: end_call_at_max_duration(session),
+        owner=conversation_id,
+    )
 
-    await session.say(
-        "Hola, soy Mía de Salón Ibargo. ¿En qué puedo ayudarte?",
+    await say_phrase(
+        session,
+        GREETING_TEXT,
         allow_interruptions=True,
     )
 
-async def enforce_max_call_duration(session: AgentSession):
+async def end_call_at_max_duration(session: AgentSession):
+    """Runs when the call's max_call_duration deadline expires."""
 
-    MAX_CALL_SECONDS = int(os.getenv("MAX_CALL_SECONDS", 600))
+    logger.info("Max call duration reached. Ending call.")
 
     try:
-        await asyncio.sleep(MAX_CALL_SECONDS)
+        removed = await say_and_hang_up(session, MAX_DURATION_TEXT)
+    except Exception:
+        logger.info("Call already ended before watchdog enforcement")
+        return
 
-        logger.info("Max call duration reached. Ending call.")
+    if removed:
+        worker_metrics.inc("salon_watchdog_hangups_total")
+        logger.info("Participant removed due to max duration")
 
-        try:
-            await session.say(
-                "La llamada ha alcanzado el tiempo máximo permitido. "
-                "Gracias por comunicarte con Salon Ibargo. Que tengas excelente día.",
-                allow_interruptions=False,
-            )
-        except Exception:
-            logger.info("Call already ended before watchdog enforcement")
-            return
 
-        room_name = session.userdata.get("room_name")
-        identity = session.userdata.get("participant_identity")
+async def hang_up_machine(session: AgentSession, screening: Screening):
+    """Drops a call screened as a machine, without a goodbye."""
 
-        lkapi = api.LiveKitAPI()
+    try:
+        session.interrupt()
+    except RuntimeError:
+        pass
 
-        try:
-            await lkapi.room.remove_participant(
-                api.RoomParticipantIdentity(
-                    room=room_name,
-                    identity=identity,
-                )
-            )
+    try:
+        removed = await hang_up(session)
+    except Exception:
+        logger.exception("Failed to hang up machine call")
+        return
 
-            logger.info("Participant removed due to max duration")
+    if removed:
+        worker_metrics.inc("salon_machine_hangups_total", reason=screening.reason)
+        logger.info("Participant removed as a machine | reason=%s", screening.reason)
 
-        finally:
-            await lkapi.aclose()
 
-    except asyncio.CancelledError:
-        logger.info("Call duration watchdog cancelled (call ended normally)")
+async def end_idle_call(session: AgentSession, max_duration: Deadline | None):
+    """Ends a call whose caller stayed silent after the idle prompt."""
+
+    # Call time the max-duration deadline would otherwise have held
+    reclaimed = max_duration.remaining if max_duration is not None else 0.0
+
+    try:
+        removed = await say_and_hang_up(session, CLOSING_TEXT)
+    except Exception:
+        logger.info("Call already ended before idle hang-up")
+        return
+
+    if removed:
+        worker_metrics.inc("salon_idle_hangups_total")
+        worker_metrics.inc("salon_idle_reclaimed_seconds_total", reclaimed)
+        logger.info("Participant removed after idle prompt | reclaimed_s=%.0f", reclaimed)
+
 
 # =====================================================
 # MAIN
 # =====================================================
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["download-files"]:
+        # Build step: bakes the phrase audio into .tts_cache so prewarm only
+        # reads it after a deploy; the plugins' models are fetched below
+        asyncio.run(_fill_phrase_cache(build_phrase_cache()))
+    else:
+        # Delivers after-call payloads that job processes could not send,
+        # including ones left over from before a restart, and those of
+        # calls whose job process died mid-call (from their journals)
+        start_drainer_thread(recover=recover_orphaned_journals)
+
+        # Aggregates the snapshots written by every job process
+        worker_metrics.start_metrics_server()
+
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             agent_name="inbound_agent",
             prewarm_fnc=prewarm,
+            # Saturation is judged on calls, CPU, event-loop lag and VAD load
+            load_fnc=WORKER_LOAD.load_fnc,
+            load_threshold=LOAD_THRESHOLD,
+            request_fnc=WORKER_LOAD.request_fnc,
         )
     )
@@ -0,0 +1,390 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import sqlite3
+import threading
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+
+import worker_metrics
+from utils import call_automation
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("after_call_outbox")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+AFTER_CALL_ENDPOINT = "/salon_ibargo_after_call"
+
+OUTBOX_PATH = Path(
+    os.getenv(
+        "AFTER_CALL_OUTBOX_PATH",
+        Path(__file__).resolve().parent / ".outbox" / "after_call.sqlite3",
+    )
+)
+
+# Time the job may spend on the first delivery attempt during shutdown
+OUTBOX_SHUTDOWN_TIMEOUT = float(os.getenv("AFTER_CALL_SHUTDOWN_TIMEOUT", 10))
+
+OUTBOX_POLL_SECONDS = 5
+OUTBOX_BACKOFF_BASE = 5
+OUTBOX_BACKOFF_CAP = 15 * 60
+
+# A claimed entry is invisible to other deliverers for this long
+OUTBOX_LEASE_SECONDS = 90
+
+# Delivered rows are kept this long so late duplicates are still ignored
+OUTBOX_RETENTION_SECONDS = 7 * 24 * 3600
+
+
+# =====================================================
+# OUTBOX STORE
+# =====================================================
+
+class AfterCallOutbox:
+    """
+    Durable queue of after-call payloads backed by SQLite.
+
+    One row per conversation_id: re-submitting a conversation replaces its
+    pending payload, and a conversation that was already delivered is never
+    sent again. The file is shared by the worker and every job process, so
+    entries are claimed with a short lease before delivery.
+
+    All methods are blocking; call them through ``asyncio.to_thread`` from
+    the event loop.
+    """
+
+    def __init__(self, path: Path = OUTBOX_PATH):
+        self.path = path
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        conn = self._open()
+
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _open(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS after_call (
+                    conversation_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    delivered_at REAL,
+                    last_error TEXT
+                )
+                """
+            )
+            self._initialized = True
+
+        return conn
+
+    def put(self, payload: dict):
+        """
+        Stores a payload for delivery (no-op if already delivered).
+        """
+
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO after_call (conversation_id, payload, next_attempt_at, created_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(conversation_id) DO UPDATE SET
+                    payload = excluded.payload,
+                    next_attempt_at = excluded.next_attempt_at
+                WHERE delivered_at IS NULL
+                """,
+                (
+                    payload["conversation_id"],
+                    json.dumps(payload, ensure_ascii=False, default=str),
+                    now,
+                    now,
+                ),
+            )
+
+    def claim(
+        self,
+        conversation_id: str | None = None,
+        limit: int = 10,
+    ) -> list[tuple[str, dict, int]]:
+        """
+        Leases due entries (or one specific entry) for delivery.
+
+        Returns
+        -------
+        list[tuple[str, dict, int]]
+            (conversation_id, payload, attempts) for each claimed entry
+        """
+
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+
+            if conversation_id is not None:
+                rows = conn.execute(
+                    """
+                    SELECT conversation_id, payload, attempts FROM after_call
+                    WHERE conversation_id = ? AND delivered_at IS NULL
+                      AND next_attempt_at <= ?
+                    """,
+                    (conversation_id, now),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    """
+                    SELECT conversation_id, payload, attempts FROM after_call
+                    WHERE delivered_at IS NULL AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at
+                    LIMIT ?
+                    """,
+                    (now, limit),
+                ).fetchall()
+
+            conn.executemany(
+                "UPDATE after_call SET next_attempt_at = ? WHERE conversation_id = ?",
+                [(now + OUTBOX_LEASE_SECONDS, row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+
+        return [(cid, json.loads(payload), attempts) for cid, payload, attempts in rows]
+
+    def mark_delivered(self, conversation_id: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE after_call SET delivered_at = ?, last_error = NULL "
+                "WHERE conversation_id = ?",
+                (time.time(), conversation_id),
+            )
+
+    def mark_failed(self, conversation_id: str, attempts: int, error: str):
+        """
+        Schedules the next attempt with exponential backoff and jitter.
+        """
+
+        delay = min(OUTBOX_BACKOFF_CAP, OUTBOX_BACKOFF_BASE * 2 ** attempts)
+        delay *= random.uniform(0.5, 1.0)
+
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE after_call SET attempts = ?, next_attempt_at = ?, last_error = ? "
+                "WHERE conversation_id = ?",
+                (attempts + 1, time.time() + delay, error[:500], conversation_id),
+            )
+
+    def pending_count(self) -> int:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM after_call WHERE delivered_at IS NULL"
+            ).fetchone()
+
+        return row[0]
+
+    def prune(self):
+        """Removes delivered rows older than the retention window."""
+
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM after_call WHERE delivered_at IS NOT NULL AND delivered_at < ?",
+                (time.time() - OUTBOX_RETENTION_SECONDS,),
+            )
+
+
+# =====================================================
+# DELIVERY
+# =====================================================
+
+async def _deliver_claimed(
+    outbox: AfterCallOutbox,
+    conversation_id: str,
+    payload: dict,
+    attempts: int,
+) -> bool:
+    try:
+        await call_automation(AFTER_CALL_ENDPOINT, payload)
+    except Exception as e:
+        worker_metrics.inc("salon_after_call_delivery_failures_total")
+        logger.warning(
+            "After-call delivery failed | conversation_id=%s | attempt=%s | error=%s",
+            conversation_id,
+            attempts + 1,
+            e,
+        )
+        await asyncio.to_thread(outbox.mark_failed, conversation_id, attempts, repr(e))
+        return False
+
+    await asyncio.to_thread(outbox.mark_delivered, conversation_id)
+
+    logger.info(
+        "After-call delivered | conversation_id=%s | attempt=%s",
+        conversation_id,
+        attempts + 1,
+    )
+    return True
+
+
+async def submit_after_call(
+    payload: dict,
+    *,
+    outbox: AfterCallOutbox | None = None,
+    timeout: float = OUTBOX_SHUTDOWN_TIMEOUT,
+) -> bool:
+    """
+    Persists an after-call payload, then tries to deliver it once.
+
+    The payload is on disk before any network I/O, so a failed or timed out
+    attempt is retried later by the drainer instead of being lost.
+
+    Returns
+    -------
+    bool
+        True if the payload was delivered during this call
+    """
+
+    outbox = outbox or get_outbox()
+
+    await asyncio.to_thread(outbox.put, payload)
+
+    conversation_id = payload["conversation_id"]
+
+    try:
+        claimed = await asyncio.to_thread(outbox.claim, conversation_id)
+
+        if not claimed:
+            return False
+
+        _, claimed_payload, attempts = claimed[0]
+
+        return await asyncio.wait_for(
+            _deliver_claimed(outbox, conversation_id, claimed_payload, attempts),
+            timeout=timeout,
+        )
+
+    except asyncio.TimeoutError:
+        # Lease expires and the drainer picks it up
+        logger.warning(
+            "After-call delivery timed out after %ss; left in outbox | conversation_id=%s",
+            timeout,
+            conversation_id,
+        )
+        return False
+
+
+async def drain_once(outbox: AfterCallOutbox) -> int:
+    """
+    Delivers every due entry once. Returns how many were delivered.
+    """
+
+    claimed = await asyncio.to_thread(outbox.claim)
+    delivered = 0
+
+    for conversation_id, payload, attempts in claimed:
+        if await _deliver_claimed(outbox, conversation_id, payload, attempts):
+            delivered += 1
+
+    return delivered
+
+
+async def drain_forever(
+    outbox: AfterCallOutbox,
+    interval: float = OUTBOX_POLL_SECONDS,
+    *,
+    recover: Callable[[], int] | None = None,
+):
+    """
+    Background drainer loop. Pending entries left by a previous run are
+    replayed on the first iteration.
+
+    ``recover`` runs (in a thread) before every iteration to queue payloads
+    that only exist elsewhere, e.g. the journals of job processes that died
+    mid-call; what it queues goes out in the same iteration.
+    """
+
+    pending = await asyncio.to_thread(outbox.pending_count)
+    if pending:
+        logger.info("Replaying %s pending after-call payloads", pending)
+
+    last_prune = 0.0
+
+    while True:
+        try:
+            if recover is not None:
+                await asyncio.to_thread(recover)
+
+            await drain_once(outbox)
+
+            if time.monotonic() - last_prune > 3600:
+                await asyncio.to_thread(outbox.prune)
+                last_prune = time.monotonic()
+
+        except Exception:
+            logger.exception("After-call drainer iteration failed")
+
+        await asyncio.sleep(interval)
+
+
+def start_drainer_thread(
+    outbox: AfterCallOutbox | None = None,
+    *,
+    recover: Callable[[], int] | None = None,
+) -> threading.Thread:
+    """
+    Runs the drainer on its own event loop in a daemon thread.
+
+    Meant for the long-lived worker process, which does not expose its event
+    loop before ``cli.run_app`` takes over. See ``drain_forever`` for
+    ``recover``.
+    """
+
+    outbox = outbox or get_outbox()
+
+    thread = threading.Thread(
+        target=lambda: asyncio.run(drain_forever(outbox, recover=recover)),
+        name="after-call-outbox",
+        daemon=True,
+    )
+    thread.start()
+
+    return thread
+
+
+# =====================================================
+# PROCESS-WIDE INSTANCE
+# =====================================================
+
+_outbox: AfterCallOutbox | None = None
+
+
+def get_outbox() -> AfterCallOutbox:
+    global _outbox
+
+    if _outbox is None:
+        _outbox = AfterCallOutbox()
+
+    return _outbox
@@ -0,0 +1,162 @@
+import os
+import asyncio
+import hashlib
+import logging
+import string
+
+from pathlib import Path
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("prompt_store")
+
+
+# =====================================================
+# PROMPT TEMPLATE STORE
+# =====================================================
+
+class PromptTemplateStore:
+    """
+    Process-level cache of the instructions template.
+
+    The file is read and split into literal / placeholder segments once.
+    Later calls only stat the file (off the event loop) and re-parse it when
+    its mtime changed and its content hash is different, so prompt edits are
+    picked up without restarting the worker.
+
+    Placeholders without a value are left untouched as ``{name}``, matching
+    the previous ``format_map(SafeDict(...))`` behaviour.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+        self._mtime_ns: int | None = None
+        self._sha256: str | None = None
+        self._segments: list[tuple[str, str | None]] = []
+
+    # ── Loading ───────────────────────────────────────────────────────────────
+
+    @property
+    def loaded(self) -> bool:
+        return self._sha256 is not None
+
+    @property
+    def version(self) -> str | None:
+        """Short content hash of the template currently in use."""
+        return self._sha256[:12] if self._sha256 else None
+
+    def load(self):
+        """
+        Reads and compiles the template unconditionally (blocking).
+
+        Raises
+        ------
+        OSError
+            If the file cannot be read
+        """
+
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        raw = self.path.read_text(encoding="utf-8")
+
+        self._compile(raw)
+        self._mtime_ns = mtime_ns
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-reads the template if the file changed since the last load
+        (blocking). Returns True when a new version was compiled.
+        """
+
+        mtime_ns = os.stat(self.path).st_mtime_ns
+
+        if mtime_ns == self._mtime_ns:
+            return False
+
+        raw = self.path.read_text(encoding="utf-8")
+        self._mtime_ns = mtime_ns
+
+        if hashlib.sha256(raw.encode("utf-8")).hexdigest() == self._sha256:
+            return False
+
+        self._compile(raw)
+        logger.info("Instructions template reloaded (version=%s)", self.version)
+        return True
+
+    async def refresh(self):
+        """
+        Hot-reload check that never blocks the event loop.
+
+        Keeps serving the last good template if the file became unreadable.
+        """
+
+        try:
+            if not self.loaded:
+                await asyncio.to_thread(self.load)
+            else:
+                await asyncio.to_thread(self.reload_if_changed)
+        except OSError:
+            if not self.loaded:
+                raise
+            logger.exception("Failed to reload instructions; keeping version %s", self.version)
+
+    def _compile(self, raw: str):
+        segments: list[tuple[str, str | None]] = []
+
+        for literal, field_name, _, _ in string.Formatter().parse(raw):
+            segments.append((literal, field_name))
+
+        self._segments = segments
+        self._sha256 = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ── Rendering ─────────────────────────────────────────────────────────────
+
+    def render(self, **values: str) -> str:
+        """
+        Substitutes placeholders in the compiled template.
+
+        Example:
+            store.render(current_time=get_current_time_spanish_pst())
+        """
+
+        parts: list[str] = []
+
+        for literal, field_name in self._segments:
+            parts.append(literal)
+
+            if field_name is None:
+                continue
+
+            if field_name in values:
+                parts.append(str(values[field_name]))
+            else:
+                parts.append("{" + field_name + "}")
+
+        return "".join(parts)
+
+
+# =====================================================
+# PER-CALL CONTEXT
+# =====================================================
+
+def render_call_context(
+    *,
+    current_time: str,
+    caller_number: str | None,
+) -> str:
+    """
+    Builds the per-call context message sent after the static instructions.
+
+    Keeping these facts out of the instructions leaves the system prompt
+    byte-identical across calls, so the provider's prompt cache can reuse it.
+    """
+
+    lines = [
+        "CONTEXTO DE LA LLAMADA",
+        f"Fecha y hora actual: {current_time}",
+        f"Número del cliente: {caller_number or 'no disponible'}",
+    ]
+
+    return "\n".join(lines)
@@ -0,0 +1,328 @@
+import re
+import logging
+import unicodedata
+
+from dataclasses import dataclass
+from datetime import date, datetime, time
+
+from utils import PST
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("visit_schedule")
+
+
+# =====================================================
+# VISIT SCHEDULE CONFIG
+# =====================================================
+
+@dataclass(frozen=True)
+class VisitWindow:
+    """
+    Bookable window for one weekday.
+
+    ``end`` is the closing time and is exclusive: nothing is booked at it.
+    """
+    start: time
+    end: time
+
+
+# Keys follow datetime.weekday(): 0 = lunes ... 6 = domingo.
+# None means no visits are booked that day.
+VISIT_SCHEDULE: dict[int, VisitWindow | None] = {
+    0: VisitWindow(time(10, 0), time(16, 0)),
+    1: VisitWindow(time(10, 0), time(16, 0)),
+    2: VisitWindow(time(10, 0), time(16, 0)),
+    3: VisitWindow(time(10, 0), time(16, 0)),
+    4: VisitWindow(time(10, 0), time(16, 0)),
+    5: VisitWindow(time(10, 0), time(12, 0)),
+    6: None,
+}
+
+
+# =====================================================
+# SPANISH FORMATTING
+# =====================================================
+
+_HOUR_WORDS = [
+    "doce", "una", "dos", "tres", "cuatro", "cinco",
+    "seis", "siete", "ocho", "nueve", "diez", "once",
+]
+
+
+def hour_in_words(t: time) -> str:
+    """
+    Formats a time the way the script speaks it.
+
+    Example:
+        time(16, 0) -> "cuatro de la tarde"
+        time(12, 0) -> "doce del día"
+    """
+
+    hour_12 = t.hour % 12
+    words = _HOUR_WORDS[hour_12]
+
+    if t.minute == 30:
+        words += " y media"
+    elif t.minute == 15:
+        words += " y cuarto"
+    elif t.minute:
+        words += f" {t.minute:02d}"
+
+    if t.hour == 12 and t.minute == 0:
+        return f"{words} del día"
+    if t.hour < 12:
+        return f"{words} de la mañana"
+    if t.hour < 19:
+        return f"{words} de la tarde"
+    return f"{words} de la noche"
+
+
+def _window_phrase(window: VisitWindow) -> str:
+    return f"de {hour_in_words(window.start)} a {hour_in_words(window.end)}"
+
+
+def schedule_explanation(schedule: dict[int, VisitWindow | None] = VISIT_SCHEDULE) -> str:
+    """
+    Spoken summary of the bookable hours, built from the config.
+    """
+
+    weekday = schedule.get(0)
+    saturday = schedule.get(5)
+
+    parts = []
+
+    if weekday:
+        parts.append(f"Entre semana podemos agendar {_window_phrase(weekday)}.")
+    if saturday:
+        parts.append(f"Los sábados podemos agendar visitas {_window_phrase(saturday)}.")
+
+    return " ".join(parts)
+
+
+# =====================================================
+# PARSING
+# =====================================================
+
+_MONTHS = {
+    "enero": 1,
+    "febrero": 2,
+    "marzo": 3,
+    "abril": 4,
+    "mayo": 5,
+    "junio": 6,
+    "julio": 7,
+    "agosto": 8,
+    "septiembre": 9,
+    "setiembre": 9,
+    "octubre": 10,
+    "noviembre": 11,
+    "diciembre": 12,
+}
+
+_NUMBER_WORDS = {
+    "una": 1, "uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5,
+    "seis": 6, "siete": 7, "ocho": 8, "nueve": 9, "diez": 10,
+    "once": 11, "doce": 12,
+}
+
+
+# Days of the month as the script reads them back ("seis de marzo")
+_DAY_WORDS = {
+    "primero": 1, "uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5,
+    "seis": 6, "siete": 7, "ocho": 8, "nueve": 9, "diez": 10,
+    "once": 11, "doce": 12, "trece": 13, "catorce": 14, "quince": 15,
+    "dieciseis": 16, "diecisiete": 17, "dieciocho": 18, "diecinueve": 19,
+    "veinte": 20, "veintiuno": 21, "veintidos": 22, "veintitres": 23,
+    "veinticuatro": 24, "veinticinco": 25, "veintiseis": 26,
+    "veintisiete": 27, "veintiocho": 28, "veintinueve": 29,
+    "treinta": 30, "treinta y uno": 31,
+}
+
+# Longest first, so "treinta y uno" wins over "treinta"
+_DAY_PATTERN = "|".join(sorted(_DAY_WORDS, key=len, reverse=True))
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def parse_visit_date(value: str, today: date) -> date | None:
+    """
+    Parses the date given to the booking tool.
+
+    Accepts ISO (2026-03-06), day-first numeric (06/03/2026) and spoken
+    Spanish with the day in digits or words ("viernes 6 de marzo",
+    "seis de marzo", "6 de marzo de 2026"). Without a year,
+    the next occurrence on or after ``today`` is used.
+
+    Returns None if the format is not recognised.
+    """
+
+    text = _fold(value)
+
+    try:
+        m = re.fullmatch(r"(\d{4})-(\d{1,2})-(\d{1,2})", text)
+        if m:
+            return date(int(m[1]), int(m[2]), int(m[3]))
+
+        m = re.fullmatch(r"(\d{1,2})[/-](\d{1,2})[/-](\d{4})", text)
+        if m:
+            return date(int(m[3]), int(m[2]), int(m[1]))
+
+        m = re.search(
+            rf"\b(\d{{1,2}}|{_DAY_PATTERN}) de ([a-z]+)(?: (?:de )?(\d{{4}}))?",
+            text,
+        )
+        if m and m[2] in _MONTHS:
+            day = int(m[1]) if m[1].isdigit() else _DAY_WORDS[m[1]]
+            month = _MONTHS[m[2]]
+
+            if m[3]:
+                return date(int(m[3]), month, day)
+
+            candidate = date(today.year, month, day)
+            if candidate < today:
+                candidate = date(today.year + 1, month, day)
+            return candidate
+
+    except ValueError:
+        return None
+
+    return None
+
+
+def parse_visit_time(value: str) -> time | None:
+    """
+    Parses the time given to the booking tool.
+
+    Accepts zero-padded 24-hour ("16:00", "09:30", "11:00"), 12-hour
+    ("4 pm", "4:30 p.m.", "10:00 a. m.") and spoken Spanish ("cuatro de
+    la tarde", "diez y media de la mañana"). Spoken clock times from 1 to
+    12 without am/pm or a period ("4", "3:30", "a las 10") could be
+    morning or afternoon and are left to the backend.
+
+    Returns None if the format is not recognised or is ambiguous.
+    """
+
+    text = _fold(value).replace(".", "")
+
+    # "a. m." folds to "a m"
+    text = re.sub(r"\b([ap]) m\b", r"\1m", text)
+
+    m = re.fullmatch(r"(?:a las )?(\d{1,2})(?::(\d{2}))?(?: ?(am|pm|hrs|h))?", text)
+    if m:
+        hour, minute, suffix = int(m[1]), int(m[2] or 0), m[3]
+
+        if suffix == "pm" and hour < 12:
+            hour += 12
+        elif suffix == "am" and hour == 12:
+            hour = 0
+        elif suffix is None and 1 <= hour <= 12 and not re.fullmatch(r"\d{2}:\d{2}", text):
+            # "4" or "3:30" could be morning or afternoon; "10:00" and
+            # "04:30" are how the model and the backend write 24-hour times
+            return None
+
+        if hour > 23 or minute > 59:
+            return None
+
+        return time(hour, minute)
+
+    m = re.fullmatch(
+        r"(?:a las )?([a-z]+|\d{1,2})(?::(\d{2}))?( y media| y cuarto)?"
+        r" (de la manana|de la tarde|de la noche|de la madrugada|del dia|del mediodia)",
+        text,
+    )
+    if m:
+        hour = _NUMBER_WORDS.get(m[1]) or (int(m[1]) if m[1].isdigit() else None)
+        if hour is None or hour > 12:
+            return None
+
+        minute = int(m[2] or 0)
+        if m[3] == " y media":
+            minute = 30
+        elif m[3] == " y cuarto":
+            minute = 15
+
+        period = m[4]
+        if period in ("de la tarde", "de la noche") and hour < 12:
+            hour += 12
+        elif period in ("de la manana", "de la noche", "de la madrugada") and hour == 12:
+            # "doce de la noche" is midnight; noon is "doce del día"
+            hour = 0
+
+        return time(hour, minute)
+
+    return None
+
+
+# =====================================================
+# VALIDATION
+# =====================================================
+
+def check_visit_slot(
+    visit_date: str,
+    visit_time: str,
+    *,
+    now: datetime | None = None,
+    schedule: dict[int, VisitWindow | None] = VISIT_SCHEDULE,
+) -> str | None:
+    """
+    Validates a requested visit against the schedule without any I/O.
+
+    Parameters
+    ----------
+    visit_date : str
+        Date as passed to agendar_cita_disponibilidad
+
+    visit_time : str
+        Time as passed to agendar_cita_disponibilidad
+
+    Returns
+    -------
+    str | None
+        Spanish explanation to read to the caller if the slot can never be
+        booked, or None if it may be bookable (including when the values
+        could not be parsed — the backend stays the source of truth).
+    """
+
+    now = now or datetime.now(tz=PST)
+
+    day = parse_visit_date(visit_date, now.date())
+    at = parse_visit_time(visit_time)
+
+    if day is None or at is None:
+        logger.info(
+            "Could not parse slot locally (date=%r, time=%r); deferring to backend",
+            visit_date,
+            visit_time,
+        )
+        return None
+
+    window = schedule.get(day.weekday())
+
+    if window is None:
+        return (
+            "Ese día no agendamos visitas. "
+            f"{schedule_explanation(schedule)} ¿Qué otro día te acomoda?"
+        )
+
+    if datetime.combine(day, at, tzinfo=PST) <= now:
+        return "Esa fecha y hora ya pasaron. ¿Qué otro día y hora te acomodan?"
+
+    if not (window.start <= at < window.end):
+        if day.weekday() == 5:
+            hours = f"Los sábados podemos agendar visitas {_window_phrase(window)}."
+        else:
+            hours = f"Entre semana podemos agendar {_window_phrase(window)}."
+
+        return (
+            "Ese horario ya queda fuera del horario de visitas. "
+            f"{hours} ¿Qué otra hora te acomoda?"
+        )
+
+    return None
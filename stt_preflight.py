@@ -0,0 +1,233 @@
+import os
+import time
+import asyncio
+import logging
+
+from dataclasses import dataclass
+
+from livekit.agents import NOT_GIVEN
+from livekit.agents import stt as lk_stt
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("stt_preflight")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+# An interim counts as stable once the provider repeats it, or sends
+# nothing newer for this long
+PREFLIGHT_QUIET_SECONDS = float(os.getenv("PREFLIGHT_QUIET_SECONDS", 0.15))
+
+# The wrapped stream retries on its own; retrying here would open a second
+# provider connection
+_NO_RETRY_CONNECT_OPTIONS = APIConnectOptions(
+    max_retry=0,
+    timeout=DEFAULT_API_CONNECT_OPTIONS.timeout,
+)
+
+
+# =====================================================
+# OUTCOME
+# =====================================================
+
+@dataclass(frozen=True)
+class PreflightOutcome:
+    """
+    How a preflight transcript compared to the final transcript that
+    replaced it, emitted on PreflightSTT as "preflight_resolved".
+
+    ``hit`` follows livekit's own rule: the speculative reply is kept only
+    when the final text is identical to the preflight text. ``lead`` is how
+    long before the final transcript the speculative reply started.
+    """
+
+    hit: bool
+    lead: float
+    preflight: str
+    final: str
+
+
+# =====================================================
+# PREFLIGHT STT WRAPPER
+# =====================================================
+
+class PreflightSTT(lk_stt.STT):
+    """
+    Streaming STT that turns stable interim transcripts into
+    PREFLIGHT_TRANSCRIPT events.
+
+    AgentSession starts a preemptive LLM reply on every preflight
+    transcript and keeps it when the turn ends on the same text, so a
+    stable interim gets the reply going before the provider finalizes.
+    When the final transcript differs, the session cancels the speculative
+    reply and starts over from the final text.
+    """
+
+    def __init__(self, wrapped: lk_stt.STT):
+        super().__init__(capabilities=wrapped.capabilities)
+
+        self._wrapped = wrapped
+        self._wrapped.on("metrics_collected", self._on_metrics_collected)
+
+    @property
+    def wrapped_stt(self) -> lk_stt.STT:
+        return self._wrapped
+
+    @property
+    def model(self) -> str:
+        return self._wrapped.model
+
+    @property
+    def provider(self) -> str:
+        return self._wrapped.provider
+
+    def prewarm(self):
+        self._wrapped.prewarm()
+
+    async def _recognize_impl(self, buffer, *, language=NOT_GIVEN, conn_options) -> lk_stt.SpeechEvent:
+        return await self._wrapped.recognize(
+            buffer=buffer,
+            language=language,
+            conn_options=conn_options,
+        )
+
+    def stream(
+        self,
+        *,
+        language=NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> "_PreflightStream":
+        return _PreflightStream(
+            self,
+            wrapped=self._wrapped.stream(language=language, conn_options=conn_options),
+        )
+
+    def _on_metrics_collected(self, *args, **kwargs):
+        self.emit("metrics_collected", *args, **kwargs)
+
+    async def aclose(self):
+        self._wrapped.off("metrics_collected", self._on_metrics_collected)
+
+
+class _PreflightStream(lk_stt.RecognizeStream):
+    def __init__(self, preflight_stt: PreflightSTT, *, wrapped: lk_stt.RecognizeStream):
+        super().__init__(stt=preflight_stt, conn_options=_NO_RETRY_CONNECT_OPTIONS)
+
+        self._wrapped = wrapped
+
+        self._interim: lk_stt.SpeechEvent | None = None
+        self._preflight_text: str | None = None
+        self._preflight_at = 0.0
+        self._quiet_timer: asyncio.TimerHandle | None = None
+
+    # The session aligns transcript timestamps through these; the wrapped
+    # stream is the one that builds the events
+    @lk_stt.RecognizeStream.start_time_offset.setter
+    def start_time_offset(self, value: float):
+        lk_stt.RecognizeStream.start_time_offset.fset(self, value)
+        self._wrapped.start_time_offset = value
+
+    async def _metrics_monitor_task(self, event_aiter):
+        # Usage is reported by the wrapped stream and forwarded by PreflightSTT
+        async for _ in event_aiter:
+            pass
+
+    async def _run(self):
+        async def forward_input():
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    self._wrapped.flush()
+                else:
+                    self._wrapped.push_frame(data)
+
+            self._wrapped.end_input()
+
+        input_task = asyncio.create_task(forward_input())
+
+        try:
+            async for ev in self._wrapped:
+                self._event_ch.send_nowait(ev)
+                self._on_event(ev)
+        finally:
+            self._cancel_quiet_timer()
+            input_task.cancel()
+            await self._wrapped.aclose()
+
+    # ── Stability ─────────────────────────────────────────────────────────────
+
+    def _on_event(self, ev: lk_stt.SpeechEvent):
+        text = ev.alternatives[0].text.strip() if ev.alternatives else ""
+
+        if ev.type == lk_stt.SpeechEventType.INTERIM_TRANSCRIPT:
+            if not text:
+                return
+
+            self._cancel_quiet_timer()
+
+            previous = self._interim
+            self._interim = ev
+
+            if previous is not None and previous.alternatives[0].text.strip() == text:
+                self._send_preflight()
+            else:
+                self._quiet_timer = asyncio.get_running_loop().call_later(
+                    PREFLIGHT_QUIET_SECONDS,
+                    self._send_preflight,
+                )
+
+        elif ev.type == lk_stt.SpeechEventType.FINAL_TRANSCRIPT:
+            self._cancel_quiet_timer()
+
+            if self._preflight_text is not None and text:
+                outcome = PreflightOutcome(
+                    # Same comparison the session makes before keeping the
+                    # speculative reply
+                    hit=ev.alternatives[0].text == self._preflight_text,
+                    lead=time.time() - self._preflight_at,
+                    preflight=self._preflight_text,
+                    final=ev.alternatives[0].text,
+                )
+
+                logger.debug(
+                    "Preflight %s | lead_ms=%.0f",
+                    "hit" if outcome.hit else "miss",
+                    outcome.lead * 1000,
+                )
+                self._stt.emit("preflight_resolved", outcome)
+
+            self._interim = None
+            self._preflight_text = None
+
+    def _send_preflight(self):
+        self._quiet_timer = None
+
+        if self._interim is None or self._event_ch.closed:
+            return
+
+        alternative = self._interim.alternatives[0]
+
+        # One speculative reply per distinct text
+        if alternative.text == self._preflight_text:
+            return
+
+        self._preflight_text = alternative.text
+        self._preflight_at = time.time()
+
+        self._event_ch.send_nowait(
+            lk_stt.SpeechEvent(
+                type=lk_stt.SpeechEventType.PREFLIGHT_TRANSCRIPT,
+                request_id=self._interim.request_id,
+                alternatives=[alternative],
+            )
+        )
+
+    def _cancel_quiet_timer(self):
+        if self._quiet_timer is not None:
+            self._quiet_timer.cancel()
+            self._quiet_timer = None
@@ -0,0 +1,49 @@
+import asyncio
+
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+
+import availability
+
+from utils import PST
+
+
+def _fetch(monkeypatch, slots):
+    async def call_automation(endpoint, payload):
+        return {"slots": slots}
+
+    monkeypatch.setattr(availability, "call_automation", call_automation)
+
+    cache = availability.AvailabilityCache()
+    asyncio.run(cache._fetch("conversation", availability.AVAILABILITY_PREFETCH_DAYS))
+    return cache
+
+
+def test_fetch_keeps_morning_slots(monkeypatch):
+    day = datetime.now(tz=PST).date() + timedelta(days=1)
+
+    cache = _fetch(monkeypatch, [
+        {"visit_date": day.isoformat(), "visit_time": "09:00", "available": True},
+        {"visit_date": day.isoformat(), "visit_time": "10:00", "available": True},
+        {"visit_date": day.isoformat(), "visit_time": "11:30", "available": True},
+        {"visit_date": day.isoformat(), "visit_time": "12:00", "available": False},
+        {"visit_date": day.isoformat(), "visit_time": "14:00", "available": True},
+    ])
+
+    assert cache.open_slots(day) == [
+        dt_time(9, 0), dt_time(10, 0), dt_time(11, 30), dt_time(14, 0),
+    ]
+    assert cache.is_taken(day, dt_time(12, 0))
+
+
+def test_fetch_skips_malformed_slots(monkeypatch):
+    day = datetime.now(tz=PST).date() + timedelta(days=1)
+
+    cache = _fetch(monkeypatch, [
+        {"visit_date": day.isoformat(), "visit_time": "10:00", "available": True},
+        {"visit_date": day.isoformat(), "visit_time": "diez", "available": True},
+        {"visit_date": "6 de marzo", "visit_time": "11:00", "available": True},
+        {"visit_time": "11:00", "available": True},
+    ])
+
+    assert cache.open_slots(day) == [dt_time(10, 0)]
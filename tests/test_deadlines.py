@@ -0,0 +1,58 @@
+import asyncio
+import os
+import time
+
+import worker_metrics
+
+from deadlines import DeadlineScheduler
+
+
+def _gauge(name: str, **labels) -> float | None:
+    return worker_metrics.REGISTRY.gauges.get((name, worker_metrics._label_key(labels)))
+
+
+def test_upcoming_lists_live_deadlines_earliest_first():
+    async def main():
+        scheduler = DeadlineScheduler()
+
+        scheduler.schedule("max_call_duration", 60, lambda: None, owner="a")
+        idle = scheduler.schedule("idle_silence", 5, lambda: None, owner="a")
+        scheduler.schedule("journal_sync", 1, lambda: None, owner="b")
+
+        assert [d["name"] for d in scheduler.upcoming()] == [
+            "journal_sync", "idle_silence", "max_call_duration",
+        ]
+
+        idle.cancel()
+        upcoming = scheduler.upcoming(limit=1)
+
+        assert [(d["name"], d["owner"]) for d in upcoming] == [("journal_sync", "b")]
+        assert 0 < upcoming[0]["remaining_s"] <= 1
+
+        scheduler.cancel_owner("a")
+        scheduler.cancel_owner("b")
+
+    asyncio.run(main())
+
+
+def test_next_deadline_gauge_tracks_earliest_live_deadline():
+    async def main():
+        scheduler = DeadlineScheduler()
+        pid = os.getpid()
+
+        later = scheduler.schedule("test_gauge", 30, lambda: None)
+        sooner = scheduler.schedule("test_gauge", 10, lambda: None)
+
+        next_at = _gauge("salon_next_deadline_timestamp_seconds", deadline="test_gauge", pid=pid)
+        assert abs(next_at - (time.time() + 10)) < 1
+        assert _gauge("salon_pending_deadlines", deadline="test_gauge") == 2
+
+        sooner.cancel()
+        next_at = _gauge("salon_next_deadline_timestamp_seconds", deadline="test_gauge", pid=pid)
+        assert abs(next_at - (time.time() + 30)) < 1
+
+        later.cancel()
+        assert _gauge("salon_next_deadline_timestamp_seconds", deadline="test_gauge", pid=pid) == 0
+        assert _gauge("salon_pending_deadlines", deadline="test_gauge") == 0
+
+    asyncio.run(main())
@@ -0,0 +1,18 @@
+import os
+
+# inbound_agent insists on Google credentials at import time
+os.environ.setdefault("GOOGLE_SERVICE_ACCOUNT_JSON", "{}")
+
+import pytest
+
+import inbound_agent
+
+from tts_cache import normalize_sentence
+
+
+@pytest.mark.parametrize("reply", inbound_agent.SCRIPTED_REPLIES)
+def test_scripted_replies_match_instructions(reply):
+    # A reply edited in instructions.txt but not here is never a cache hit
+    instructions = inbound_agent.INSTRUCTIONS_PATH.read_text(encoding="utf-8")
+
+    assert normalize_sentence(reply) in normalize_sentence(instructions)
@@ -0,0 +1,28 @@
+from datetime import time
+
+import pytest
+
+from schedule import parse_visit_time
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("16:00", time(16, 0)),
+    ("11:00", time(11, 0)),
+    ("10:00", time(10, 0)),
+    ("09:30", time(9, 30)),
+    ("4 pm", time(16, 0)),
+    ("4:30 p.m.", time(16, 30)),
+    ("10:00 a. m.", time(10, 0)),
+    ("4:30 p. m.", time(16, 30)),
+    ("12 a. m.", time(0, 0)),
+    ("cuatro de la tarde", time(16, 0)),
+    ("diez y media de la mañana", time(10, 30)),
+    ("doce de la noche", time(0, 0)),
+])
+def test_parse_visit_time(value, expected):
+    assert parse_visit_time(value) == expected
+
+
+@pytest.mark.parametrize("value", ["4", "3:30", "a las 10", "25:00", "mañana"])
+def test_parse_visit_time_rejects_ambiguous_or_unknown(value):
+    assert parse_visit_time(value) is None
@@ -0,0 +1,31 @@
+from tts_cache import AudioLRU
+
+
+def test_lru_evicts_least_recently_used_entry():
+    lru = AudioLRU(max_entries=2, max_bytes=1024)
+
+    lru.put("a", b"\x00" * 10)
+    lru.put("b", b"\x00" * 10)
+    assert lru.get("a") is not None
+
+    lru.put("c", b"\x00" * 10)
+
+    assert lru.get("b") is None
+    assert lru.get("a") is not None
+    assert lru.get("c") is not None
+
+
+def test_lru_respects_byte_bound():
+    lru = AudioLRU(max_entries=10, max_bytes=100)
+
+    lru.put("a", b"\x00" * 60)
+    lru.put("b", b"\x00" * 60)
+
+    assert lru.get("a") is None
+    assert lru.size_bytes == 60
+
+    # Larger than the whole cache: never stored
+    lru.put("c", b"\x00" * 200)
+
+    assert lru.get("c") is None
+    assert len(lru) == 1
@@ -0,0 +1,61 @@
+import pytest
+
+from utils import CircuitBreaker, _backend_healthy
+
+
+@pytest.mark.parametrize("status, healthy", [
+    (200, True),
+    (204, True),
+    (404, True),
+    (422, True),
+    (429, False),
+    (500, False),
+    (502, False),
+    (503, False),
+])
+def test_backend_healthy(status, healthy):
+    assert _backend_healthy(status) is healthy
+
+
+def test_breaker_state_is_shared_through_the_file(tmp_path):
+    path = tmp_path / "breaker.json"
+    first = CircuitBreaker(path=path, min_calls=2, state_ttl=0)
+    second = CircuitBreaker(path=path, min_calls=2, state_ttl=0)
+
+    first.record_failure()
+    first.record_failure()
+
+    assert second.state == CircuitBreaker.OPEN
+    assert not second.allow_request()
+
+
+def test_breaker_checks_do_not_rewrite_the_file(tmp_path, monkeypatch):
+    path = tmp_path / "breaker.json"
+    breaker = CircuitBreaker(path=path, window=3)
+
+    for _ in range(3):
+        breaker.record_success(0.1)
+
+    saves = []
+    monkeypatch.setattr(breaker, "_save", lambda: saves.append(1))
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+    # The window is already all successes, so nothing changes
+    breaker.record_success(0.1)
+
+    assert saves == []
+
+
+def test_breaker_reuses_recent_state(tmp_path, monkeypatch):
+    breaker = CircuitBreaker(path=tmp_path / "breaker.json", state_ttl=60)
+    breaker.state
+
+    loads = []
+    monkeypatch.setattr(breaker, "_load", lambda: loads.append(1))
+
+    for _ in range(5):
+        breaker.state
+
+    assert loads == []
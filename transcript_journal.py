@@ -0,0 +1,333 @@
+import os
+import json
+import time
+import asyncio
+import logging
+
+from datetime import datetime
+from pathlib import Path
+
+import worker_metrics
+from deadlines import DEADLINES, Deadline
+from outbox import AfterCallOutbox, get_outbox
+from transcript_stream import TRANSCRIPT_STREAMING
+from utils import PST
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("transcript_journal")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+JOURNAL_DIR = Path(
+    os.getenv(
+        "TRANSCRIPT_JOURNAL_DIR",
+        Path(__file__).resolve().parent / ".outbox" / "journal",
+    )
+)
+
+# Buffered journal lines reach the disk at most this long after being
+# written; 0 turns the journal off
+JOURNAL_SYNC_SECONDS = float(os.getenv("TRANSCRIPT_JOURNAL_SYNC_SECONDS", 1))
+
+# Large enough that a whole call fits without the buffer writing through
+JOURNAL_BUFFER_BYTES = 64 * 1024
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+# =====================================================
+# JOURNAL
+# =====================================================
+
+class TranscriptJournal:
+    """
+    Append-only record of one call, kept on disk so the after-call payload
+    survives the job process dying.
+
+    One JSON line per entry in JOURNAL_DIR/<conversation_id>.jsonl: a
+    header with the call metadata, then every transcript item with the time
+    it was added, plus the booking state the payload carries. Lines go to a
+    buffered file and a deadline flushes and fsyncs them off the event loop
+    JOURNAL_SYNC_SECONDS later, so ``append`` only copies into memory.
+
+    The journal is removed once the payload is in the outbox. A journal
+    whose process is gone belonged to a call that died mid-way;
+    ``recover_orphaned_journals`` rebuilds its payload.
+    """
+
+    def __init__(
+        self,
+        conversation_id: str,
+        *,
+        directory: Path = JOURNAL_DIR,
+        sync_seconds: float = JOURNAL_SYNC_SECONDS,
+    ):
+        self.conversation_id = conversation_id
+        self.path = directory / f"{conversation_id}.jsonl"
+
+        self._sync_seconds = sync_seconds
+        self._file = None
+        self._deadline: Deadline | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._sync_seconds > 0
+
+    def open(self, header: dict):
+        """
+        Creates the journal and writes its header to disk. Blocking; call
+        through ``asyncio.to_thread``.
+
+        The header is written to a temporary file that is renamed into
+        place, so the drainer never sees a journal without one and takes a
+        live call's journal for an orphan.
+        """
+
+        if not self.enabled:
+            return
+
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(tmp, "wb") as f:
+                f.write(self._encode({"type": "call", "pid": os.getpid(), **header}))
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(tmp, self.path)
+
+            # Binary: the buffered writer locks, so the sync thread can flush
+            # while the event loop appends
+            self._file = open(self.path, "ab", buffering=JOURNAL_BUFFER_BYTES)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            logger.exception("Transcript journal unavailable | path=%s", self.path)
+            self._file = None
+
+    def append(self, item: dict):
+        """Records one transcript item."""
+
+        self._write({"type": "item", "at": round(time.time(), 3), **item})
+
+    def note(self, key: str, value):
+        """Records a payload field set during the call, e.g. confirmed_visit."""
+
+        self._write({"type": "state", "key": key, "value": value})
+
+    async def close(self, *, remove: bool):
+        """
+        Flushes what is buffered and closes the file. ``remove`` deletes the
+        journal, once its payload is safely in the outbox.
+        """
+
+        if self._file is None:
+            return
+
+        self._cancel_deadline()
+
+        file, self._file = self._file, None
+
+        def finish():
+            try:
+                file.flush()
+                os.fsync(file.fileno())
+            finally:
+                file.close()
+
+            if remove:
+                self.path.unlink(missing_ok=True)
+
+        try:
+            await asyncio.to_thread(finish)
+        except OSError:
+            logger.exception("Failed to close transcript journal | path=%s", self.path)
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _encode(entry: dict) -> bytes:
+        return (json.dumps(entry, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+    def _write(self, entry: dict):
+        if self._file is None:
+            return
+
+        try:
+            self._file.write(self._encode(entry))
+        except (OSError, ValueError):
+            logger.exception("Transcript journal write failed | path=%s", self.path)
+            return
+
+        if self._deadline is None:
+            try:
+                self._deadline = DEADLINES.schedule(
+                    "journal_sync",
+                    self._sync_seconds,
+                    self._on_sync_due,
+                    owner=self.conversation_id,
+                )
+            except RuntimeError:
+                # No running loop; synced when the journal is closed
+                pass
+
+    def _on_sync_due(self):
+        self._deadline = None
+
+        if self._file is not None:
+            return asyncio.to_thread(self._sync)
+
+    def _sync(self):
+        file = self._file
+        if file is None:
+            return
+
+        try:
+            file.flush()
+            os.fsync(file.fileno())
+        except (OSError, ValueError):
+            # ValueError: closed by ``close`` while this was waiting
+            logger.warning("Transcript journal sync failed | path=%s", self.path)
+
+    def _cancel_deadline(self):
+        if self._deadline is not None:
+            self._deadline.cancel()
+            self._deadline = None
+
+
+# =====================================================
+# RECOVERY
+# =====================================================
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_journal(path: Path) -> dict | None:
+    """
+    Rebuilds the after-call payload of a journal. Returns None when the
+    header never reached the disk.
+
+    A line cut short by the crash is skipped.
+    """
+
+    header = None
+    transcript: list[dict] = []
+    state: dict = {}
+    last_at = None
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+
+            kind = entry.pop("type", None)
+
+            if kind == "call":
+                header = entry
+            elif kind == "item":
+                last_at = entry.pop("at", last_at)
+                transcript.append(entry)
+            elif kind == "state":
+                state[entry.get("key")] = entry.get("value")
+
+    if header is None:
+        return None
+
+    ended_at = datetime.fromtimestamp(
+        last_at if last_at is not None else path.stat().st_mtime,
+        tz=PST,
+    )
+
+    payload = {
+        "conversation_id": header["conversation_id"],
+        "channel": "voice",
+        "from_phone_number": header.get("from_phone_number"),
+        "to_phone_number": header.get("to_phone_number"),
+        "conversation_started_at": header.get("conversation_started_at"),
+        "conversation_ended_at": ended_at.strftime(_TIME_FORMAT),
+        "call_sid": header.get("call_sid"),
+        "transcript": transcript,
+        "confirmed_visit": state.get("confirmed_visit"),
+        "pending_visit_request": state.get("pending_visit_request"),
+        "latency": None,
+        "caller_classification": None,
+        # The job process died before the call ended normally
+        "recovered_from_journal": True,
+    }
+
+    if TRANSCRIPT_STREAMING:
+        # How much of it was streamed is unknown; the backend stores batches
+        # idempotently by sequence number, so the whole transcript is resent
+        payload["transcript_offset"] = 0
+
+    return payload
+
+
+def recover_orphaned_journals(
+    directory: Path = JOURNAL_DIR,
+    outbox: AfterCallOutbox | None = None,
+) -> int:
+    """
+    Queues the after-call payload of every journal whose job process is
+    gone, then removes the journal. The outbox drainer delivers them.
+
+    Run from the worker's outbox drainer before each pass, so a job process
+    that dies while the worker stays up is picked up within one poll.
+    Journals of live job processes are left alone. Returns how many
+    payloads were queued.
+    """
+
+    outbox = outbox or get_outbox()
+    recovered = 0
+
+    for path in sorted(directory.glob("*.jsonl")):
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                header = json.loads(f.readline())
+            pid = int(header.get("pid", 0))
+        except (OSError, ValueError, AttributeError):
+            pid = 0
+
+        # Process ids restart with the container, so after a restart a live
+        # match may be an unrelated process; the worker is never a job process
+        if pid and pid != os.getpid() and _pid_alive(pid):
+            continue
+
+        try:
+            payload = read_journal(path)
+
+            if payload is None:
+                worker_metrics.inc("salon_journal_recoveries_total", outcome="unreadable")
+                logger.warning("Orphaned transcript journal without header | path=%s", path)
+            else:
+                outbox.put(payload)
+                recovered += 1
+                worker_metrics.inc("salon_journal_recoveries_total", outcome="queued")
+                logger.warning(
+                    "Recovered after-call payload from journal | conversation_id=%s | items=%s",
+                    payload["conversation_id"],
+                    len(payload["transcript"]),
+                )
+
+            path.unlink(missing_ok=True)
+        except Exception:
+            # Left in place for the next start
+            logger.exception("Failed to recover transcript journal | path=%s", path)
+
+    return recovered
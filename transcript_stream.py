@@ -0,0 +1,179 @@
+import os
+import asyncio
+import logging
+
+import worker_metrics
+from deadlines import DEADLINES, Deadline
+from utils import call_automation
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("transcript_stream")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+TRANSCRIPT_ENDPOINT = "/salon_ibargo_transcript"
+
+# Send transcript items to the backend while the call is running instead of
+# only in the after-call payload
+TRANSCRIPT_STREAMING = os.getenv("TRANSCRIPT_STREAMING", "").lower() in ("1", "true", "yes")
+
+# A batch goes out once this many items are pending, or this long after the
+# oldest pending item was added, whichever comes first
+TRANSCRIPT_BATCH_ITEMS = int(os.getenv("TRANSCRIPT_BATCH_ITEMS", 4))
+TRANSCRIPT_BATCH_SECONDS = float(os.getenv("TRANSCRIPT_BATCH_SECONDS", 15))
+
+# Time on_shutdown spends sending the last batch; whatever is left goes in
+# the after-call payload
+TRANSCRIPT_FINAL_FLUSH_TIMEOUT = float(os.getenv("TRANSCRIPT_FINAL_FLUSH_TIMEOUT", 5))
+
+
+# =====================================================
+# STREAMER
+# =====================================================
+
+class TranscriptStreamer:
+    """
+    Sends a call's transcript to the backend in small batches while the
+    call is running.
+
+    Every item gets a sequence number (its index in the transcript) and
+    each batch carries the sequence number of its first item, so the
+    backend can store batches idempotently and in order. Batches go out one
+    at a time; a failed batch stays pending and is resent with the next.
+
+    ``offset`` is how many items the backend has acknowledged. The
+    after-call payload carries it with only the items after it.
+    """
+
+    def __init__(
+        self,
+        conversation_id: str,
+        *,
+        batch_items: int = TRANSCRIPT_BATCH_ITEMS,
+        batch_seconds: float = TRANSCRIPT_BATCH_SECONDS,
+    ):
+        self.conversation_id = conversation_id
+        self.offset = 0
+
+        self._batch_items = batch_items
+        self._batch_seconds = batch_seconds
+
+        self._items: list[dict] = []
+        self._batches_sent = 0
+        self._lock = asyncio.Lock()
+        self._deadline: Deadline | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._items) - self.offset
+
+    def append(self, item: dict):
+        """Queues one transcript item; sends a batch when one is due."""
+
+        self._items.append(item)
+        self._schedule_next()
+
+    async def close(self) -> int:
+        """
+        Sends what is still pending, within TRANSCRIPT_FINAL_FLUSH_TIMEOUT.
+        Returns the final offset.
+        """
+
+        self._closed = True
+        self._cancel_deadline()
+
+        try:
+            await asyncio.wait_for(self.flush(), TRANSCRIPT_FINAL_FLUSH_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Final transcript batch timed out | conversation_id=%s | pending=%s",
+                self.conversation_id,
+                self.pending,
+            )
+
+        return self.offset
+
+    # ── Delivery ──────────────────────────────────────────────────────────────
+
+    def _schedule_next(self, *, failed: bool = False):
+        if self._closed or not self.pending:
+            return
+
+        # A failed batch waits for the timer rather than hammering the backend
+        if self.pending >= self._batch_items and not failed:
+            self._start_flush()
+        elif self._deadline is None:
+            self._deadline = DEADLINES.schedule(
+                "transcript_flush",
+                self._batch_seconds,
+                self._start_flush,
+                owner=self.conversation_id,
+            )
+
+    def _start_flush(self):
+        self._cancel_deadline()
+
+        # An in-flight batch picks up what is pending when it finishes
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> bool:
+        """
+        Sends every pending item as one batch. Returns True if nothing is
+        left pending.
+        """
+
+        async with self._lock:
+            if not self.pending:
+                return True
+
+            first = self.offset
+            items = self._items[first:]
+
+            payload = {
+                "conversation_id": self.conversation_id,
+                "batch_seq": self._batches_sent,
+                "first_seq": first,
+                "items": [
+                    {"seq": first + i, **item}
+                    for i, item in enumerate(items)
+                ],
+            }
+
+            failed = False
+
+            try:
+                await call_automation(TRANSCRIPT_ENDPOINT, payload)
+            except Exception as e:
+                failed = True
+                worker_metrics.inc("salon_transcript_batches_total", outcome="failed")
+                logger.warning(
+                    "Transcript batch failed | conversation_id=%s | first_seq=%s | error=%s",
+                    self.conversation_id,
+                    first,
+                    e,
+                )
+            else:
+                self.offset = first + len(items)
+                self._batches_sent += 1
+                worker_metrics.inc("salon_transcript_batches_total", outcome="sent")
+
+        # Retries a failed batch, or sends items added while it was in flight
+        if asyncio.current_task() is self._flush_task:
+            self._flush_task = None
+        self._schedule_next(failed=failed)
+
+        return not self.pending
+
+    def _cancel_deadline(self):
+        if self._deadline is not None:
+            self._deadline.cancel()
+            self._deadline = None
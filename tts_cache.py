@@ -0,0 +1,519 @@
+import os
+import re
+import asyncio
+import hashlib
+import logging
+import unicodedata
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Iterable
+
+from livekit import rtc
+from livekit.agents import tts as lk_tts
+from livekit.agents import utils as lk_utils
+from livekit.agents.tokenize import blingfire
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("tts_cache")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+TTS_CACHE_DIR = Path(
+    os.getenv(
+        "TTS_CACHE_DIR",
+        Path(__file__).resolve().parent / ".tts_cache",
+    )
+)
+
+# Size of each frame pushed to the room when replaying cached audio
+FRAME_MS = 20
+
+# Phrases synthesized at once while filling the cache
+FILL_CONCURRENCY = 8
+
+# Bounds of the in-memory LRU of streamed reply sentences
+REPLY_LRU_MAX_ENTRIES = int(os.getenv("REPLY_LRU_MAX_ENTRIES", 256))
+REPLY_LRU_MAX_BYTES = int(os.getenv("REPLY_LRU_MAX_BYTES", 16 * 1024 * 1024))
+
+# Splits replies the way the Google TTS plugin does by default, so cached
+# sentences line up with what the LLM output is cut into
+SENTENCE_TOKENIZER = blingfire.SentenceTokenizer()
+
+
+# =====================================================
+# PHRASE AUDIO CACHE
+# =====================================================
+
+class PhraseAudioCache:
+    """
+    On-disk + in-memory cache of pre-synthesized audio for fixed phrases.
+
+    Audio is stored as raw 16-bit mono PCM, one file per phrase, named after
+    a hash of (text, voice_name, model_name, speaking_rate, sample_rate).
+    Changing any voice setting therefore produces a new key instead of
+    replaying stale audio.
+    """
+
+    def __init__(
+        self,
+        *,
+        voice_name: str,
+        model_name: str,
+        speaking_rate: float,
+        sample_rate: int,
+        cache_dir: Path = TTS_CACHE_DIR,
+    ):
+        self.voice_name = voice_name
+        self.model_name = model_name
+        self.speaking_rate = speaking_rate
+        self.sample_rate = sample_rate
+        self.cache_dir = cache_dir
+
+        self._audio: dict[str, bytes] = {}
+
+    # ── Keys ──────────────────────────────────────────────────────────────────
+
+    def key(self, text: str) -> str:
+        raw = "|".join([
+            text,
+            self.voice_name,
+            self.model_name,
+            f"{self.speaking_rate:g}",
+            str(self.sample_rate),
+        ])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, text: str) -> Path:
+        return self.cache_dir / f"{self.key(text)}.pcm"
+
+    # ── Lookup ────────────────────────────────────────────────────────────────
+
+    def get(self, text: str) -> bytes | None:
+        """
+        Returns cached PCM for a phrase, loading it from disk on first use.
+        """
+
+        audio = self._audio.get(text)
+
+        if audio is not None:
+            return audio
+
+        path = self._path(text)
+
+        try:
+            audio = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.warning("Failed to read cached audio: %s", path)
+            return None
+
+        if not audio:
+            return None
+
+        self._audio[text] = audio
+        return audio
+
+    def put(self, text: str, audio: bytes):
+        """
+        Stores PCM in memory and writes it atomically to disk, so several
+        prewarming processes can fill the same directory concurrently.
+        """
+
+        self._audio[text] = audio
+
+        path = self._path(text)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(audio)
+            os.replace(tmp, path)
+        except OSError:
+            logger.warning("Failed to persist cached audio: %s", path)
+
+    # ── Fill ──────────────────────────────────────────────────────────────────
+
+    async def fill(self, tts, phrases: list[str], *, concurrency: int = FILL_CONCURRENCY):
+        """
+        Makes sure every phrase is cached, synthesizing only the missing ones,
+        ``concurrency`` at a time.
+
+        Each phrase is stored as soon as it is synthesized, so a fill that is
+        cancelled (e.g. by a timeout) keeps what it finished.
+
+        Parameters
+        ----------
+        tts : livekit.agents.tts.TTS
+            Engine configured with the same voice settings as this cache
+
+        phrases : list[str]
+            Exact texts that will later be spoken
+        """
+
+        missing = [text for text in dict.fromkeys(phrases) if self.get(text) is None]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def synthesize(text: str):
+            async with semaphore:
+                try:
+                    async with tts.synthesize(text) as stream:
+                        frame = await stream.collect()
+                except Exception:
+                    logger.exception("Failed to pre-synthesize phrase: %s", text)
+                    return
+
+            if frame.sample_rate != self.sample_rate or frame.num_channels != 1:
+                logger.warning(
+                    "Unexpected audio format for phrase (rate=%s, channels=%s)",
+                    frame.sample_rate,
+                    frame.num_channels,
+                )
+                return
+
+            self.put(text, frame.data.tobytes())
+            logger.info("Pre-synthesized phrase: %s", text)
+
+        await asyncio.gather(*(synthesize(text) for text in missing))
+
+    # ── Playback ──────────────────────────────────────────────────────────────
+
+    async def frames(self, text: str) -> AsyncIterator[rtc.AudioFrame]:
+        """
+        Yields the cached audio for a phrase as fixed-size frames.
+        """
+
+        audio = self.get(text) or b""
+
+        samples_per_frame = self.sample_rate * FRAME_MS // 1000
+        frame_bytes = samples_per_frame * 2
+
+        for offset in range(0, len(audio), frame_bytes):
+            chunk = audio[offset:offset + frame_bytes]
+
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=1,
+                samples_per_channel=len(chunk) // 2,
+            )
+
+
+# =====================================================
+# SENTENCE NORMALIZATION
+# =====================================================
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_QUOTE_TRANSLATION = str.maketrans({
+    "“": '"',
+    "”": '"',
+    "‘": "'",
+    "’": "'",
+})
+
+
+def normalize_sentence(text: str) -> str:
+    """
+    Canonical form of a sentence used both as cache key and as TTS input.
+
+    Only transformations that do not change pronunciation are applied:
+    unicode NFC, curly quotes to straight quotes, collapsed whitespace.
+    """
+
+    text = unicodedata.normalize("NFC", text)
+    text = text.translate(_QUOTE_TRANSLATION)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def split_sentences(texts: Iterable[str]) -> list[str]:
+    """
+    Normalized sentences of ``texts``, cut by SENTENCE_TOKENIZER.
+    """
+
+    return [
+        normalize_sentence(sentence)
+        for text in texts
+        for sentence in SENTENCE_TOKENIZER.tokenize(text)
+    ]
+
+
+# =====================================================
+# CACHED REPLY SENTENCES
+# =====================================================
+
+class AudioLRU:
+    """
+    In-memory LRU of PCM by sentence, bounded by entry count and bytes.
+    """
+
+    def __init__(self, *, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+
+        self._audio: OrderedDict[str, bytes] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._audio)
+
+    def get(self, key: str) -> bytes | None:
+        audio = self._audio.get(key)
+
+        if audio is not None:
+            self._audio.move_to_end(key)
+
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if not audio or len(audio) > self.max_bytes:
+            return
+
+        previous = self._audio.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= len(previous)
+
+        self._audio[key] = audio
+        self.size_bytes += len(audio)
+
+        while len(self._audio) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, evicted = self._audio.popitem(last=False)
+            self.size_bytes -= len(evicted)
+
+
+class SentenceCachedTTS(lk_tts.TTS):
+    """
+    Streaming TTS that plays repeated reply sentences from memory and
+    streams everything else from the wrapped engine.
+
+    LLM output is cut into sentences as it arrives. A sentence in
+    ``sentences`` is played from the PhraseAudioCache filled in prewarm, so
+    those hits carry over between job processes. Any other sentence is
+    looked up in a bounded LRU of what this process already streamed; on a
+    miss it is sent to its own stream of the wrapped engine as soon as it
+    is complete, so misses keep the provider's streaming synthesis and
+    later sentences are synthesized while earlier ones play. A job process
+    serves one call, so the LRU catches repeats within that call.
+    """
+
+    def __init__(
+        self,
+        wrapped: lk_tts.TTS,
+        *,
+        cache: PhraseAudioCache,
+        sentences: Iterable[str],
+        lru_max_entries: int = REPLY_LRU_MAX_ENTRIES,
+        lru_max_bytes: int = REPLY_LRU_MAX_BYTES,
+    ):
+        super().__init__(
+            capabilities=lk_tts.TTSCapabilities(streaming=True),
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels,
+        )
+
+        if not wrapped.capabilities.streaming:
+            wrapped = lk_tts.StreamAdapter(tts=wrapped, sentence_tokenizer=SENTENCE_TOKENIZER)
+
+        self._wrapped = wrapped
+        self._cache = cache
+        self._sentences = {normalize_sentence(sentence) for sentence in sentences}
+        self._lru = AudioLRU(max_entries=lru_max_entries, max_bytes=lru_max_bytes)
+
+        if cache.sample_rate != wrapped.sample_rate:
+            logger.warning(
+                "Phrase cache sample rate %s does not match TTS %s; reply cache disabled",
+                cache.sample_rate,
+                wrapped.sample_rate,
+            )
+            self._sentences = set()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model(self) -> str:
+        return self._wrapped.model
+
+    @property
+    def provider(self) -> str:
+        return self._wrapped.provider
+
+    def cached_audio(self, sentence: str) -> bytes | None:
+        """Cached PCM for a normalized sentence, if it is a known one."""
+
+        if sentence in self._sentences:
+            audio = self._cache.get(sentence)
+        else:
+            audio = self._lru.get(sentence)
+
+        if audio is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return audio
+
+    def remember(self, sentence: str, audio: bytes):
+        """Keeps the streamed audio of a normalized sentence for repeats."""
+
+        if sentence not in self._sentences:
+            self._lru.put(sentence, audio)
+
+    def stats(self) -> dict:
+        sentences = self.hits + self.misses
+
+        return {
+            "known": len(self._sentences),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / sentences, 3) if sentences else 0.0,
+            "lru_entries": len(self._lru),
+            "lru_bytes": self._lru.size_bytes,
+        }
+
+    def synthesize(
+        self,
+        text: str,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> lk_tts.ChunkedStream:
+        return self._wrapped.synthesize(text, conn_options=conn_options)
+
+    def stream(
+        self,
+        *,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> "_SentenceCachedStream":
+        return _SentenceCachedStream(tts=self, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self._wrapped.prewarm()
+
+    async def aclose(self) -> None:
+        await self._wrapped.aclose()
+
+
+class _SentenceCachedStream(lk_tts.SynthesizeStream):
+    def __init__(self, *, tts: SentenceCachedTTS, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, conn_options=conn_options)
+        self._cached_tts = tts
+
+    async def _run(self, output_emitter: lk_tts.AudioEmitter) -> None:
+        cached_tts = self._cached_tts
+
+        output_emitter.initialize(
+            request_id=lk_utils.shortuuid(),
+            sample_rate=cached_tts.sample_rate,
+            num_channels=cached_tts.num_channels,
+            mime_type="audio/pcm",
+            stream=True,
+        )
+        output_emitter.start_segment(segment_id=lk_utils.shortuuid())
+
+        sentences = SENTENCE_TOKENIZER.stream()
+
+        # Cached audio or (sentence, open wrapped stream), in speaking order
+        sources = lk_utils.aio.Chan[bytes | tuple[str, lk_tts.SynthesizeStream]]()
+        opened: list[lk_tts.SynthesizeStream] = []
+
+        async def forward_input():
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    sentences.flush()
+                else:
+                    sentences.push_text(data)
+
+            sentences.end_input()
+
+        async def open_sources():
+            async for ev in sentences:
+                sentence = normalize_sentence(ev.token)
+                if not sentence:
+                    continue
+
+                self._mark_started()
+
+                audio = cached_tts.cached_audio(sentence)
+                if audio is not None:
+                    sources.send_nowait(audio)
+                    continue
+
+                # One stream per sentence: a stream takes a single segment
+                stream = cached_tts._wrapped.stream(conn_options=self._conn_options)
+                stream.push_text(sentence)
+                stream.end_input()
+
+                opened.append(stream)
+                sources.send_nowait((sentence, stream))
+
+            sources.close()
+
+        tasks = [
+            asyncio.create_task(forward_input()),
+            asyncio.create_task(open_sources()),
+        ]
+
+        try:
+            async for source in sources:
+                if isinstance(source, bytes):
+                    output_emitter.push(source)
+                    continue
+
+                sentence, stream = source
+                streamed = bytearray()
+
+                async for ev in stream:
+                    data = ev.frame.data.tobytes()
+                    streamed += data
+                    output_emitter.push(data)
+
+                # Only reached when the sentence played to the end
+                cached_tts.remember(sentence, bytes(streamed))
+
+            # Surfaces input errors
+            await asyncio.gather(*tasks)
+        finally:
+            await lk_utils.aio.cancel_and_wait(*tasks)
+
+            for stream in opened:
+                await stream.aclose()
+
+        output_emitter.end_segment()
+
+
+def build_sentence_cached_tts(
+    wrapped: lk_tts.TTS,
+    *,
+    cache: PhraseAudioCache,
+    sentences: Iterable[str],
+) -> SentenceCachedTTS:
+    """
+    Wraps a TTS engine so known reply sentences play from ``cache``.
+
+    Parameters
+    ----------
+    wrapped : livekit.agents.tts.TTS
+        Engine for every other sentence; streamed when it supports it
+
+    cache : PhraseAudioCache
+        Filled with ``sentences`` (see ``split_sentences``) in prewarm
+
+    sentences : Iterable[str]
+        Sentences worth serving from the cache, as cut by
+        SENTENCE_TOKENIZER
+
+    Returns
+    -------
+    SentenceCachedTTS
+        Streaming TTS ready to hand to AgentSession
+    """
+
+    return SentenceCachedTTS(wrapped, cache=cache, sentences=sentences)
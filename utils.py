@@ -1,11 +1,25 @@
 import os
+import json
+import time
+import fcntl
+import random
+import asyncio
+import hashlib
 import secrets
 import logging
 import httpx
 
+from urllib.parse import urlsplit
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
+from typing import Callable
 from zoneinfo import ZoneInfo
 
+from livekit import api
+
 # =====================================================
 # LOGGING
 # =====================================================
@@ -26,6 +40,288 @@ AUTOMATION_BASE_URL = os.getenv(
 
 HTTP_TIMEOUT = 60
 
+# Cheap GET used to wake the backend; any HTTP response counts as awake
+AUTOMATION_HEALTH_PATH = os.getenv("AUTOMATION_HEALTH_PATH", "/health")
+
+# Keep warmed connections around long enough to reach the booking step
+HTTP_KEEPALIVE_EXPIRY = 120
+
+# Circuit breaker state shared by the worker and every job process
+BREAKER_STATE_PATH = Path(
+    os.getenv(
+        "AUTOMATION_BREAKER_PATH",
+        Path(__file__).resolve().parent / ".outbox" / "automation_breaker.json",
+    )
+)
+
+
+# =====================================================
+# RETRY POLICIES
+# =====================================================
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Retry settings for one automation endpoint.
+
+    deadline is the total budget across all attempts and backoff sleeps;
+    attempt_timeout caps each individual request inside that budget.
+    """
+    max_attempts: int
+    deadline: float
+    attempt_timeout: float
+    base_delay: float
+    max_delay: float
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy(
+    max_attempts=3,
+    deadline=HTTP_TIMEOUT,
+    attempt_timeout=20,
+    base_delay=0.5,
+    max_delay=4,
+)
+
+RETRY_POLICIES: dict[str, RetryPolicy] = {
+    # Runs while the caller waits; must finish inside the tool's 20 s wait
+    "/salon_ibargo_agendar_cita_disponibilidad": RetryPolicy(
+        max_attempts=3,
+        deadline=18,
+        attempt_timeout=10,
+        base_delay=0.3,
+        max_delay=2,
+    ),
+    # Runs during the call; a failed batch is resent with the next one
+    "/salon_ibargo_transcript": RetryPolicy(
+        max_attempts=2,
+        deadline=10,
+        attempt_timeout=5,
+        base_delay=0.5,
+        max_delay=2,
+    ),
+    # Off the call path; the outbox retries further on failure
+    "/salon_ibargo_after_call": RetryPolicy(
+        max_attempts=3,
+        deadline=HTTP_TIMEOUT,
+        attempt_timeout=30,
+        base_delay=1,
+        max_delay=5,
+    ),
+}
+
+# Gateway / overload responses from Render that are safe to retry once the
+# request carries an Idempotency-Key
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+RETRYABLE_EXCEPTIONS = (
+    httpx.TimeoutException,
+    httpx.ConnectError,
+    httpx.RemoteProtocolError,
+)
+
+
+# =====================================================
+# CIRCUIT BREAKER
+# =====================================================
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the backend while the breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker over a rolling window of attempts.
+
+    Opens when at least ``min_calls`` of the last ``window`` attempts were
+    recorded and the failure rate reaches ``failure_rate``. Successful
+    attempts slower than ``slow_call_seconds`` count as failures, so a
+    cold or overloaded backend trips it too. After ``open_seconds`` a single
+    probe is let through (half-open); its outcome closes or re-opens it.
+
+    With a ``path``, the state lives in that file: every job process serves
+    a single call, so failures seen by earlier calls must carry over.
+    Outcomes and half-open probes reload it under an exclusive file lock
+    and save it only when it changed; the file is tiny, so this stays on
+    the event loop. Plain checks reuse what was read within the last
+    ``state_ttl`` seconds and never lock, since saves replace the file
+    atomically.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        *,
+        window: int = 10,
+        min_calls: int = 3,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 8,
+        open_seconds: float = 30,
+        path: Path | None = None,
+        state_ttl: float = 1,
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.path = path
+        self.state_ttl = state_ttl
+
+        self._loaded_at = float("-inf")
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_started_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        self._refresh()
+        return self._current_state()
+
+    def allow_request(self) -> bool:
+        self._refresh()
+
+        if self._current_state() == self.CLOSED:
+            return True
+
+        with self._shared():
+            state = self._current_state()
+
+            if state == self.CLOSED:
+                return True
+
+            if state == self.OPEN:
+                return False
+
+            # Half-open: one probe at a time; a probe that never reported back
+            # (e.g. cancelled) stops blocking after another cool-down
+            now = time.time()
+            if self._probe_started_at is None or now - self._probe_started_at >= self.open_seconds:
+                self._probe_started_at = now
+                return True
+
+            return False
+
+    def record_success(self, latency: float):
+        with self._shared():
+            self._record(latency <= self.slow_call_seconds)
+
+    def record_failure(self):
+        with self._shared():
+            self._record(False)
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.time() - self._opened_at >= self.open_seconds:
+            return self.HALF_OPEN
+        return self._state
+
+    def _record(self, ok: bool):
+        if self._probe_started_at is not None:
+            self._probe_started_at = None
+            self._outcomes.clear()
+
+            if ok:
+                self._close()
+            else:
+                self._open()
+            return
+
+        self._outcomes.append(ok)
+
+        if self._state != self.CLOSED or len(self._outcomes) < self.min_calls:
+            return
+
+        failures = self._outcomes.count(False)
+
+        if failures / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def _open(self):
+        if self._state != self.OPEN:
+            logger.warning("Automation circuit breaker OPEN")
+        self._state = self.OPEN
+        self._opened_at = time.time()
+
+    def _close(self):
+        logger.info("Automation circuit breaker CLOSED")
+        self._state = self.CLOSED
+
+    # ── Shared state ──────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _shared(self):
+        lock = None
+
+        if self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                lock = open(self.path.with_suffix(".lock"), "a")
+            except OSError:
+                logger.warning("Breaker state unavailable, using this process only: %s", self.path)
+
+        if lock is None:
+            yield
+            return
+
+        with lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            self._load()
+            before = self._snapshot()
+            yield
+            if self._snapshot() != before:
+                self._save()
+
+    def _refresh(self):
+        if self.path is not None and time.monotonic() - self._loaded_at >= self.state_ttl:
+            self._load()
+
+    def _snapshot(self) -> dict:
+        return {
+            "outcomes": list(self._outcomes),
+            "state": self._state,
+            "opened_at": self._opened_at,
+            "probe_started_at": self._probe_started_at,
+        }
+
+    def _load(self):
+        self._loaded_at = time.monotonic()
+
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning("Unreadable breaker state, keeping this process's: %s", self.path)
+            return
+
+        self._outcomes = deque(data.get("outcomes", []), maxlen=self.window)
+        self._state = data.get("state", self.CLOSED)
+        self._opened_at = data.get("opened_at", 0.0)
+        self._probe_started_at = data.get("probe_started_at")
+
+    def _save(self):
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+
+        try:
+            tmp.write_text(json.dumps(self._snapshot()))
+            os.replace(tmp, self.path)
+        except OSError:
+            logger.warning("Failed to save breaker state: %s", self.path)
+
+
+automation_breaker = CircuitBreaker(path=BREAKER_STATE_PATH)
+
+
+def automation_available() -> bool:
+    """
+    False while the breaker is open, so callers can skip straight to a
+    degraded path instead of waiting on a dead backend.
+    """
+    return automation_breaker.state != CircuitBreaker.OPEN
+
 
 # =====================================================
 # SHARED HTTP CLIENT
@@ -38,11 +334,84 @@ def _get_client() -> httpx.AsyncClient:
     global _http_client
 
     if _http_client is None:
-        _http_client = httpx.AsyncClient(timeout=HTTP_TIMEOUT)
+        _http_client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(keepalive_expiry=HTTP_KEEPALIVE_EXPIRY),
+        )
 
     return _http_client
 
 
+# =====================================================
+# SHARED LIVEKIT API CLIENT
+# =====================================================
+
+_livekit_api: api.LiveKitAPI | None = None
+
+
+def get_livekit_api() -> api.LiveKitAPI:
+    """
+    Process-wide LiveKitAPI client, created on first use so its HTTP
+    session binds to the running event loop. Reused by every hang-up path;
+    open_provider_connections creates and warms it at job start, so the
+    hang-up does not pay for the session and TLS handshake.
+    """
+    global _livekit_api
+
+    if _livekit_api is None:
+        _livekit_api = api.LiveKitAPI()
+
+    return _livekit_api
+
+
+# =====================================================
+# BACKEND WARM-UP
+# =====================================================
+
+async def warm_automation_backend() -> float | None:
+    """
+    Pre-resolves DNS, opens the TLS connection on the shared client and
+    hits the health endpoint so a cold Render instance starts booting.
+
+    Never raises.
+
+    Returns
+    -------
+    float | None
+        Warm-up duration in seconds, or None if the backend was unreachable
+    """
+
+    started = time.monotonic()
+    parts = urlsplit(AUTOMATION_BASE_URL)
+
+    try:
+        loop = asyncio.get_running_loop()
+        await loop.getaddrinfo(parts.hostname, parts.port or 443)
+
+        response = await _get_client().get(f"{AUTOMATION_BASE_URL}{AUTOMATION_HEALTH_PATH}")
+
+    except Exception as e:
+        logger.warning("Automation warm-up failed: %s", e)
+        automation_breaker.record_failure()
+        return None
+
+    elapsed = time.monotonic() - started
+
+    # Only reachability counts: waking a cold instance is slow by design
+    if _backend_healthy(response.status_code):
+        automation_breaker.record_success(0.0)
+    else:
+        automation_breaker.record_failure()
+
+    logger.info(
+        "Automation backend warm | status=%s | latency_ms=%.0f",
+        response.status_code,
+        elapsed * 1000,
+    )
+
+    return elapsed
+
+
 # =====================================================
 # CALL ID GENERATION
 # =====================================================
@@ -66,10 +435,87 @@ def generate_call_id() -> str:
 # AUTOMATION API CLIENT
 # =====================================================
 
-async def call_automation(endpoint: str, payload: dict):
+_automation_listeners: list[Callable[[str, float, bool], None]] = []
+
+
+def add_automation_listener(listener: Callable[[str, float, bool], None]):
+    """
+    Registers a callback run after every call_automation with
+    (endpoint, total seconds including retries, succeeded).
+    """
+    _automation_listeners.append(listener)
+
+
+def remove_automation_listener(listener: Callable[[str, float, bool], None]):
+    if listener in _automation_listeners:
+        _automation_listeners.remove(listener)
+
+
+def _notify_automation_listeners(endpoint: str, seconds: float, ok: bool):
+    for listener in list(_automation_listeners):
+        try:
+            listener(endpoint, seconds, ok)
+        except Exception:
+            logger.exception("Automation listener failed")
+
+
+def idempotency_key(endpoint: str, payload: dict) -> str:
+    """
+    Stable key for a logical request: conversation_id + endpoint + payload hash.
+
+    Every retry of the same booking carries the same key, so the backend can
+    recognise it and never book twice.
+    """
+
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256(f"{endpoint}|{body}".encode("utf-8")).hexdigest()[:32]
+    conversation_id = payload.get("conversation_id") or "none"
+
+    return f"{conversation_id}-{digest}"
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+
+    return isinstance(exc, RETRYABLE_EXCEPTIONS)
+
+
+def _backend_healthy(status_code: int) -> bool:
+    """
+    True for responses that show the backend is up: 2xx, and 4xx other than
+    429 (the backend answered but rejected the request).
+    """
+
+    if status_code in RETRYABLE_STATUS_CODES:
+        return False
+
+    return 200 <= status_code < 300 or 400 <= status_code < 500
+
+
+def _retry_after(exc: Exception) -> float | None:
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+
+    try:
+        return float(exc.response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+async def call_automation(
+    endpoint: str,
+    payload: dict,
+    *,
+    policy: RetryPolicy | None = None,
+):
     """
     Sends a POST request to the automation backend.
 
+    Transient failures (timeouts, connection errors, 429/502/503/504) are
+    retried with exponential backoff and full jitter until the endpoint's
+    deadline budget runs out. Every attempt carries the same Idempotency-Key.
+
     Parameters
     ----------
     endpoint : str
@@ -78,6 +524,9 @@ async def call_automation(endpoint: str, payload: dict):
     payload : dict
         JSON payload
 
+    policy : RetryPolicy, optional
+        Overrides the policy registered for the endpoint
+
     Returns
     -------
     dict
@@ -86,27 +535,110 @@ async def call_automation(endpoint: str, payload: dict):
     Raises
     ------
     httpx.HTTPStatusError
-        If backend returns 4xx/5xx
+        If backend returns 4xx/5xx (after retries, when retryable)
+
+    CircuitOpenError
+        If the circuit breaker is open
     """
 
-    url = f"{AUTOMATION_BASE_URL}{endpoint}"
+    started = time.monotonic()
+    ok = False
 
-    logger.info("Calling automation endpoint: %s", url)
+    try:
+        result = await _post_with_retries(endpoint, payload, policy)
+        ok = True
+        return result
+    finally:
+        _notify_automation_listeners(endpoint, time.monotonic() - started, ok)
 
-    client = _get_client()
 
-    response = await client.post(
-        url,
-        json=payload,
-    )
+async def _post_with_retries(endpoint: str, payload: dict, policy: RetryPolicy | None):
 
-    response.raise_for_status()
+    url = f"{AUTOMATION_BASE_URL}{endpoint}"
+    policy = policy or RETRY_POLICIES.get(endpoint, DEFAULT_RETRY_POLICY)
+    headers = {"Idempotency-Key": idempotency_key(endpoint, payload)}
 
-    try:
-        return response.json()
-    except Exception:
-        logger.error("Automation response was not JSON: %s", response.text)
-        raise
+    logger.info("Calling automation endpoint: %s", url)
+
+    client = _get_client()
+    started = time.monotonic()
+    attempt = 0
+
+    while True:
+        attempt += 1
+
+        if not automation_breaker.allow_request():
+            logger.warning("Automation circuit open; skipping %s", endpoint)
+            raise CircuitOpenError(endpoint)
+
+        remaining = policy.deadline - (time.monotonic() - started)
+        attempt_started = time.monotonic()
+
+        try:
+            response = await client.post(
+                url,
+                json=payload,
+                headers=headers,
+                timeout=min(policy.attempt_timeout, remaining),
+            )
+            response.raise_for_status()
+
+        except asyncio.CancelledError:
+            # Caller gave up (e.g. the tool's wait_for); a slow attempt still
+            # tells us the backend is unhealthy
+            if time.monotonic() - attempt_started > automation_breaker.slow_call_seconds:
+                automation_breaker.record_failure()
+            raise
+
+        except Exception as e:
+            latency_ms = (time.monotonic() - attempt_started) * 1000
+            status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else type(e).__name__
+
+            logger.warning(
+                "Automation attempt failed | endpoint=%s | attempt=%s | status=%s | latency_ms=%.0f",
+                endpoint,
+                attempt,
+                status,
+                latency_ms,
+            )
+
+            # A request the backend rejected (4xx) still shows it is up
+            if isinstance(e, httpx.HTTPStatusError) and _backend_healthy(e.response.status_code):
+                automation_breaker.record_success(latency_ms / 1000)
+            else:
+                automation_breaker.record_failure()
+
+            if not _is_retryable(e) or attempt >= policy.max_attempts:
+                raise
+
+            delay = random.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** (attempt - 1)))
+            delay = max(delay, _retry_after(e) or 0)
+
+            remaining = policy.deadline - (time.monotonic() - started)
+
+            # Not worth sleeping if no meaningful attempt fits afterwards
+            if delay + 1 > remaining:
+                raise
+
+            await asyncio.sleep(delay)
+            continue
+
+        latency = time.monotonic() - attempt_started
+        automation_breaker.record_success(latency)
+
+        logger.info(
+            "Automation attempt ok | endpoint=%s | attempt=%s | status=%s | latency_ms=%.0f",
+            endpoint,
+            attempt,
+            response.status_code,
+            latency * 1000,
+        )
+
+        try:
+            return response.json()
+        except Exception:
+            logger.error("Automation response was not JSON: %s", response.text)
+            raise
 
 
 # =====================================================
@@ -184,4 +716,15 @@ async def close_http_client():
 
     if _http_client:
         await _http_client.aclose()
-        _http_client = None
\ No newline at end of file
+        _http_client = None
+
+
+async def close_livekit_api():
+    """
+    Closes the shared LiveKitAPI client.
+    """
+    global _livekit_api
+
+    if _livekit_api:
+        await _livekit_api.aclose()
+        _livekit_api = None
@@ -0,0 +1,171 @@
+import os
+import logging
+import threading
+
+from collections import deque
+
+from livekit.agents import JobContext, JobRequest
+from livekit.agents.utils.hw import get_cpu_monitor
+
+import worker_metrics
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("worker_load")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+# Score at which the worker counts as saturated and LiveKit stops
+# dispatching to it
+LOAD_THRESHOLD = float(os.getenv("WORKER_LOAD_THRESHOLD", 0.8))
+
+# What happens to a call dispatched before LiveKit saw the worker's load
+# cross the threshold:
+# "busy": take it and turn the caller away with a cached message
+# "reject": hand it back to dispatch for another instance
+ADMISSION_MODE = os.getenv("WORKER_ADMISSION_MODE", "busy")
+
+# Calls one instance sustains; measure it with bench/run_load_test.py
+MAX_CONCURRENT_CALLS = int(os.getenv("MAX_CONCURRENT_CALLS", 4))
+
+# Job-process event-loop lag that counts as fully loaded
+LOOP_LAG_LIMIT = float(os.getenv("WORKER_LOOP_LAG_LIMIT", 0.1))
+
+# VAD inference seconds per second of audio that counts as fully loaded
+VAD_LOAD_LIMIT = float(os.getenv("WORKER_VAD_LOAD_LIMIT", 0.5))
+
+CPU_SAMPLE_SECONDS = 0.5
+CPU_AVERAGE_SAMPLES = 5
+
+# Agent participant attribute on jobs accepted only to play the busy message
+ADMISSION_ATTRIBUTE = "salon.admission"
+ADMISSION_BUSY = "busy"
+
+
+# =====================================================
+# LOAD SCORE
+# =====================================================
+
+class WorkerLoad:
+    """
+    Load score of this worker between 0 and 1: the highest of active calls
+    over MAX_CONCURRENT_CALLS, CPU (cgroup-aware), and the worst job
+    process's event-loop lag and VAD load over their limits.
+
+    Job processes publish their lag and VAD load through the worker_metrics
+    snapshots, so those two signals trail by up to one flush interval.
+    """
+
+    def __init__(self):
+        self.score = 0.0
+        self.signals: dict[str, float] = {}
+
+        self._cpu = deque(maxlen=CPU_AVERAGE_SAMPLES)
+        self._lock = threading.Lock()
+        self._cpu_thread: threading.Thread | None = None
+
+    def _sample_cpu(self):
+        monitor = get_cpu_monitor()
+
+        while True:
+            value = monitor.cpu_percent(CPU_SAMPLE_SECONDS)
+            with self._lock:
+                self._cpu.append(value)
+
+    def cpu(self) -> float:
+        with self._lock:
+            if self._cpu_thread is None:
+                self._cpu_thread = threading.Thread(
+                    target=self._sample_cpu,
+                    name="worker-load-cpu",
+                    daemon=True,
+                )
+                self._cpu_thread.start()
+
+            return sum(self._cpu) / len(self._cpu) if self._cpu else 0.0
+
+    def update(self, worker) -> float:
+        jobs = collected = None
+
+        try:
+            jobs = len(worker.active_jobs)
+            collected = worker_metrics.collect_metrics()
+        except Exception:
+            logger.exception("Failed to read load signals")
+
+        signals = {"cpu": self.cpu()}
+
+        if jobs is not None:
+            signals["calls"] = jobs / MAX_CONCURRENT_CALLS
+
+        if collected is not None:
+            signals["loop_lag"] = (
+                collected.max_gauge("salon_job_event_loop_lag_seconds") / LOOP_LAG_LIMIT
+            )
+            signals["vad"] = collected.max_gauge("salon_job_vad_load") / VAD_LOAD_LIMIT
+
+        score = min(1.0, max(signals.values()))
+        saturated = score >= LOAD_THRESHOLD
+
+        if saturated != (self.score >= LOAD_THRESHOLD):
+            logger.warning(
+                "Worker %s | score=%.2f | %s",
+                "saturated" if saturated else "recovered",
+                score,
+                " | ".join(f"{k}={v:.2f}" for k, v in signals.items()),
+            )
+
+        self.score = score
+        self.signals = signals
+
+        worker_metrics.set_gauge("salon_worker_load", score)
+        for name, value in signals.items():
+            worker_metrics.set_gauge("salon_worker_load_signal", value, signal=name)
+
+        return score
+
+    # ── WorkerOptions hooks ───────────────────────────────────────────────────
+
+    def load_fnc(self, worker) -> float:
+        """
+        Reported to LiveKit every 0.5 s, unclamped, so dispatch and any
+        autoscaler reading it see the worker as full once it is.
+        """
+
+        return self.update(worker)
+
+    async def request_fnc(self, request: JobRequest):
+        # Dispatch already skips a full worker; this catches jobs sent
+        # before the latest report reached it
+        if self.score < LOAD_THRESHOLD:
+            await request.accept()
+            return
+
+        worker_metrics.inc("salon_calls_turned_away_total", mode=ADMISSION_MODE)
+        logger.warning(
+            "Turning call away | mode=%s | score=%.2f | room=%s",
+            ADMISSION_MODE,
+            self.score,
+            request.room.name,
+        )
+
+        if ADMISSION_MODE == ADMISSION_BUSY:
+            await request.accept(attributes={ADMISSION_ATTRIBUTE: ADMISSION_BUSY})
+        else:
+            # Lets dispatch offer the call to another worker
+            await request.reject(terminate=False)
+
+
+# Load of this worker process
+WORKER_LOAD = WorkerLoad()
+
+
+def admitted_busy(ctx: JobContext) -> bool:
+    """True when the worker accepted this job only to play the busy message."""
+
+    return ctx.agent.attributes.get(ADMISSION_ATTRIBUTE) == ADMISSION_BUSY
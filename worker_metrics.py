@@ -0,0 +1,456 @@
+import os
+import json
+import bisect
+import asyncio
+import logging
+import threading
+
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# =====================================================
+# LOGGING
+# =====================================================
+
+logger = logging.getLogger("worker_metrics")
+
+
+# =====================================================
+# CONSTANTS
+# =====================================================
+
+# Every job process runs in its own process, so each one periodically dumps
+# its metrics here and the worker process aggregates them on scrape
+METRICS_DIR = Path(
+    os.getenv(
+        "METRICS_DIR",
+        Path(__file__).resolve().parent / ".metrics",
+    )
+)
+
+# 0 disables the HTTP endpoint
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9464))
+
+METRICS_FLUSH_SECONDS = 5
+
+LOOP_LAG_INTERVAL = 0.5
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 20.0,
+)
+
+LOOP_LAG_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+# Audio covered by one Silero inference (512 samples at 16 kHz)
+VAD_WINDOW_SECONDS = 0.032
+
+METRIC_HELP = {
+    "salon_active_calls": ("gauge", "Calls currently being handled"),
+    "salon_calls_started_total": ("counter", "Calls whose participant joined"),
+    "salon_calls_completed_total": ("counter", "Calls that reached on_shutdown"),
+    "salon_calls_ghosted_total": ("counter", "Calls that disconnected before joining"),
+    "salon_tool_invocations_total": ("counter", "Function tool invocations by outcome"),
+    "salon_automation_requests_total": ("counter", "call_automation calls by outcome"),
+    "salon_automation_latency_seconds": ("histogram", "call_automation latency including retries"),
+    "salon_automation_warmup_seconds": ("histogram", "Backend warm-up at call start, when reachable"),
+    "salon_after_call_delivery_failures_total": ("counter", "Failed after-call delivery attempts"),
+    "salon_watchdog_hangups_total": ("counter", "Calls ended by the max-duration watchdog"),
+    "salon_hangup_after_playout_seconds": ("histogram", "Closing phrase playout to caller removal"),
+    "salon_event_loop_lag_seconds": ("histogram", "Event-loop scheduling lag in job processes"),
+    "salon_turn_latency_seconds": ("histogram", "Per-turn pipeline latency by stage"),
+    "salon_job_event_loop_lag_seconds": ("gauge", "Latest event-loop lag of each job process"),
+    "salon_job_vad_load": ("gauge", "VAD inference seconds per second of audio, per job process"),
+    "salon_worker_load": ("gauge", "Load score reported to LiveKit dispatch"),
+    "salon_worker_load_signal": ("gauge", "Load score inputs relative to their limits"),
+    "salon_calls_turned_away_total": ("counter", "Jobs turned away by admission control"),
+    "salon_preflight_total": ("counter", "Speculative replies on interim transcripts by outcome"),
+    "salon_pending_deadlines": ("gauge", "Live per-call deadlines, by name"),
+    "salon_next_deadline_timestamp_seconds": ("gauge", "Unix time the earliest live deadline fires, by name and job process; 0 when none"),
+    "salon_deadlines_expired_total": ("counter", "Per-call deadlines that expired, by name"),
+    "salon_idle_prompts_total": ("counter", "Times a silent caller was asked if they are still there"),
+    "salon_idle_hangups_total": ("counter", "Calls ended because the caller stayed silent"),
+    "salon_call_screening_total": ("counter", "Calls screened at start, by label and reason"),
+    "salon_machine_hangups_total": ("counter", "Calls dropped as voicemail, IVR, robocall or fax"),
+    "salon_transcript_batches_total": ("counter", "Transcript batches streamed during calls, by outcome"),
+    "salon_journal_recoveries_total": ("counter", "Orphaned transcript journals recovered by the outbox drainer, by outcome"),
+    "salon_idle_reclaimed_seconds_total": ("counter", "Call time freed by idle hang-ups before the max duration"),
+}
+
+
+# =====================================================
+# HISTOGRAM
+# =====================================================
+
+class Histogram:
+    """
+    Fixed-bucket histogram (Prometheus-style cumulative buckets).
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram"):
+        if other.buckets != self.buckets:
+            return
+
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """
+        Returns (upper bound, cumulative count) pairs, ending with +Inf.
+        """
+
+        total = 0
+        result = []
+
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            result.append((bound, total))
+
+        return result
+
+
+# =====================================================
+# REGISTRY
+# =====================================================
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and histograms keyed by (name, labels).
+    """
+
+    def __init__(self):
+        self.counters: dict[tuple[str, LabelKey], float] = defaultdict(float)
+        self.gauges: dict[tuple[str, LabelKey], float] = {}
+        self.histograms: dict[tuple[str, LabelKey], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            self.counters[(name, _label_key(labels))] += value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        *,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        **labels,
+    ):
+        key = (name, _label_key(labels))
+
+        with self._lock:
+            histogram = self.histograms.get(key)
+
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+
+            histogram.observe(value)
+
+    def max_gauge(self, name: str) -> float:
+        """Highest value of a gauge across its label sets, 0 if unset."""
+
+        with self._lock:
+            return max((v for (n, _), v in self.gauges.items() if n == name), default=0.0)
+
+    # ── Serialization ─────────────────────────────────────────────────────────
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "counters": [[n, dict(l), v] for (n, l), v in self.counters.items()],
+                "gauges": [[n, dict(l), v] for (n, l), v in self.gauges.items()],
+                "histograms": [
+                    [n, dict(l), list(h.buckets), h.counts, h.sum, h.count]
+                    for (n, l), h in self.histograms.items()
+                ],
+            }
+
+    def merge_dict(self, data: dict, *, include_gauges: bool = True):
+        with self._lock:
+            for name, labels, value in data.get("counters", []):
+                self.counters[(name, _label_key(labels))] += value
+
+            if include_gauges:
+                for name, labels, value in data.get("gauges", []):
+                    key = (name, _label_key(labels))
+                    self.gauges[key] = self.gauges.get(key, 0) + value
+
+            for name, labels, buckets, counts, total, count in data.get("histograms", []):
+                key = (name, _label_key(labels))
+
+                incoming = Histogram(tuple(buckets))
+                incoming.counts = list(counts)
+                incoming.sum = total
+                incoming.count = count
+
+                if key in self.histograms:
+                    self.histograms[key].merge(incoming)
+                else:
+                    self.histograms[key] = incoming
+
+    # ── Exposition ────────────────────────────────────────────────────────────
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format (0.0.4).
+        """
+
+        by_name: dict[str, list[str]] = defaultdict(list)
+
+        def fmt(labels: LabelKey, extra: tuple = ()) -> str:
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                by_name[name].append(f"{name}{fmt(labels)} {value:g}")
+
+            for (name, labels), value in sorted(self.gauges.items()):
+                by_name[name].append(f"{name}{fmt(labels)} {value:g}")
+
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                for bound, count in histogram.cumulative():
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    by_name[name].append(f"{name}_bucket{fmt(labels, (('le', le),))} {count}")
+                by_name[name].append(f"{name}_sum{fmt(labels)} {histogram.sum:g}")
+                by_name[name].append(f"{name}_count{fmt(labels)} {histogram.count}")
+
+        lines = []
+
+        for name in sorted(by_name):
+            kind, help_text = METRIC_HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(by_name[name])
+
+        return "\n".join(lines) + "\n"
+
+
+# Metrics recorded by this process
+REGISTRY = MetricsRegistry()
+
+
+def inc(name: str, value: float = 1, **labels):
+    REGISTRY.inc(name, value, **labels)
+
+
+def set_gauge(name: str, value: float, **labels):
+    REGISTRY.set(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    REGISTRY.observe(name, value, **labels)
+
+
+def record_automation(endpoint: str, seconds: float, ok: bool):
+    """Listener for utils.add_automation_listener."""
+    inc("salon_automation_requests_total", endpoint=endpoint, outcome="ok" if ok else "error")
+    observe("salon_automation_latency_seconds", seconds, endpoint=endpoint)
+
+
+def record_vad_load(inference_seconds: float, inference_count: int):
+    """
+    Records how much of real time this job process spends in VAD inference,
+    from the totals of one livekit VADMetrics report.
+    """
+
+    if inference_count:
+        set_gauge(
+            "salon_job_vad_load",
+            inference_seconds / (inference_count * VAD_WINDOW_SECONDS),
+            pid=os.getpid(),
+        )
+
+
+# =====================================================
+# JOB PROCESS EXPORT
+# =====================================================
+
+def flush_metrics():
+    """
+    Atomically writes this process's metrics to METRICS_DIR/<pid>.json.
+    """
+
+    path = METRICS_DIR / f"{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+
+    try:
+        METRICS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(REGISTRY.to_dict()))
+        os.replace(tmp, path)
+    except OSError:
+        logger.warning("Failed to write metrics snapshot: %s", path)
+
+
+async def run_metrics_flusher(interval: float = METRICS_FLUSH_SECONDS):
+    """Periodically flushes this process's metrics until cancelled."""
+
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(flush_metrics)
+    finally:
+        flush_metrics()
+
+
+async def monitor_event_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """
+    Measures how late the event loop wakes up from a fixed sleep.
+
+    The latest sample is also kept per process, for the worker's load score.
+    """
+
+    loop = asyncio.get_running_loop()
+    pid = os.getpid()
+
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+
+        lag = max(0.0, loop.time() - expected)
+        REGISTRY.observe("salon_event_loop_lag_seconds", lag, buckets=LOOP_LAG_BUCKETS)
+        REGISTRY.set("salon_job_event_loop_lag_seconds", lag, pid=pid)
+
+
+# =====================================================
+# WORKER AGGREGATION
+# =====================================================
+
+_ARCHIVE_NAME = "_archive.json"
+_aggregate_lock = threading.Lock()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect_metrics() -> MetricsRegistry:
+    """
+    Aggregates this process, every live job process and the archive of
+    exited ones. Files of exited processes are folded into the archive
+    (counters and histograms only; their gauges no longer apply).
+    """
+
+    with _aggregate_lock:
+        archive = MetricsRegistry()
+        archive_path = METRICS_DIR / _ARCHIVE_NAME
+
+        try:
+            archive.merge_dict(json.loads(archive_path.read_text()))
+        except (OSError, ValueError):
+            pass
+
+        live = MetricsRegistry()
+        archive_changed = False
+
+        for path in METRICS_DIR.glob("*.json"):
+            if path.name == _ARCHIVE_NAME:
+                continue
+
+            try:
+                pid = int(path.stem)
+                data = json.loads(path.read_text())
+            except (ValueError, OSError):
+                continue
+
+            if pid == os.getpid():
+                continue
+
+            if _pid_alive(pid):
+                live.merge_dict(data)
+            else:
+                archive.merge_dict(data, include_gauges=False)
+                path.unlink(missing_ok=True)
+                archive_changed = True
+
+        if archive_changed:
+            tmp = archive_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(archive.to_dict()))
+            os.replace(tmp, archive_path)
+
+        total = MetricsRegistry()
+        total.merge_dict(archive.to_dict())
+        total.merge_dict(live.to_dict())
+        total.merge_dict(REGISTRY.to_dict())
+
+        return total
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = collect_metrics().render().encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return
+
+
+def start_metrics_server(port: int = METRICS_PORT) -> ThreadingHTTPServer | None:
+    """
+    Serves GET /metrics from a daemon thread in the worker process.
+
+    Snapshots left by a previous worker run are discarded so counters start
+    from zero, as Prometheus expects after a restart.
+    """
+
+    if not port:
+        return None
+
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    for path in METRICS_DIR.glob("*.json"):
+        path.unlink(missing_ok=True)
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+
+    threading.Thread(
+        target=server.serve_forever,
+        name="metrics-http",
+        daemon=True,
+    ).start()
+
+    logger.info("Metrics endpoint listening on :%s/metrics", port)
+    return server